@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式引擎并行扩展性基准
+
+按 1/2/4/8 个工作进程生成同一份大表，输出耗时、行/秒和相对单进程的加速比。
+
+用法:
+    python benchmarks/bench_parallel_write.py --rows 1000000 --cols 10
+"""
+
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.xlsx_stream import XlsxStreamWriter
+
+
+def build_rows(rows, cols):
+    """构造混合数字和文本的合成数据"""
+    columns = [f"col{c}" for c in range(cols)]
+    data = [[r if c % 3 == 0 else (r * 0.25 if c % 3 == 1 else f"text-{r}-{c}") for c in range(cols)]
+            for r in range(rows)]
+    return columns, data
+
+
+def run(rows, cols, workers_list, repeat):
+    columns, data = build_rows(rows, cols)
+    print(f"rows={rows} cols={cols} cpus={os.cpu_count()}")
+    print(f"{'workers':>8} {'seconds':>10} {'rows/sec':>12} {'speedup':>8} {'size(MB)':>10}")
+    baseline = None
+    for workers in workers_list:
+        best = None
+        size = 0
+        for _ in range(repeat):
+            buffer = BytesIO()
+            start = time.perf_counter()
+            XlsxStreamWriter({}, workers=workers).write(buffer, columns, data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            size = buffer.tell()
+        baseline = baseline or best
+        print(f"{workers:>8} {best:>10.3f} {rows / best:>12.0f} {baseline / best:>8.2f} {size / 1e6:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式引擎并行扩展性基准")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--workers", default="1,2,4,8", help="逗号分隔的进程数列表")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    run(args.rows, args.cols, [int(w) for w in args.workers.split(",")], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+单工作表读取基准：按需读取器 vs pd.read_excel
+
+生成一个包含多个工作表、且每个单元格都带样式的工作簿，分别用两种方式读取第一个工作表，
+输出耗时和 tracemalloc 统计的峰值内存。
+
+用法:
+    python benchmarks/bench_read_sheet.py --sheets 20 --rows 5000 --cols 10
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Border, Font, PatternFill, Side
+
+from tools.xlsx_reader import XlsxReader, read_sheet_records
+
+
+def build_workbook(sheets, rows, cols):
+    """构造多工作表、重度样式化的工作簿"""
+    wb = Workbook()
+    thin = Side(style="thin")
+    fonts = [Font(bold=i % 2 == 0, color=f"{i * 40:02X}0000") for i in range(5)]
+    fills = [PatternFill(start_color=f"00{i * 50:02X}FF", end_color=f"00{i * 50:02X}FF", fill_type="solid")
+             for i in range(5)]
+    for s in range(sheets):
+        ws = wb.active if s == 0 else wb.create_sheet()
+        ws.title = f"Sheet{s + 1}"
+        ws.append([f"列{c}" for c in range(cols)])
+        for r in range(rows):
+            ws.append([r * c if c % 2 else f"文本{r % 100}" for c in range(cols)])
+        for row in ws.iter_rows(min_row=1, max_row=rows + 1):
+            for cell in row:
+                cell.font = fonts[cell.row % 5]
+                cell.fill = fills[cell.column % 5]
+                cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16} {elapsed:>10.3f} {peak / 1e6:>12.1f}")
+    return result
+
+
+def read_streaming(content):
+    with XlsxReader(BytesIO(content)) as reader:
+        return read_sheet_records(reader)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单工作表读取基准")
+    parser.add_argument("--sheets", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--cols", type=int, default=10)
+    args = parser.parse_args()
+
+    content = build_workbook(args.sheets, args.rows, args.cols)
+    print(f"sheets={args.sheets} rows={args.rows} cols={args.cols} size={len(content) / 1e6:.2f}MB")
+    print(f"{'reader':<16} {'seconds':>10} {'peak(MB)':>12}")
+    measure("pandas", lambda: pd.read_excel(BytesIO(content), dtype=str))
+    measure("xlsx_reader", lambda: read_streaming(content))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+writeExcel / readExcel 性能基准套件
+
+按行数、列数、样式单元格密度和合并单元格数量构造合成负载，分别测量 generate_excel_bytes
+（openpyxl 和流式引擎）以及读取路径的吞吐（行/秒）、p50/p95 延迟和 tracemalloc 峰值内存。
+读取路径按每种输出格式分别测量，并列出输出的字节数和粗略估算的 token 数。
+
+结果可以保存为 JSON 基线，之后的运行与基线对比，超过容差的指标记为回归并以非零状态退出。
+内存峰值单独运行一次测量，避免 tracemalloc 的开销计入延迟。
+
+用法:
+    python benchmarks/bench_suite.py --preset quick
+    python benchmarks/bench_suite.py --preset quick --save benchmarks/baselines/quick.json
+    python benchmarks/bench_suite.py --preset quick --compare benchmarks/baselines/quick.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.readExcel import ReadExcelTool
+from tools.text_output import OUTPUT_FORMATS
+from tools.writeExcel import WriteExcelTool
+
+# 场景：(行数, 列数, 样式单元格比例, 合并单元格数量)
+PRESETS = {
+    "quick": [
+        (1000, 5, 0.0, 0),
+        (1000, 5, 0.2, 50),
+        (10000, 10, 0.0, 0),
+        (10000, 10, 0.05, 500),
+    ],
+    "full": [
+        (1000, 5, 0.0, 0),
+        (1000, 20, 0.2, 100),
+        (10000, 10, 0.0, 0),
+        (10000, 10, 0.1, 1000),
+        (50000, 10, 0.0, 0),
+        (50000, 20, 0.02, 2000),
+        (200000, 10, 0.0, 0),
+    ],
+}
+
+# 写入变体：名称 -> 追加到 format 的配置；stream 默认按列基数选择共享字符串，stream-inline 全部内联
+WRITE_VARIANTS = {
+    "openpyxl": {"engine": "openpyxl"},
+    "stream": {"engine": "stream"},
+    "stream-inline": {"engine": "stream", "shared_strings": False},
+}
+# 与基线对比时允许的相对变化
+DEFAULT_TOLERANCE = 0.25
+# 粗略的 token 估算：每个汉字、英文单词、不超过 3 位的数字片段和标点各算一个，仅用于比较输出格式
+_TOKEN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff]|[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+STYLES = [
+    {"font": {"bold": True, "color": "FFFFFF"}, "background_color": "366092"},
+    {"border": {"left": "thin", "right": "thin", "top": "thin", "bottom": "thin"}},
+    {"alignment": {"horizontal": "center", "wrap_text": True}, "font": {"italic": True, "size": 12}},
+]
+
+
+def build_payload(rows, cols, style_density, merges):
+    """构造 writeExcel 的增强格式 JSON 负载"""
+    data = [{f"列{c}": (r * c if c % 3 == 0 else (r * 0.25 if c % 3 == 1 else f"文本{r % 500}-{c}"))
+             for c in range(cols)} for r in range(rows)]
+    cells = {}
+    if style_density:
+        step = max(1, round(1 / style_density))
+        total = (rows + 1) * cols
+        for i in range(0, total, step):
+            cells[f"{i // cols + 1},{i % cols + 1}"] = STYLES[i % len(STYLES)]
+    # 合并范围互不重叠：每两行合并相邻两列
+    merge_cells = [f"A{2 + 2 * m}:B{3 + 2 * m}" for m in range(min(merges, rows // 2))]
+    return json.dumps({"data": data, "format": {"cells": cells, "merge_cells": merge_cells}},
+                      ensure_ascii=False)
+
+
+def with_format(payload, options):
+    data = json.loads(payload)
+    data["format"].update(options)
+    return json.dumps(data, ensure_ascii=False)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def measure(func, repeat):
+    """运行 repeat 次测延迟，再单独运行一次测 tracemalloc 峰值"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return samples, peak
+
+
+def approx_tokens(text):
+    return len(_TOKEN_RE.findall(text))
+
+
+def summarize(rows, samples, peak, output_bytes=None, tokens=None):
+    p50 = percentile(samples, 50)
+    result = {
+        "rows_per_sec": round(rows / p50, 1),
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "peak_mb": round(peak / 1e6, 2),
+    }
+    if output_bytes is not None:
+        result["size_kb"] = round(output_bytes / 1024, 1)
+    if tokens is not None:
+        result["tokens_k"] = round(tokens / 1000, 1)
+    return result
+
+
+def run_suite(scenarios, repeat):
+    writer = WriteExcelTool(Mock(), Mock())
+    reader = ReadExcelTool(Mock(), Mock())
+    results = {}
+    for rows, cols, density, merges in scenarios:
+        payload = build_payload(rows, cols, density, merges)
+        scenario = f"r{rows}_c{cols}_s{density:g}_m{merges}"
+        excel_bytes = None
+        for variant, options in WRITE_VARIANTS.items():
+            variant_payload = with_format(payload, options)
+            samples, peak = measure(lambda: writer.generate_excel_bytes(variant_payload), repeat)
+            output, _ = writer.generate_excel_bytes(variant_payload)
+            results[f"write/{variant}/{scenario}"] = summarize(rows, samples, peak, len(output))
+            if variant == "openpyxl":
+                excel_bytes = output
+        for output_format in OUTPUT_FORMATS:
+            samples, peak = measure(
+                lambda: reader._read_records(BytesIO(excel_bytes), output_format=output_format), repeat)
+            text = reader._read_records(BytesIO(excel_bytes), output_format=output_format)
+            results[f"read/{output_format}/{scenario}"] = summarize(
+                rows, samples, peak, len(text.encode("utf-8")), approx_tokens(text))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """与基线对比，返回回归列表：延迟和内存升高、吞吐下降超过容差即视为回归"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms", "peak_mb"):
+            if base[key] and metrics[key] > base[key] * (1 + tolerance):
+                regressions.append((name, key, base[key], metrics[key]))
+        if metrics["rows_per_sec"] < base["rows_per_sec"] * (1 - tolerance):
+            regressions.append((name, "rows_per_sec", base["rows_per_sec"], metrics["rows_per_sec"]))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<42} {'rows/sec':>12} {'p50(ms)':>10} {'p95(ms)':>10} {'peak(MB)':>10} "
+          f"{'size(KB)':>10} {'tokens(k)':>10} {'vs base':>8}")
+    for name, m in results.items():
+        ratio = ""
+        if baseline and name in baseline and baseline[name]["p50_ms"]:
+            ratio = f"{m['p50_ms'] / baseline[name]['p50_ms']:.2f}x"
+        size = f"{m['size_kb']:.1f}" if "size_kb" in m else ""
+        tokens = f"{m['tokens_k']:.1f}" if "tokens_k" in m else ""
+        print(f"{name:<42} {m['rows_per_sec']:>12.0f} {m['p50_ms']:>10.1f} {m['p95_ms']:>10.1f} "
+              f"{m['peak_mb']:>10.1f} {size:>10} {tokens:>10} {ratio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="writeExcel / readExcel 性能基准套件")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的计时次数")
+    parser.add_argument("--save", help="把结果保存为 JSON 基线")
+    parser.add_argument("--compare", help="与指定的 JSON 基线对比")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_suite(PRESETS[args.preset], args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "preset": args.preset,
+                "repeat": args.repeat,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, key, before, after in regressions:
+            print(f"REGRESSION {name} {key}: {before} -> {after}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
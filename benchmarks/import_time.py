@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+插件冷启动导入耗时测量
+
+在新的解释器中以 `python -X importtime` 导入工具模块，解析 stderr 中每个模块的自身耗时和
+累计耗时，输出总耗时、累计耗时最高的顶层模块，以及 pandas / openpyxl 等重依赖是否在启动时
+被导入。每次测量都是全新进程，结果包含解释器自身的启动开销之外的全部导入时间。
+
+结果可以保存为 JSON 基线，之后的运行与基线对比，总耗时超过容差或重依赖重新出现在启动
+路径上时以非零状态退出。
+
+用法:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --top 15
+    python benchmarks/import_time.py --save benchmarks/baselines/import_time.json
+    python benchmarks/import_time.py --compare benchmarks/baselines/import_time.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ("tools.writeExcel", "tools.readExcel")
+# 应当延迟到首次使用时才导入的重依赖
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl")
+# 与基线对比时允许的相对变化
+DEFAULT_TOLERANCE = 0.25
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 [(模块名, 层级, 自身微秒, 累计微秒)]"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure(modules):
+    """在新进程中导入模块，返回解析后的导入记录"""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Import failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(runs, top):
+    """汇总多次测量：总耗时取中位数，顶层模块按累计耗时排序"""
+    totals = [sum(cum for _, level, _, cum in entries if level == 0) for entries in runs]
+    last = runs[-1]
+    loaded = {name for name, _, _, _ in last}
+    top_level = sorted(((cum, name) for name, level, _, cum in last if level == 0), reverse=True)[:top]
+    return {
+        "total_ms": round(statistics.median(totals) / 1000, 1),
+        "runs_ms": [round(total / 1000, 1) for total in totals],
+        "modules_loaded": len(loaded),
+        "heavy_modules": sorted(name for name in HEAVY_MODULES if name in loaded),
+        "top": [{"module": name, "cumulative_ms": round(cum / 1000, 1)} for cum, name in top_level],
+    }
+
+
+def compare(summary, baseline, tolerance):
+    """与基线对比，返回回归说明列表"""
+    regressions = []
+    limit = baseline["total_ms"] * (1 + tolerance)
+    if summary["total_ms"] > limit:
+        regressions.append(f"total import time {summary['total_ms']} ms > {limit:.1f} ms "
+                           f"(baseline {baseline['total_ms']} ms)")
+    for name in sorted(set(summary["heavy_modules"]) - set(baseline["heavy_modules"])):
+        regressions.append(f"{name} is imported at startup again")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="要导入的模块")
+    parser.add_argument("--repeat", type=int, default=3, help="测量次数，总耗时取中位数")
+    parser.add_argument("--top", type=int, default=10, help="列出累计耗时最高的顶层模块数量")
+    parser.add_argument("--save", help="把结果保存为 JSON 基线")
+    parser.add_argument("--compare", help="与 JSON 基线对比")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的相对变化")
+    args = parser.parse_args()
+
+    summary = summarize([measure(args.modules) for _ in range(max(1, args.repeat))], args.top)
+    summary["python"] = sys.version.split()[0]
+    summary["imports"] = args.modules
+
+    print(f"Import {', '.join(args.modules)}: {summary['total_ms']} ms "
+          f"(runs: {summary['runs_ms']}), {summary['modules_loaded']} modules loaded")
+    print(f"Heavy modules imported at startup: {', '.join(summary['heavy_modules']) or 'none'}")
+    for item in summary["top"]:
+        print(f"  {item['cumulative_ms']:>9.1f} ms  {item['module']}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"Baseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
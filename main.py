@@ -1,6 +1,10 @@
 from dify_plugin import Plugin, DifyPluginEnv
 
+from tools.warmup import warm_up
+
 plugin = Plugin(DifyPluginEnv(MAX_REQUEST_TIMEOUT=120))
 
 if __name__ == '__main__':
+    # EXCEL_TOOL_WARMUP 配置时在开始接收请求之前预热
+    warm_up()
     plugin.run()
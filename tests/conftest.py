@@ -21,6 +21,35 @@ def pytest_configure(config):
         "markers", "slow: 标记为慢速测试"
     )
 
+@pytest.fixture(autouse=True)
+def clear_output_cache():
+    """各测试之间不共享 writeExcel 的输出缓存"""
+    from tools.output_cache import output_cache
+    output_cache.clear()
+    yield
+    output_cache.clear()
+
+@pytest.fixture
+def style_snapshot():
+    """把工作表中有值或有样式的单元格整理为 {坐标: (值, 字体, 背景, 边框, 对齐, 数字格式)}，用于比较两个引擎的输出"""
+    def snapshot(ws):
+        cells = {}
+        for row in ws.iter_rows():
+            for cell in row:
+                if cell.value is None and not cell.has_style:
+                    continue
+                font, fill, border, align = cell.font, cell.fill, cell.border, cell.alignment
+                cells[cell.coordinate] = (
+                    cell.value,
+                    (font.b, font.i, font.sz, font.name, font.color.rgb if font.color is not None else None),
+                    (fill.fill_type, fill.fgColor.rgb),
+                    tuple(getattr(border, side).style for side in ('left', 'right', 'top', 'bottom')),
+                    (align.horizontal, align.vertical, bool(align.wrap_text)),
+                    cell.number_format,
+                )
+        return cells
+    return snapshot
+
 @pytest.fixture
 def mock_runtime():
     """模拟运行时对象"""
@@ -61,4 +90,83 @@ def enhanced_data(simple_data):
                 }
             }
         }
-    } 
\ No newline at end of file
+    } 
+
+
+class _FileServer:
+    """本地 HTTP 文件服务，支持 Range 请求和 keep-alive，并记录每次请求的字节范围"""
+
+    def __init__(self, directory, supports_ranges=True):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.directory = directory
+        self.supports_ranges = supports_ranges
+        self.requests = []
+        self.connections = 0
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                owner.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = owner.directory / self.path.lstrip("/")
+                if not path.is_file():
+                    self.send_error(404)
+                    return
+                content = path.read_bytes()
+                range_header = self.headers.get("Range")
+                if range_header and owner.supports_ranges:
+                    start, end = range_header.split("=", 1)[1].split("-")
+                    start, end = int(start), min(int(end), len(content) - 1)
+                    body = content[start:end + 1]
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+                    owner.requests.append((start, end))
+                else:
+                    body = content
+                    self.send_response(200)
+                    owner.requests.append((0, len(content) - 1))
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Accept-Ranges", "bytes" if owner.supports_ranges else "none")
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    @property
+    def bytes_served(self):
+        return sum(end - start + 1 for start, end in self.requests)
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/{name}"
+
+    def __call__(self, name, content):
+        """写入文件并返回模拟的 Dify 文件对象"""
+        from unittest.mock import Mock
+        (self.directory / name).write_bytes(content)
+        file_meta = Mock()
+        file_meta.url = self.url(name)
+        file_meta.size = len(content)
+        return file_meta
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def file_server(tmp_path):
+    """本地 HTTP 文件服务，模拟 Dify 的文件下载地址"""
+    server = _FileServer(tmp_path)
+    yield server
+    server.close()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+from datetime import date, datetime
+from io import BytesIO
+from openpyxl import load_workbook
+
+from tools.column_types import convert_value, resolve_column_formats, table_options, to_excel_serial
+from tools.writeExcel import WriteExcelTool
+from tools.xlsx_stream import column_index
+
+
+class TestColumnTypes:
+    """列级类型转换测试"""
+
+    @pytest.mark.unit
+    def test_convert_value(self):
+        """测试各类型的转换，无法转换的值保持原样"""
+        assert convert_value("2024-01-02", "date") == date(2024, 1, 2)
+        assert convert_value("2024/01/02 08:30:00", "datetime") == datetime(2024, 1, 2, 8, 30)
+        assert convert_value("¥1,234.50", "currency") == 1234.5
+        assert convert_value("12.5%", "percent") == 0.125
+        assert convert_value("41.6", "integer") == 41.6
+        assert convert_value("1,024.0", "integer") == 1024 and isinstance(convert_value(3.0, "integer"), int)
+        assert convert_value(7, "text") == "7"
+        assert convert_value("N/A", "number") == "N/A"
+        assert convert_value(None, "date") is None
+
+    @pytest.mark.unit
+    def test_excel_serial(self):
+        """测试序列日期，包括 1900 年闰年问题前后的日期"""
+        assert to_excel_serial(date(1900, 1, 1)) == 1
+        assert to_excel_serial(date(1900, 3, 1)) == 61
+        assert to_excel_serial(datetime(2024, 1, 1, 12)) == 45292.5
+        assert to_excel_serial("x") == "x"
+
+    @pytest.mark.unit
+    def test_resolve_keys(self):
+        """测试列可以用表头名称、列字母或列号指定"""
+        resolved = resolve_column_formats(
+            {"入职日期": {"type": "date"}, "c": {"number_format": "0.0"}, "4": {"type": "percent"},
+             "未知": {"type": "date"}, "E": {"type": "bogus"}},
+            ["姓名", "入职日期"], column_index)
+        assert resolved == {2: ("date", "yyyy-mm-dd"), 3: (None, "0.0"), 4: ("percent", "0.00%")}
+
+    @pytest.mark.unit
+    def test_table_options(self):
+        """测试表格名称的规范化"""
+        assert table_options(False) is None
+        assert table_options(True)["name"] == "Table1"
+        assert table_options({"name": "2024 销售"})["name"] == "_2024_销售"
+
+
+class TestWriteExcelColumnFormats:
+    """WriteExcelTool 列级格式与表格测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_column_formats(self, engine):
+        """测试两种引擎按列写入类型化的值和数字格式"""
+        data = [{"姓名": "张三", "入职日期": "2024-01-02", "薪资": "8,000", "占比": "12.5%"},
+                {"姓名": "李四", "入职日期": None, "薪资": 9500, "占比": 0.3}]
+        payload = {"data": data, "format": {
+            "engine": engine,
+            "column_formats": {"入职日期": {"type": "date"}, "C": {"type": "currency"}, "4": {"type": "percent"}},
+            "cells": {"2,3": {"font": {"bold": True}}},
+        }}
+        excel_bytes, _ = self.tool.generate_excel_bytes(json.dumps(payload))
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        assert ws["B2"].value == datetime(2024, 1, 2)
+        assert ws["B2"].number_format == "yyyy-mm-dd"
+        assert ws["B3"].value is None
+        assert ws["C2"].value == 8000
+        assert ws["C2"].number_format == '"¥"#,##0.00'
+        assert ws["C2"].font.bold
+        assert ws["C3"].number_format == '"¥"#,##0.00'
+        assert ws["D2"].value == 0.125
+        assert ws["D3"].number_format == "0.00%"
+        # 表头不应用列格式
+        assert ws["B1"].number_format == "General"
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_integer_keeps_fraction(self, engine):
+        """测试 integer 列中带小数的值不被取整，只应用整数数字格式"""
+        payload = {"data": [{"数量": 2.5}, {"数量": "3.7"}, {"数量": "12"}], "format": {
+            "engine": engine, "column_formats": {"数量": {"type": "integer"}}}}
+        excel_bytes, _ = self.tool.generate_excel_bytes(json.dumps(payload))
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        assert [ws.cell(row=r, column=1).value for r in (2, 3, 4)] == [2.5, 3.7, 12]
+        assert {ws.cell(row=r, column=1).number_format for r in (2, 3, 4)} == {"0"}
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_table(self, simple_data, engine):
+        """测试两种引擎创建的表格"""
+        payload = {"data": simple_data, "format": {
+            "engine": engine, "start_row": 2, "table": {"name": "Staff", "style": "TableStyleLight1"}}}
+        excel_bytes, _ = self.tool.generate_excel_bytes(json.dumps(payload))
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        table = ws.tables["Staff"]
+        assert table.ref == f"A2:{ws.cell(row=2, column=ws.max_column).column_letter}{ws.max_row}"
+        assert table.tableStyleInfo.name == "TableStyleLight1"
+        assert table.tableStyleInfo.showRowStripes
+
+    @pytest.mark.unit
+    def test_table_requires_header(self, simple_data):
+        """测试不写表头时跳过表格"""
+        payload = {"data": simple_data, "format": {"show_header": False, "table": True}}
+        excel_bytes, _ = self.tool.generate_excel_bytes(json.dumps(payload))
+        assert not load_workbook(BytesIO(excel_bytes)).active.tables
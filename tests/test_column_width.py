@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+from io import BytesIO
+from openpyxl import load_workbook
+
+from tools.column_width import auto_width_options, compute_column_widths, display_width, max_display_width
+from tools.writeExcel import WriteExcelTool
+
+
+class TestColumnWidth:
+    """自动列宽计算测试"""
+
+    @pytest.mark.unit
+    def test_display_width(self):
+        """测试东亚宽字符计 2，多行文本取最长行"""
+        assert display_width("abc") == 3
+        assert display_width("技术部") == 6
+        assert display_width("ＡＢ") == 4
+        assert display_width("a技\n1234567") == 7
+
+    @pytest.mark.unit
+    def test_max_display_width(self):
+        """测试一列值的最大宽度，宽字符较短的字符串也能胜出"""
+        assert max_display_width(["abcde", "技术部门", None, float("nan")]) == 8
+        assert max_display_width([1.0, 12345, True]) == 5
+        assert max_display_width([]) == 0
+
+    @pytest.mark.unit
+    def test_compute_widths(self):
+        """测试字号换算和上下限"""
+        options = auto_width_options({"min_width": 5, "max_width": 30})
+        widths = compute_column_widths(["姓名", "备注"], [["张三"], ["x" * 100]], options,
+                                       {1: [("张三", 22)]})
+        assert widths[1] == 4 * 2 + 2
+        assert widths[2] == 30
+        assert auto_width_options(False) is None
+
+
+class TestWriteExcelAutoWidth:
+    """WriteExcelTool 自动列宽测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_auto_width_with_override(self, engine):
+        """测试两种引擎的自动列宽一致，显式 column_widths 优先"""
+        data = [{"姓名": "张三", "部门": "市场营销部门", "code": "a" * 20}]
+        payload = {"data": data, "format": {"engine": engine, "auto_width": True, "column_widths": {"C": 7}}}
+        excel_bytes, _ = self.tool.generate_excel_bytes(json.dumps(payload))
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        assert ws.column_dimensions["A"].width == 8
+        assert ws.column_dimensions["B"].width == 14
+        assert ws.column_dimensions["C"].width == 7
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+from io import BytesIO
+from openpyxl import load_workbook
+
+from tools.conditional_format import formula_value, parse_conditional_formats, resolve_range
+from tools.writeExcel import WriteExcelTool
+
+
+class TestConditionalFormat:
+    """条件格式解析测试"""
+
+    @pytest.mark.unit
+    def test_resolve_range(self):
+        """测试区域和整列两种写法"""
+        assert resolve_range("d2:$D$9", 2, 10) == "D2:D9"
+        assert resolve_range("D", 2, 10) == "D2:D10"
+        assert resolve_range("B:C E", 2, 10) == "B2:C10 E2:E10"
+        assert resolve_range("D", 2, 1) is None
+        assert resolve_range("D2:", 2, 10) is None
+
+    @pytest.mark.unit
+    def test_formula_value(self):
+        """测试比较值转换为公式文本"""
+        assert formula_value(8000) == "8000"
+        assert formula_value(0.5) == "0.5"
+        assert formula_value('说"明') == '"说""明"'
+        assert formula_value("=$B$1") == "$B$1"
+
+    @pytest.mark.unit
+    def test_invalid_rules_are_skipped(self, capsys):
+        """测试无效规则打印警告并跳过，其余规则保持顺序"""
+        rules = parse_conditional_formats([
+            {"range": "A", "type": "cell", "operator": "between", "value": [1, 5], "format": {"font": {"bold": True}}},
+            {"range": "A", "type": "cell", "operator": "~", "value": 1, "format": {"font": {"bold": True}}},
+            {"range": "A", "type": "cell", "value": 1},
+            {"range": "A", "type": "sparkle"},
+            {"range": "B", "type": "data_bar"},
+        ], 2, 5)
+        assert [rule["type"] for rule in rules] == ["cell", "data_bar"]
+        assert rules[0]["formulas"] == ["1", "5"]
+        assert capsys.readouterr().out.count("Warning: Skipped conditional format") == 3
+
+
+class TestWriteExcelConditionalFormats:
+    """WriteExcelTool 条件格式测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_rules_written(self, simple_data, engine):
+        """测试两种引擎写出相同的条件格式规则，且不产生逐单元格样式"""
+        highlight = {"font": {"color": "CC0000", "bold": True}, "background_color": "FFE6E6"}
+        payload = {"data": simple_data, "format": {"engine": engine, "conditional_formats": [
+            {"range": "B", "type": "cell", "operator": ">", "value": 28, "format": highlight},
+            {"range": "A2:C4", "type": "formula", "formula": "=$B2<26", "format": {"background_color": "DDEBF7"}},
+            {"range": "B", "type": "color_scale", "colors": ["FFFFFF", "63BE7B"]},
+            {"range": "B", "type": "data_bar"},
+        ]}}
+        excel_bytes, _ = self.tool.generate_excel_bytes(json.dumps(payload))
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        last = ws.max_row
+        rules = {str(cf.sqref): cf.rules for cf in ws.conditional_formatting}
+        assert [rule.type for rule in rules[f"B2:B{last}"]] == ["cellIs", "colorScale", "dataBar"]
+        cell_rule = rules[f"B2:B{last}"][0]
+        assert cell_rule.operator == "greaterThan"
+        assert cell_rule.formula == ["28"]
+        assert cell_rule.dxf.font.b
+        assert cell_rule.dxf.font.color.rgb.endswith("CC0000")
+        assert rules["A2:C4"][0].type == "expression"
+        assert rules["A2:C4"][0].formula == ["$B2<26"]
+        assert not ws["B2"].has_style
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+from io import BytesIO
+from openpyxl import Workbook, load_workbook
+
+from tools.guardrails import (DEFAULT_LIMITS, InputTooLargeError, Limits, check_payload, plan_read, plan_write,
+                              table_shape)
+from tools.readExcel import ReadExcelTool
+from tools.writeExcel import WriteExcelTool
+
+
+class TestGuardrails:
+    """规模检查与引擎选择测试"""
+
+    @pytest.mark.unit
+    def test_table_shape(self):
+        """测试按记录数和键的并集估算行列数"""
+        assert table_shape([{"a": 1}, {"b": 2, "c": 3}]) == (2, 3)
+        assert table_shape({"a": 1, "b": 2}) == (1, 2)
+        assert table_shape([[1, 2, 3], [4]]) == (2, 3)
+        assert table_shape("text") == (0, 0)
+
+    @pytest.mark.unit
+    def test_engine_selection(self):
+        """测试小输入使用 openpyxl，单元格数、样式条目数或输入长度超过阈值时使用 stream"""
+        limits = Limits(stream_cells=100, stream_styled_cells=10, stream_payload_bytes=1000)
+        assert plan_write(500, 10, 10, {}, limits=limits).engine == 'openpyxl'
+        assert plan_write(500, 10, 11, {}, limits=limits).reason == "cell count"
+        styled = {"cells": {f"A{i}": {} for i in range(11)}}
+        assert plan_write(500, 1, 1, styled, limits=limits).reason == "styled cell count"
+        assert plan_write(1001, 1, 1, {}, limits=limits).engine == 'stream'
+        assert plan_write(10, 1, 1, {}, workers=2, limits=limits).engine == 'stream'
+        # 显式指定的引擎优先
+        assert plan_write(10, 10, 11, {"engine": "openpyxl"}, limits=limits).engine == 'openpyxl'
+
+    @pytest.mark.unit
+    def test_row_limit_uses_stream(self, monkeypatch):
+        """测试行数超出单个工作表上限时总是使用 stream 引擎拆分工作表"""
+        monkeypatch.setattr("tools.guardrails.EXCEL_MAX_ROWS", 10)
+        assert plan_write(10, 9, 1, {"engine": "openpyxl"}).engine == 'openpyxl'
+        plan = plan_write(10, 10, 1, {"engine": "openpyxl"})
+        assert (plan.engine, plan.reason) == ('stream', "row limit")
+        assert plan_write(10, 9, 1, {"start_row": 2}).engine == 'stream'
+
+    @pytest.mark.unit
+    def test_limits(self):
+        """测试超出上限时的错误信息指明对应的配置项"""
+        limits = Limits(max_payload_bytes=100, max_cells=50, max_styled_cells=2, max_sheet_bytes=10,
+                        max_xls_bytes=10)
+        check_payload(100, limits)
+        check_payload(None, limits)
+        with pytest.raises(InputTooLargeError, match="EXCEL_TOOL_MAX_PAYLOAD_BYTES"):
+            check_payload(101, limits)
+        with pytest.raises(InputTooLargeError, match="cell count 51 exceeds the limit of 50"):
+            plan_write(10, 51, 1, {}, limits=limits)
+        with pytest.raises(InputTooLargeError, match="EXCEL_TOOL_MAX_STYLED_CELLS"):
+            plan_write(10, 1, 1, {"cells": {"A1": {}, "A2": {}, "A3": {}}}, limits=limits)
+        assert plan_read(True, file_size=1000, sheet_bytes=10, limits=limits) == "stream"
+        with pytest.raises(InputTooLargeError, match="EXCEL_TOOL_MAX_SHEET_BYTES"):
+            plan_read(True, sheet_bytes=11, limits=limits)
+        with pytest.raises(InputTooLargeError, match="EXCEL_TOOL_MAX_XLS_BYTES"):
+            plan_read(False, file_size=11, limits=limits)
+
+
+class TestToolGuardrails:
+    """工具的规模检查测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.writer = WriteExcelTool(mock_runtime, mock_session)
+        self.reader = ReadExcelTool(mock_runtime, mock_session)
+
+    @pytest.mark.integration
+    def test_auto_stream_engine(self, monkeypatch):
+        """测试超过阈值时自动切换到流式引擎，输出内容一致"""
+        payload = json.dumps([{"姓名": f"员工{i}", "年龄": 20 + i} for i in range(10)])
+        diagnostics = {}
+        small, _ = self.writer.generate_excel_bytes(payload, diagnostics=diagnostics)
+        assert diagnostics['engine'] == 'openpyxl'
+        monkeypatch.setattr(DEFAULT_LIMITS, 'stream_cells', 10)
+        large, _ = self.writer.generate_excel_bytes(payload, diagnostics=diagnostics)
+        assert diagnostics['engine'] == 'stream'
+        assert [list(r) for r in load_workbook(BytesIO(small)).active.iter_rows(values_only=True)] == \
+            [list(r) for r in load_workbook(BytesIO(large)).active.iter_rows(values_only=True)]
+
+    @pytest.mark.integration
+    def test_auto_engine_switch_keeps_formatting(self, monkeypatch, style_snapshot):
+        """测试同一请求按规模选择 openpyxl 或 stream 引擎时，写出的格式逐个单元格一致"""
+        payload = json.dumps({
+            "data": [{"姓名": f"员工{i}", "年龄": 20 + i, "入职日期": f"2024-01-{i + 1:02d}"} for i in range(10)],
+            "format": {
+                "start_row": 2,
+                "column_widths": {"A": 15},
+                "auto_width": True,
+                "row_heights": {"1": 30},
+                "merge_cells": ["A1:C1"],
+                "column_formats": {"年龄": {"type": "integer"}, "入职日期": {"type": "date"}},
+                "conditional_formats": [{"range": "B", "type": "cell", "operator": ">", "value": 25,
+                                         "format": {"font": {"bold": True}}}],
+                "table": {"name": "Staff"},
+                "cells": {
+                    "1,A": {"font": {"bold": True, "size": 16}, "alignment": {"horizontal": "center"}},
+                    "2,1": {"background_color": "DDEBF7", "border": {"bottom": "medium"}},
+                    "5,B": {"font": {"italic": True}},
+                    "20,5": {"background_color": "FFFF00"}
+                }
+            }
+        })
+
+        def written(excel_bytes):
+            ws = load_workbook(BytesIO(excel_bytes)).active
+            return (style_snapshot(ws), {str(r) for r in ws.merged_cells.ranges},
+                    {k: d.width for k, d in ws.column_dimensions.items() if d.customWidth},
+                    {k: d.height for k, d in ws.row_dimensions.items() if d.height},
+                    {str(cf.sqref): [rule.type for rule in cf.rules] for cf in ws.conditional_formatting},
+                    {table.displayName: table.ref for table in ws.tables.values()})
+
+        diagnostics = {}
+        small, _ = self.writer.generate_excel_bytes(payload, diagnostics=diagnostics)
+        assert diagnostics['engine'] == 'openpyxl'
+        monkeypatch.setattr(DEFAULT_LIMITS, 'stream_cells', 10)
+        large, _ = self.writer.generate_excel_bytes(payload, diagnostics=diagnostics)
+        assert diagnostics['engine'] == 'stream'
+        assert written(large) == written(small)
+
+    @pytest.mark.unit
+    def test_write_rejected(self, monkeypatch):
+        """测试超出上限的输入在解析之前被拒绝"""
+        monkeypatch.setattr(DEFAULT_LIMITS, 'max_payload_bytes', 10)
+        with pytest.raises(Exception, match="Error creating Excel file: Input too large"):
+            list(self.writer._invoke({'json_str': json.dumps([{"a": 1}, {"a": 2}])}))
+        # 上限按 UTF-8 字节数计算，而不是字符数
+        payload = json.dumps([{"姓名": "张三"}], ensure_ascii=False)
+        monkeypatch.setattr(DEFAULT_LIMITS, 'max_payload_bytes', len(payload))
+        with pytest.raises(Exception, match=f"payload size {len(payload.encode('utf-8'))}"):
+            list(self.writer._invoke({'json_str': payload}))
+        monkeypatch.setattr(DEFAULT_LIMITS, 'max_payload_bytes', 1000)
+        monkeypatch.setattr(DEFAULT_LIMITS, 'max_cells', 1)
+        with pytest.raises(Exception, match="Error creating Excel file: Input too large: cell count 2"):
+            self.writer.generate_excel_bytes(json.dumps([{"a": 1}, {"a": 2}]))
+
+    @pytest.mark.integration
+    def test_read_rejected(self, monkeypatch, file_server):
+        """测试超出上限的文件在下载之前被拒绝"""
+        wb = Workbook()
+        wb.active.append(["a"])
+        buffer = BytesIO()
+        wb.save(buffer)
+        file_meta = file_server("big.xlsx", buffer.getvalue())
+        monkeypatch.setattr(DEFAULT_LIMITS, 'max_read_bytes', file_meta.size - 1)
+        with pytest.raises(Exception, match="Error reading Excel file: Input too large: file size"):
+            list(self.reader._invoke({'file': file_meta}))
+        assert file_server.bytes_served == 0
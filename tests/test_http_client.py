@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import io
+import os
+import zipfile
+
+from tools import http_client
+from tools.http_client import RemoteFile, fetch_bytes, open_remote
+
+
+def _zip_with_padding():
+    """构造一个包含小成员和大块不可压缩成员的压缩包"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("xl/worksheets/sheet1.xml", "<sheetData/>" * 10)
+        zf.writestr("xl/media/image1.bin", os.urandom(2 * 1024 * 1024))
+        zf.writestr("xl/workbook.xml", "<workbook/>")
+    return buffer.getvalue()
+
+
+class TestHttpClient:
+    """共享 HTTP 客户端测试"""
+
+    @pytest.mark.unit
+    def test_fetch_bytes(self, file_server):
+        """测试整体下载"""
+        file_meta = file_server("data.bin", b"hello world")
+        assert fetch_bytes(file_meta.url) == b"hello world"
+
+    @pytest.mark.unit
+    def test_connections_are_reused(self, file_server):
+        """测试多次请求复用 keep-alive 连接"""
+        file_meta = file_server("data.bin", b"x" * 1000)
+        before = file_server.connections
+        for _ in range(5):
+            fetch_bytes(file_meta.url)
+        assert file_server.connections - before <= 1
+
+    @pytest.mark.unit
+    def test_remote_file_seek_and_read(self, file_server):
+        """测试 Range 文件对象的随机读取与本地内容一致"""
+        content = bytes(range(256)) * 100
+        file_meta = file_server("data.bin", content)
+        remote = RemoteFile(file_meta.url, len(content), block_size=1000)
+
+        assert remote.read(10) == content[:10]
+        remote.seek(-20, io.SEEK_END)
+        assert remote.read() == content[-20:]
+        remote.seek(5000)
+        assert remote.read(3000) == content[5000:8000]
+        assert remote.read(0) == b""
+        assert remote.requests == 3
+
+    @pytest.mark.integration
+    def test_zip_member_read_downloads_only_needed_parts(self, file_server, monkeypatch):
+        """测试通过 Range 读取压缩包时只下载中央目录和目标成员"""
+        monkeypatch.setattr(http_client, "RANGE_THRESHOLD", 1024)
+        content = _zip_with_padding()
+        file_meta = file_server("book.xlsx", content)
+
+        source = open_remote(file_meta.url)
+        assert isinstance(source, RemoteFile)
+        with zipfile.ZipFile(source) as zf:
+            assert zf.read("xl/worksheets/sheet1.xml") == b"<sheetData/>" * 10
+        assert source.bytes_fetched < len(content) // 4
+
+    @pytest.mark.unit
+    def test_small_files_are_downloaded_whole(self, file_server):
+        """测试小文件直接整体下载"""
+        file_meta = file_server("small.bin", b"abc")
+        source = open_remote(file_meta.url, file_meta.size)
+        assert isinstance(source, io.BytesIO)
+        assert source.read() == b"abc"
+
+    @pytest.mark.unit
+    def test_fallback_without_range_support(self, file_server, monkeypatch):
+        """测试服务端不支持 Range 时退回整体下载，且不重复请求"""
+        monkeypatch.setattr(http_client, "RANGE_THRESHOLD", 1024)
+        file_server.supports_ranges = False
+        content = _zip_with_padding()
+        file_meta = file_server("book.xlsx", content)
+
+        source = open_remote(file_meta.url)
+        assert isinstance(source, io.BytesIO)
+        assert source.getvalue() == content
+        assert len(file_server.requests) == 1
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import random
+from io import BytesIO
+from unittest.mock import patch
+from openpyxl import load_workbook
+
+from tools.merge_planner import parse_merge_range, plan_merges
+from tools.writeExcel import WriteExcelTool
+
+
+def _overlaps(a, b):
+    return not (a.max_row < b.min_row or b.max_row < a.min_row or a.max_col < b.min_col or b.max_col < a.min_col)
+
+
+class TestMergePlanner:
+    """合并单元格规划测试"""
+
+    @pytest.mark.unit
+    def test_parse_formats(self):
+        """测试三种配置格式以及起止颠倒的范围"""
+        assert parse_merge_range("A1:C2").ref == "A1:C2"
+        assert parse_merge_range({"start": "B2", "end": "$D$4"}).ref == "B2:D4"
+        assert parse_merge_range(["c3", "a1"]).ref == "A1:C3"
+        assert parse_merge_range("A1") is None
+        assert parse_merge_range({"start": "A1"}) is None
+
+    @pytest.mark.unit
+    def test_conflicts_are_reported(self):
+        """测试部分重叠、完全包含、重复和无效范围都被报告"""
+        plan = plan_merges(["A1:C1", "B1:D2", "A3:D6", "B4:C5", "A3:D6", "E1:E1", "bad", "D1:E2"])
+        # 同一行起始的重叠范围保留起始列更靠左的 D1:E2
+        assert plan.refs == ["A1:C1", "A3:D6", "D1:E2"]
+        assert {"range": "bad", "reason": "invalid range"} in plan.conflicts
+        by_range = {json.dumps(c["range"]): c for c in plan.conflicts if "conflicts_with" in c}
+        assert by_range['"B1:D2"']["conflicts_with"] == "A1:C1"
+        assert by_range['"B4:C5"']["conflicts_with"] == "A3:D6"
+        assert by_range['"E1:E1"']["conflicts_with"] == "D1:E2"
+        assert len(plan.conflicts) == 5
+
+    @pytest.mark.unit
+    def test_adjacent_ranges_do_not_conflict(self):
+        """测试相邻但不重叠的范围"""
+        plan = plan_merges(["A1:B2", "C1:D2", "A3:B4", "C3:D3"])
+        assert plan.conflicts == []
+        assert len(plan.ranges) == 4
+
+    @pytest.mark.unit
+    def test_matches_brute_force(self):
+        """测试随机范围下的结果：保留的范围两两不重叠，被跳过的范围都与某个保留的范围重叠"""
+        rng = random.Random(7)
+        merges = []
+        for _ in range(400):
+            row, col = rng.randint(1, 60), rng.randint(1, 20)
+            merges.append([f"{chr(64 + col)}{row}",
+                           f"{chr(64 + min(26, col + rng.randint(0, 3)))}{row + rng.randint(0, 3)}"])
+        plan = plan_merges(merges)
+        assert len(plan.ranges) + len(plan.conflicts) == len(merges)
+        for i, a in enumerate(plan.ranges):
+            assert not any(_overlaps(a, b) for b in plan.ranges[i + 1:])
+        for conflict in plan.conflicts:
+            skipped = parse_merge_range(conflict["range"])
+            assert any(_overlaps(skipped, kept) for kept in plan.ranges)
+
+    @pytest.mark.slow
+    def test_many_ranges(self):
+        """测试大量范围的规划"""
+        merges = [f"A{2 * i + 1}:B{2 * i + 2}" for i in range(50000)] + ["A1:A1"]
+        plan = plan_merges(merges)
+        assert len(plan.ranges) == 50000
+        assert plan.conflicts[0]["conflicts_with"] == "A1:B2"
+
+
+class TestWriteExcelMerges:
+    """WriteExcelTool 合并单元格测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_overlapping_ranges_are_skipped(self, simple_data, engine):
+        """测试重叠范围不写入文件，并以结构化消息返回"""
+        payload = {"data": simple_data, "format": {"engine": engine, "merge_cells": ["A1:B1", "B1:C2", "A3:C3"]}}
+        with patch.object(WriteExcelTool, 'create_text_message', side_effect=lambda text: text), \
+                patch.object(WriteExcelTool, 'create_blob_message', side_effect=lambda blob, meta: blob):
+            messages = list(self.tool._invoke({'json_str': json.dumps(payload)}))
+        assert len(messages) == 3
+        ws = load_workbook(BytesIO(messages[1])).active
+        assert {str(r) for r in ws.merged_cells.ranges} == {"A1:B1", "A3:C3"}
+        assert json.loads(messages[2]) == {"merge_conflicts": [
+            {"range": "B1:C2", "reason": "overlaps", "conflicts_with": "A1:B1"}]}
+
+    @pytest.mark.unit
+    def test_bulk_registration_formats_merged_cells(self, simple_data):
+        """测试批量登记后被合并的单元格与 ws.merge_cells 的结果一致"""
+        payload = {"data": simple_data, "format": {
+            "merge_cells": ["A1:C1"], "cells": {"1,1": {"border": {"top": "thick"}}}}}
+        excel_bytes, _ = self.tool.generate_excel_bytes(json.dumps(payload))
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        assert ws["B1"].value is None
+        assert ws["C1"].border.top.style == "thick"
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import os
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+from openpyxl import load_workbook
+
+from tools.output_cache import OutputCache, canonical_json, output_cache, request_key
+from tools.writeExcel import WriteExcelTool
+from tools.xlsx_stream import FIXED_DATE_TIME
+
+
+class TestOutputCache:
+    """输出缓存测试"""
+
+    @pytest.mark.unit
+    def test_request_key(self):
+        """测试缓存键由各部分的内容和边界决定"""
+        assert request_key("ab", "c", {"x": 1, "y": 2}) == request_key("ab", "c", {"y": 2, "x": 1})
+        assert request_key("ab", "c") != request_key("a", "bc")
+        assert request_key("[1]", "名称") != request_key("[1] ", "名称")
+
+    @pytest.mark.unit
+    def test_canonical_json(self):
+        """测试 JSON 的规范形式忽略空白和转义写法，保留键的顺序，无法解析时返回原文"""
+        assert canonical_json('[ {"a": 1,\n "b": "\\u540d"} ]') == canonical_json('[{"a":1,"b":"名"}]')
+        assert canonical_json('{"a": 1, "b": 2}') != canonical_json('{"b": 2, "a": 1}')
+        assert canonical_json('[1.0]') != canonical_json('[1]')
+        assert canonical_json("a,b\n1,2") == "a,b\n1,2"
+
+    @pytest.mark.unit
+    def test_memory_lru(self):
+        """测试按总字节数淘汰最久未使用的条目，过大的条目不进入内存"""
+        cache = OutputCache(max_bytes=10, directory=None)
+        cache.put("a", b"1234", {"n": 1})
+        cache.put("b", b"1234", {"n": 2})
+        assert cache.get("a") == (b"1234", {"n": 1})
+        cache.put("c", b"1234", {"n": 3})
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        cache.put("d", b"x" * 11, {})
+        assert cache.get("d") is None
+        assert not OutputCache(max_bytes=0, directory=None).enabled
+
+    @pytest.mark.unit
+    def test_ttl(self, monkeypatch):
+        """测试超过有效期的条目视为未命中"""
+        now = [1000.0]
+        monkeypatch.setattr("tools.output_cache.time.time", lambda: now[0])
+        cache = OutputCache(max_bytes=100, directory=None, ttl=60)
+        cache.put("a", b"data", {})
+        now[0] += 59
+        assert cache.get("a") is not None
+        now[0] += 2
+        assert cache.get("a") is None
+
+    @pytest.mark.unit
+    def test_disk_cache(self, tmp_path):
+        """测试磁盘缓存跨实例命中，超过总大小时删除最久未使用的文件，损坏的文件视为未命中"""
+        cache = OutputCache(max_bytes=0, directory=str(tmp_path), max_disk_bytes=300)
+        cache.put("a", b"x" * 100, {"filename": "a.xlsx"})
+        assert OutputCache(max_bytes=100, directory=str(tmp_path)).get("a") == (b"x" * 100, {"filename": "a.xlsx"})
+        os.utime(tmp_path / "a.xlsx.cache", (1, 1))
+        cache.put("b", b"y" * 100, {})
+        cache.put("c", b"z" * 100, {})
+        assert cache.get("a") is None and cache.get("c") is not None
+        (tmp_path / "c.xlsx.cache").write_bytes(b"{broken\n")
+        assert cache.get("c") is None
+
+
+class TestWriteExcelCache:
+    """WriteExcelTool 输出缓存与确定性生成测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    def _invoke(self, params):
+        with patch.object(WriteExcelTool, 'create_text_message', side_effect=lambda text: text), \
+                patch.object(WriteExcelTool, 'create_blob_message', side_effect=lambda blob, meta: (blob, meta)):
+            return list(self.tool._invoke(params))
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_deterministic_output(self, enhanced_data, engine):
+        """测试相同的输入生成逐字节相同的文件，docProps 和 zip 成员使用固定的时间戳"""
+        enhanced_data["format"]["engine"] = engine
+        payload = json.dumps(enhanced_data)
+        first, _ = self.tool.generate_excel_bytes(payload)
+        second, _ = self.tool.generate_excel_bytes(payload)
+        assert first == second
+        with zipfile.ZipFile(BytesIO(first)) as zf:
+            assert {info.date_time for info in zf.infolist()} == {FIXED_DATE_TIME}
+            assert b"1980-01-01T00:00:00Z" in zf.read("docProps/core.xml")
+        # 两个引擎的创建者都是插件自己的名称
+        assert load_workbook(BytesIO(first)).properties.creator == "excel-tool"
+
+    @pytest.mark.integration
+    def test_repeated_request_hits_cache(self, simple_data):
+        """测试重复的请求直接返回缓存的内容和合并冲突信息，参数不同时不命中"""
+        payload = {"data": simple_data, "format": {"merge_cells": ["A1:B1", "B1:C2"]}}
+        params = {'json_str': json.dumps(payload), 'filename': "报表"}
+        first = self._invoke(params)
+        with patch.object(WriteExcelTool, 'generate_excel_bytes', side_effect=AssertionError("regenerated")):
+            second = self._invoke(params)
+        assert second == first
+        assert second[1][1]["filename"] == "报表.xlsx"
+        assert json.loads(second[2])["merge_conflicts"][0]["range"] == "B1:C2"
+        renamed = self._invoke(dict(params, filename="其他"))
+        assert renamed[1][1]["filename"] == "其他.xlsx"
+
+    @pytest.mark.integration
+    def test_json_whitespace_hits_cache(self, simple_data):
+        """测试只有空白不同的 JSON 请求命中缓存，键的顺序不同或 CSV 文本不同时不命中"""
+        self._invoke({'json_str': json.dumps(simple_data)})
+        with patch.object(WriteExcelTool, 'generate_excel_bytes', side_effect=AssertionError("regenerated")):
+            self._invoke({'json_str': json.dumps(simple_data, indent=2, ensure_ascii=False)})
+        reordered = [{key: record[key] for key in reversed(list(record))} for record in simple_data]
+        blob, _ = self._invoke({'json_str': json.dumps(reordered)})[1]
+        assert load_workbook(BytesIO(blob)).active["A1"].value == "部门"
+        self._invoke({'json_str': "a,b\n1,2", 'input_format': 'csv'})
+        with pytest.raises(Exception, match="regenerated"):
+            with patch.object(WriteExcelTool, 'generate_excel_bytes', side_effect=Exception("regenerated")):
+                self._invoke({'json_str': "a,b\n1, 2", 'input_format': 'csv'})
+
+    @pytest.mark.integration
+    def test_cache_disabled(self, simple_data, monkeypatch):
+        """测试关闭缓存时每次都重新生成"""
+        monkeypatch.setattr(output_cache, "max_bytes", 0)
+        params = {'json_str': json.dumps(simple_data)}
+        self._invoke(params)
+        with patch.object(WriteExcelTool, 'generate_excel_bytes', side_effect=Exception("regenerated")):
+            with pytest.raises(Exception, match="regenerated"):
+                self._invoke(params)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import threading
+import time
+
+from tools.pipeline import AdmissionController, WorkerPool, estimate_read_cost, estimate_write_cost
+
+
+class TestAdmissionController:
+    """准入控制测试"""
+
+    @pytest.mark.unit
+    def test_requests_queue_when_budget_exhausted(self):
+        """测试预算不足时后续请求排队，释放后再执行"""
+        controller = AdmissionController(budget=100, timeout=5)
+        order = []
+        controller.acquire(80)
+
+        def second():
+            with controller.admit(50):
+                order.append("second")
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        time.sleep(0.05)
+        order.append("first-done")
+        controller.release(80)
+        thread.join(timeout=5)
+
+        assert order == ["first-done", "second"]
+        assert controller.in_use == 0
+
+    @pytest.mark.unit
+    def test_oversized_request_runs_alone(self):
+        """测试超过总预算的请求被限制为独占整个预算"""
+        controller = AdmissionController(budget=100, timeout=5)
+        held = controller.acquire(10 ** 9)
+        assert held == 100
+        controller.release(held)
+        assert controller.in_use == 0
+
+    @pytest.mark.unit
+    def test_admission_timeout(self):
+        """测试排队超时抛出明确的错误"""
+        controller = AdmissionController(budget=100, timeout=0.05)
+        controller.acquire(80)
+        with pytest.raises(Exception) as excinfo:
+            controller.acquire(50)
+        assert "busy" in str(excinfo.value)
+
+    @pytest.mark.unit
+    def test_budget_released_on_error(self):
+        """测试执行出错时预算仍被释放"""
+        controller = AdmissionController(budget=100, timeout=1)
+        with pytest.raises(ValueError):
+            with controller.admit(60):
+                raise ValueError("boom")
+        assert controller.in_use == 0
+
+    @pytest.mark.unit
+    def test_cost_estimates(self):
+        """测试内存开销估算随输入规模增长"""
+        assert estimate_write_cost("x" * 1000) > estimate_write_cost("x" * 10)
+        assert estimate_read_cost(None) > 0
+        assert estimate_read_cost(10 ** 6) > estimate_read_cost(10 ** 3)
+
+
+class TestWorkerPool:
+    """工作池测试"""
+
+    @pytest.mark.unit
+    def test_run_returns_result_and_propagates_errors(self):
+        """测试工作池返回结果并原样抛出异常"""
+        pool = WorkerPool(size=2)
+        assert pool.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(ZeroDivisionError):
+            pool.run(lambda: 1 / 0)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import pstats
+import threading
+import tracemalloc
+from io import BytesIO
+from unittest.mock import patch
+from openpyxl import load_workbook
+
+from tools.profiling import PhaseProfiler, debug_mode, run_profiled
+from tools.readExcel import ReadExcelTool
+from tools.writeExcel import WriteExcelTool
+
+WRITE_PHASES = ["cache", "parse", "frame_build", "cell_write", "styling", "dimensions", "merges", "serialize", "emit"]
+
+
+class TestPhaseProfiler:
+    """分阶段统计测试"""
+
+    @pytest.mark.unit
+    def test_records_duration_and_memory(self):
+        """测试记录耗时和内存分配，同名阶段累加"""
+        profiler = PhaseProfiler(enabled=True)
+        with profiler.phase("alloc"):
+            data = [bytearray(1024) for _ in range(1000)]
+        with profiler.phase("alloc"):
+            pass
+        report = json.loads(profiler.finish(tool="test"))
+        assert report["tool"] == "test"
+        assert [p["phase"] for p in report["phases"]] == ["alloc"]
+        assert report["phases"][0]["allocated_bytes"] >= 1000 * 1024
+        assert report["phases"][0]["peak_bytes"] >= report["phases"][0]["allocated_bytes"]
+        assert not tracemalloc.is_tracing()
+        del data
+
+    @pytest.mark.unit
+    def test_concurrent_profilers_share_tracing(self):
+        """测试并发的统计共用一次内存追踪：最后一个结束时才停止，重叠的阶段不重置也不记录峰值"""
+        entered, first_closed = threading.Barrier(2), threading.Event()
+        reports = {}
+
+        def run(name):
+            profiler = PhaseProfiler(enabled=True)
+            with profiler.phase("work"):
+                entered.wait()
+                data = [bytearray(1024) for _ in range(100)]
+            if name == "second":
+                first_closed.wait()
+                # 另一个实例已经结束，追踪仍在进行
+                assert tracemalloc.is_tracing()
+            reports[name] = json.loads(profiler.finish(tool=name))
+            if name == "first":
+                first_closed.set()
+            del data
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in ("first", "second")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert set(reports) == {"first", "second"}
+        assert all(report["phases"][0]["peak_bytes"] is None for report in reports.values())
+        assert not tracemalloc.is_tracing()
+
+    @pytest.mark.unit
+    def test_external_tracing_untouched(self):
+        """测试调用方自行开启的追踪不会被重置峰值或停止"""
+        tracemalloc.start()
+        try:
+            data = bytearray(1024 * 1024)
+            del data
+            profiler = PhaseProfiler(enabled=True)
+            with profiler.phase("work"):
+                pass
+            report = json.loads(profiler.finish())
+            assert report["phases"][0]["peak_bytes"] is None
+            assert tracemalloc.is_tracing()
+            assert tracemalloc.get_traced_memory()[1] >= 1024 * 1024
+        finally:
+            tracemalloc.stop()
+
+    @pytest.mark.unit
+    def test_disabled_profiler_records_nothing(self):
+        """测试未开启时不记录任何阶段"""
+        profiler = PhaseProfiler(enabled=False)
+        with profiler.phase("parse"):
+            pass
+        assert profiler.phases == {}
+        assert not tracemalloc.is_tracing()
+
+
+class TestToolProfiling:
+    """工具 profile 参数测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.writer = WriteExcelTool(mock_runtime, mock_session)
+        self.reader = ReadExcelTool(mock_runtime, mock_session)
+
+    def _invoke_write(self, payload, profile=True):
+        with patch.object(WriteExcelTool, 'create_text_message', side_effect=lambda text: text), \
+                patch.object(WriteExcelTool, 'create_blob_message', side_effect=lambda blob, meta: blob):
+            return list(self.writer._invoke({'json_str': json.dumps(payload), 'profile': profile}))
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_write_profile_message(self, enhanced_data, engine):
+        """测试 profile 开启时额外返回各阶段统计"""
+        enhanced_data["format"]["engine"] = engine
+        messages = self._invoke_write(enhanced_data)
+        assert len(messages) == 3
+        report = json.loads(messages[2])
+        assert report["tool"] == "writeExcel"
+        assert report["output_bytes"] == len(messages[1])
+        assert sorted(p["phase"] for p in report["phases"]) == sorted(WRITE_PHASES)
+        assert all(p["duration_ms"] >= 0 for p in report["phases"])
+
+    @pytest.mark.integration
+    def test_write_without_profile(self, simple_data):
+        """测试默认不返回统计消息"""
+        assert len(self._invoke_write(simple_data, profile=False)) == 2
+
+    @pytest.mark.integration
+    def test_read_profile_message(self, file_server, simple_data):
+        """测试读取工具的 profile 统计"""
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(simple_data))
+        file_meta = file_server("profile.xlsx", excel_bytes)
+        with patch.object(ReadExcelTool, 'create_text_message', side_effect=lambda text: text):
+            messages = list(self.reader._invoke({'file': file_meta, 'profile': True}))
+        assert len(messages) == 2
+        report = json.loads(messages[1])
+        assert [p["phase"] for p in report["phases"]] == ["download", "parse", "serialize", "emit"]
+
+    @pytest.mark.unit
+    def test_styling_pass_only_touches_configured_cells(self):
+        """测试样式阶段只处理 format.cells 中的单元格，写法不同的键指向同一单元格时以后出现的为准"""
+        payload = {
+            "data": [{"a": 1, "b": 2}],
+            "format": {"cells": {
+                "2,2": {"font": {"bold": True}},
+                "2,B": {"font": {"italic": True}},
+                "02,1": {"font": {"italic": True}},
+                "5,1": {"font": {"bold": True}},
+            }}
+        }
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(payload))
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        assert ws["B2"].font.italic is True
+        assert not ws["B2"].font.bold
+        assert ws["A2"].font.italic is True
+        assert ws["A5"].font.bold is True
+        assert ws.max_row == 5
+        assert not ws["A3"].has_style and not ws["B4"].has_style
+
+
+class TestCProfileDebug:
+    """debug=cprofile 测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.writer = WriteExcelTool(mock_runtime, mock_session)
+        self.reader = ReadExcelTool(mock_runtime, mock_session)
+
+    @staticmethod
+    def _load_stats(tmp_path, blob):
+        path = tmp_path / "stats.pstats"
+        path.write_bytes(blob)
+        return pstats.Stats(str(path))
+
+    @pytest.mark.unit
+    def test_debug_mode(self):
+        """测试 debug 参数解析，保持原有布尔值的含义"""
+        assert debug_mode(True) == "save"
+        assert debug_mode("true") == "save"
+        assert debug_mode("cprofile") == "cprofile"
+        assert debug_mode(" CProfile ") == "cprofile"
+        assert debug_mode(False) is None
+        assert debug_mode("off") is None
+        assert debug_mode(None) is None
+
+    @pytest.mark.unit
+    def test_run_profiled(self, tmp_path):
+        """测试 run_profiled 返回结果和可被 pstats 读取的统计"""
+        result, blob = run_profiled(sorted, [3, 1, 2])
+        assert result == [1, 2, 3]
+        stats = self._load_stats(tmp_path, blob)
+        assert stats.total_calls > 0
+
+    @pytest.mark.integration
+    def test_write_cprofile_blob(self, tmp_path, simple_data):
+        """测试写入工具以 blob 返回 pstats 统计"""
+        with patch.object(WriteExcelTool, 'create_text_message', side_effect=lambda text: text), \
+                patch.object(WriteExcelTool, 'create_blob_message', side_effect=lambda blob, meta: (blob, meta)):
+            messages = list(self.writer._invoke({
+                'json_str': json.dumps(simple_data), 'filename': 'report', 'debug': 'cprofile'}))
+        assert len(messages) == 4
+        blob, meta = messages[1]
+        assert meta["filename"] == "report.pstats"
+        stats = self._load_stats(tmp_path, blob)
+        assert any(func[2] == "generate_excel_bytes" for func in stats.stats)
+        assert messages[3][1]["filename"] == "report.xlsx"
+
+    @pytest.mark.integration
+    def test_read_cprofile_blob(self, tmp_path, file_server, simple_data):
+        """测试读取工具以 blob 返回 pstats 统计"""
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(simple_data))
+        file_meta = file_server("cprofile.xlsx", excel_bytes)
+        with patch.object(ReadExcelTool, 'create_text_message', side_effect=lambda text: text), \
+                patch.object(ReadExcelTool, 'create_blob_message', side_effect=lambda blob, meta: (blob, meta)):
+            messages = list(self.reader._invoke({'file': file_meta, 'debug': 'cprofile'}))
+        assert len(messages) == 3
+        stats = self._load_stats(tmp_path, messages[1][0])
+        assert any(func[2] == "_read_records" for func in stats.stats)
+        assert len(json.loads(messages[2])) == 2
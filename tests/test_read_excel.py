@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+from unittest.mock import Mock, patch
+
+from tools.readExcel import ReadExcelTool
+from tools.writeExcel import WriteExcelTool
+
+
+class TestReadExcelTool:
+    """ReadExcelTool 测试类"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = ReadExcelTool(mock_runtime, mock_session)
+        self.writer = WriteExcelTool(mock_runtime, mock_session)
+
+    def _read(self, file_meta, **params):
+        with patch.object(ReadExcelTool, 'create_text_message', side_effect=lambda text: text):
+            return list(self.tool._invoke({'file': file_meta, **params}))
+
+    @pytest.mark.integration
+    def test_read_records(self, file_server, simple_data):
+        """测试读取 Excel 并返回 records 格式的 JSON"""
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(simple_data))
+        messages = self._read(file_server("simple.xlsx", excel_bytes))
+
+        assert len(messages) == 1
+        assert json.loads(messages[0]) == [
+            {"姓名": "张三", "年龄": "25", "部门": "技术部"},
+            {"姓名": "李四", "年龄": "30", "部门": "市场部"}
+        ]
+
+    @pytest.mark.integration
+    def test_output_formats(self, file_server, simple_data):
+        """测试 output_format 参数选择紧凑的输出编码"""
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(simple_data))
+        file_meta = file_server("simple.xlsx", excel_bytes)
+        records = self._read(file_meta)[0]
+        split = self._read(file_meta, output_format="split")[0]
+        assert json.loads(split) == {"columns": ["姓名", "年龄", "部门"],
+                                     "rows": [["张三", "25", "技术部"], ["李四", "30", "市场部"]]}
+        assert self._read(file_meta, output_format="csv")[0] == "姓名,年龄,部门\n张三,25,技术部\n李四,30,市场部\n"
+        assert self._read(file_meta, output_format="markdown")[0].startswith("| 姓名 | 年龄 | 部门 |\n| --- |")
+        assert len(split.encode()) < len(records.encode())
+        with pytest.raises(Exception, match="Error reading Excel file: Unsupported output format"):
+            self._read(file_meta, output_format="xml")
+
+    @pytest.mark.integration
+    def test_row_range(self, file_server):
+        """测试 row_range 参数只返回指定的行（行号与 Excel 一致）"""
+        data = [{"编号": i, "名称": f"名称{i}"} for i in range(20)]
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(data))
+        file_meta = file_server("rows.xlsx", excel_bytes)
+        assert json.loads(self._read(file_meta, row_range="5..6")[0]) == [{"编号": "3", "名称": "名称3"},
+                                                                        {"编号": "4", "名称": "名称4"}]
+        assert len(json.loads(self._read(file_meta, row_range="19..")[0])) == 3
+        with pytest.raises(Exception, match="Error reading Excel file: Invalid row range"):
+            self._read(file_meta, row_range="6..5")
+
+    @pytest.mark.integration
+    def test_summary(self, file_server, simple_data):
+        """测试 summary 模式返回每个工作表的概要而不是数据"""
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(simple_data))
+        summary = json.loads(self._read(file_server("simple.xlsx", excel_bytes), output_format="summary")[0])
+        sheet = summary["sheets"][0]
+        assert (sheet["rows"], sheet["columns"]) == (2, 3)
+        assert [(f["name"], f["type"]) for f in sheet["fields"]] == [("姓名", "string"), ("年龄", "integer"),
+                                                                      ("部门", "string")]
+        assert sheet["sample"][0] == {"姓名": "张三", "年龄": "25", "部门": "技术部"}
+
+    @pytest.mark.unit
+    def test_read_error(self, file_server):
+        """测试下载或解析失败时的错误信息"""
+        file_meta = file_server("broken.xlsx", b"not an excel file")
+        with pytest.raises(Exception) as excinfo:
+            self._read(file_meta)
+        assert "Error reading Excel file" in str(excinfo.value)
+
+    @pytest.mark.integration
+    def test_read_large_file_with_range_requests(self, file_server, monkeypatch):
+        """测试大文件通过 Range 请求读取，结果与整体下载一致"""
+        from tools import http_client
+        monkeypatch.setattr(http_client, "RANGE_THRESHOLD", 1024)
+        data = [{"编号": i, "名称": f"名称{i}"} for i in range(2000)]
+        excel_bytes, _ = self.writer.generate_excel_bytes(json.dumps(data))
+        file_meta = file_server("large.xlsx", excel_bytes)
+        file_meta.size = None
+
+        messages = self._read(file_meta)
+        records = json.loads(messages[0])
+        assert len(records) == 2000
+        assert records[-1] == {"编号": "1999", "名称": "名称1999"}
+        assert any(end - start + 1 < len(excel_bytes) for start, end in file_server.requests)
+
+    @pytest.mark.integration
+    def test_read_named_sheet(self, file_server):
+        """测试通过 sheet 参数读取指定工作表"""
+        from io import BytesIO
+        from openpyxl import Workbook
+        wb = Workbook()
+        wb.active.append(["a"])
+        wb.create_sheet("明细").append(["部门"])
+        wb["明细"].append(["技术部"])
+        buffer = BytesIO()
+        wb.save(buffer)
+        file_meta = file_server("sheets.xlsx", buffer.getvalue())
+
+        with patch.object(ReadExcelTool, 'create_text_message', side_effect=lambda text: text):
+            messages = list(self.tool._invoke({'file': file_meta, 'sheet': '明细'}))
+        assert json.loads(messages[0]) == [{"部门": "技术部"}]
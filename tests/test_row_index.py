@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import os
+import re
+import zipfile
+from io import BytesIO
+
+from openpyxl import Workbook
+
+from tools.row_index import RowIndex
+from tools.xlsx_reader import XlsxReader, parse_row_range, read_sheet_records
+
+
+def _workbook(rows=3000):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["编号", "名称", "金额"])
+    for i in range(rows):
+        ws.append([i, f"名称{i % 50}", i * 1.5])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _rewrite_sheet(excel_bytes, rewrite):
+    source = zipfile.ZipFile(BytesIO(excel_bytes))
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            content = source.read(info)
+            if info.filename.startswith("xl/worksheets/"):
+                content = rewrite(content)
+            target.writestr(info.filename, content)
+    return buffer.getvalue()
+
+
+class TestRowIndex:
+    """行偏移量索引测试"""
+
+    @pytest.fixture(autouse=True)
+    def index_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("tools.row_index.ROW_INDEX_DIR", str(tmp_path))
+        monkeypatch.setattr("tools.row_index.ROW_INDEX_MIN_BYTES", 0)
+        monkeypatch.setattr("tools.row_index.CHECKPOINT_BYTES", 1024)
+        self.tmp_path = tmp_path
+
+    def _read(self, excel_bytes, row_range=None):
+        with XlsxReader(BytesIO(excel_bytes)) as reader:
+            return read_sheet_records(reader, row_range=row_range)
+
+    def _index_files(self):
+        return [name for name in os.listdir(self.tmp_path) if name.endswith(".json")]
+
+    @pytest.mark.unit
+    def test_parse_row_range(self):
+        """测试行范围的解析"""
+        assert parse_row_range(None) is None and parse_row_range(" ") is None
+        assert parse_row_range("101..200") == (101, 200)
+        assert parse_row_range("101..") == (101, None)
+        assert parse_row_range("..200") == (2, 200)
+        assert parse_row_range("1..3") == (2, 3)
+        assert parse_row_range("7") == (7, 7)
+        with pytest.raises(ValueError, match="Invalid row range"):
+            parse_row_range("20..10")
+        with pytest.raises(ValueError, match="Invalid row range"):
+            parse_row_range("a..b")
+
+    @pytest.mark.unit
+    def test_range_read_uses_index(self):
+        """测试首次读取时建立索引，之后按行范围读取时跳过前面的行，结果与完整读取一致"""
+        excel_bytes = _workbook()
+        columns, rows = self._read(excel_bytes)
+        assert len(self._index_files()) == 1
+        expected = (columns, rows[2498:2509])
+        assert self._read(excel_bytes, (2500, 2510)) == expected
+        with XlsxReader(BytesIO(excel_bytes)) as reader:
+            parsed = [row_idx for row_idx, _ in reader.iter_rows(start_row=2500)]
+        assert parsed[0] == 1 and 2 < parsed[1] <= 2500 and parsed[-1] == 3001
+        # 超出数据范围的行范围返回空
+        assert self._read(excel_bytes, (5000, None)) == (columns, [])
+
+    @pytest.mark.unit
+    def test_partial_index_is_extended(self):
+        """测试读到结束行后停止时保存已记录的检查点，之后的读取继续补全"""
+        excel_bytes = _workbook()
+        assert self._read(excel_bytes, (100, 200))[1][0][0] == "98"
+        path = os.path.join(self.tmp_path, self._index_files()[0])
+        with open(path) as f:
+            partial = json.load(f)["checkpoints"]
+        assert partial[-1][0] <= 300
+        assert self._read(excel_bytes, (2900, 2900))[1] == [["2898", "名称48", "4347"]]
+        with open(path) as f:
+            assert json.load(f)["checkpoints"][-1][0] > 2000
+
+    @pytest.mark.unit
+    def test_stale_index_is_discarded(self):
+        """测试检查点与文件内容不符时删除索引并从头解析"""
+        excel_bytes = _workbook()
+        expected = self._read(excel_bytes, (2500, 2510))
+        path = os.path.join(self.tmp_path, self._index_files()[0])
+        with open(path) as f:
+            data = json.load(f)
+        data["checkpoints"] = [[row, offset + (7 if idx > 1 else 0)]
+                               for idx, (row, offset) in enumerate(data["checkpoints"])]
+        with open(path, "w") as f:
+            json.dump(data, f)
+        assert self._read(excel_bytes, (2500, 2510)) == expected
+        assert not os.path.exists(path)
+
+    @pytest.mark.unit
+    def test_rows_without_number(self):
+        """测试行元素没有 r 属性时不建立索引"""
+        excel_bytes = _rewrite_sheet(_workbook(500), lambda xml: re.sub(rb'<row r="\d+"', b"<row", xml))
+        columns, rows = self._read(excel_bytes, (400, 401))
+        assert rows == [["398", "名称48", "597"], ["399", "名称49", "598.5"]]
+        assert self._index_files() == []
+
+    @pytest.mark.unit
+    def test_small_sheets_not_indexed(self, monkeypatch):
+        """测试工作表较小或关闭索引时不建立索引"""
+        monkeypatch.setattr("tools.row_index.ROW_INDEX_MIN_BYTES", 1 << 30)
+        self._read(_workbook(100))
+        monkeypatch.setattr("tools.row_index.ROW_INDEX_MIN_BYTES", 0)
+        monkeypatch.setattr("tools.row_index.ROW_INDEX_DIR", "off")
+        self._read(_workbook(100))
+        assert self._index_files() == []
+        info = zipfile.ZipFile(BytesIO(_workbook(100))).getinfo("xl/worksheets/sheet1.xml")
+        assert RowIndex.open(info) is None
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+
+from openpyxl import Workbook
+
+from tools.searchExcel import SearchExcelTool
+from tools.sheet_search import build_block_filter, build_matcher, parse_range, search_rows, search_workbook
+from tools.writeExcel import WriteExcelTool
+from tools.xlsx_reader import LazySharedStrings, XlsxReader
+
+
+@pytest.fixture
+def customer_workbook():
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "订单"
+    ws.append(["客户", "城市", "金额"])
+    for i in range(1, 101):
+        ws.append([f"客户{i % 10}", "Beijing" if i % 2 else "上海", i * 10])
+    other = wb.create_sheet("备注")
+    other.append(["说明"])
+    other.append(["客户3 的退款"])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+class TestSheetSearch:
+    """流式查找测试"""
+
+    @pytest.mark.unit
+    def test_matchers(self):
+        """测试子串、完全匹配、正则和数值范围匹配"""
+        assert build_matcher("bei")("x", "Beijing")
+        assert not build_matcher("bei", case_sensitive=True)("x", "Beijing")
+        assert build_matcher("beijing", "exact")("x", "Beijing")
+        assert not build_matcher("bei", "exact")("x", "Beijing")
+        assert build_matcher(r"^客户\d$", "regex")("x", "客户3")
+        in_range = build_matcher("10..20", "range")
+        assert in_range(15, "15") and in_range("20", "20") and not in_range(21, "21")
+        assert not in_range(True, "True") and not in_range("abc", "abc")
+        assert parse_range("..5") == (float("-inf"), 5) and parse_range("3") == (3, 3)
+        with pytest.raises(ValueError, match="Invalid numeric range"):
+            parse_range("5..1")
+        with pytest.raises(ValueError, match="Invalid regular expression"):
+            build_matcher("(", "regex")
+        with pytest.raises(ValueError, match="Unsupported match type"):
+            build_matcher("a", "fuzzy")
+
+    @pytest.mark.unit
+    def test_search_workbook(self, customer_workbook):
+        """测试返回坐标和行内容，按列限定，并依次查找各工作表"""
+        with XlsxReader(BytesIO(customer_workbook)) as reader:
+            result = search_workbook(reader, build_matcher("客户3"), max_matches=100)
+            by_column = search_workbook(reader, build_matcher("50..60", "range"), columns=["金额"])
+            by_letter = search_workbook(reader, build_matcher("50..60", "range"), columns=["A"])
+        assert len(result["matches"]) == 11 and not result["limit_reached"]
+        assert result["matches"][0] == {"sheet": "订单", "row": 4, "cells": ["A4"],
+                                        "record": {"客户": "客户3", "城市": "Beijing", "金额": "30"}}
+        assert result["matches"][-1] == {"sheet": "备注", "row": 2, "cells": ["A2"], "record": {"说明": "客户3 的退款"}}
+        assert [m["cells"] for m in by_column["matches"]] == [["C6"], ["C7"]]
+        assert by_letter["matches"] == []
+
+    @pytest.mark.unit
+    def test_stops_at_limit(self):
+        """测试达到匹配上限后不再解析后面的行"""
+        consumed = []
+
+        def rows():
+            yield 1, {1: "名称"}
+            for row_idx in range(2, 100000):
+                consumed.append(row_idx)
+                yield row_idx, {1: f"item{row_idx}"}
+
+        found = search_rows("s", rows(), build_matcher("item"))
+        assert [next(found)["row"] for _ in range(3)] == [2, 3, 4]
+        assert len(consumed) == 3
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("shared_strings", [True, False])
+    def test_block_filter(self, mock_runtime, mock_session, monkeypatch, shared_strings):
+        """测试行块预筛选跳过不含匹配的块，结果与逐行解析一致（含字符引用、大小写折叠的字符）"""
+        monkeypatch.setattr("tools.xlsx_reader.ROW_BLOCK_SIZE", 512)
+        monkeypatch.setattr("tools.xlsx_reader.ROW_READ_SIZE", 256)
+        data = [{"编号": i, "名称": f"名称{i}"} for i in range(2000)]
+        for i, text in ((300, "目标 Große"), (900, "\u212aelvin"), (1500, "TARGET"), (1800, "目标&<b>")):
+            data[i]["名称"] = text
+        excel_bytes, _ = WriteExcelTool(mock_runtime, mock_session).generate_excel_bytes(
+            json.dumps({"data": data, "format": {"engine": "stream", "shared_strings": shared_strings}}))
+        if not shared_strings:
+            # 改写为字符引用："目标" -> "&#30446;标"
+            source = zipfile.ZipFile(BytesIO(excel_bytes))
+            buffer = BytesIO()
+            with zipfile.ZipFile(buffer, "w") as target:
+                for info in source.infolist():
+                    content = source.read(info)
+                    if info.filename.startswith("xl/worksheets/"):
+                        content = content.replace("目标".encode("utf-8"), "&#30446;标".encode("utf-8"), 1)
+                    target.writestr(info, content)
+            excel_bytes = buffer.getvalue()
+        queries = [("目标", "contains", False), ("grosse", "contains", False), ("kelvin", "contains", False),
+                   ("target", "exact", False), ("TARGET", "exact", True), ("名称1999", "exact", False)]
+        with XlsxReader(BytesIO(excel_bytes)) as reader:
+            for query in queries:
+                block_filter = build_block_filter(reader, *query)
+                assert block_filter is not None
+                expected = search_workbook(reader, build_matcher(*query), max_matches=100)
+                assert expected["matches"], query
+                assert search_workbook(reader, build_matcher(*query), max_matches=100,
+                                       block_filter=block_filter) == expected
+            # 只可能匹配数字、含 XML 特殊字符或正则查找时不预筛选
+            assert build_block_filter(reader, "1999") is None
+            assert build_block_filter(reader, "&<b>") is None
+            assert build_block_filter(reader, "目标", "regex") is None
+            assert not build_block_filter(reader, "目标")(b'<row r="5"><c r="A5"><v>5</v></c></row>')
+
+
+    @pytest.mark.unit
+    def test_block_filter_lazy_shared_strings(self, mock_runtime, mock_session, monkeypatch):
+        """测试延迟解析的共享字符串表按原始 XML 预筛选，只解析可能匹配的字符串"""
+        monkeypatch.setattr("tools.xlsx_reader.SST_LAZY_THRESHOLD", 0)
+        monkeypatch.setattr("tools.xlsx_reader.SST_SCAN_SIZE", 4096)
+        data = [{"编号": i, "名称": f"名称{i}"} for i in range(3000)]
+        data[1200]["名称"], data[2500]["名称"] = "目标", "\u212aelvin"
+        excel_bytes, _ = WriteExcelTool(mock_runtime, mock_session).generate_excel_bytes(
+            json.dumps({"data": data, "format": {"engine": "stream", "shared_strings": True}}))
+        parsed = []
+        original = LazySharedStrings._parse
+
+        def counted(strings, idx):
+            parsed.append(idx)
+            return original(strings, idx)
+
+        with patch.object(LazySharedStrings, "_parse", counted), XlsxReader(BytesIO(excel_bytes)) as reader:
+            assert isinstance(reader.shared_strings, LazySharedStrings)
+            for query in ("目标", "kelvin"):
+                parsed.clear()
+                block_filter = build_block_filter(reader, query)
+                assert len(parsed) < 10
+                expected = search_workbook(reader, build_matcher(query), max_matches=100)
+                assert len(expected["matches"]) == 1
+                assert search_workbook(reader, build_matcher(query), max_matches=100,
+                                       block_filter=block_filter) == expected
+
+
+class TestSearchExcelTool:
+    """SearchExcelTool 测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        self.tool = SearchExcelTool(mock_runtime, mock_session)
+
+    def _search(self, file_meta, **params):
+        with patch.object(SearchExcelTool, 'create_text_message', side_effect=lambda text: text):
+            return json.loads(list(self.tool._invoke({'file': file_meta, **params}))[0])
+
+    @pytest.mark.integration
+    def test_search(self, file_server, customer_workbook):
+        """测试查找指定工作表并限制匹配行数"""
+        file_meta = file_server("orders.xlsx", customer_workbook)
+        result = self._search(file_meta, query="beijing", sheet="订单", columns="城市", max_matches=3)
+        assert result["limit_reached"] is True
+        assert [m["row"] for m in result["matches"]] == [2, 4, 6]
+        with pytest.raises(Exception, match="Error searching Excel file: Search query must not be empty"):
+            self._search(file_meta, query="")
+
+    @pytest.mark.integration
+    def test_early_stop_skips_download(self, file_server, mock_runtime, mock_session, monkeypatch):
+        """测试大文件通过 Range 请求读取时，找到匹配后不再下载后面的数据"""
+        from tools import http_client
+        monkeypatch.setattr(http_client, "RANGE_THRESHOLD", 1024)
+        monkeypatch.setattr(http_client, "RANGE_BLOCK_SIZE", 16 * 1024)
+        data = [{"编号": i, "名称": f"名称{i * 7919 % 100003}"} for i in range(50000)]
+        excel_bytes, _ = WriteExcelTool(mock_runtime, mock_session).generate_excel_bytes(
+            json.dumps({"data": data, "format": {"engine": "stream", "shared_strings": False}}))
+        file_meta = file_server("large.xlsx", excel_bytes)
+        result = self._search(file_meta, query="名称", max_matches=5)
+        assert [m["row"] for m in result["matches"]] == [2, 3, 4, 5, 6]
+        assert file_server.bytes_served < len(excel_bytes) / 2
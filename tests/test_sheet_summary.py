@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import datetime
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook
+
+from tools.sheet_summary import HyperLogLog, column_type, frame_rows, summarize_rows, summarize_workbook
+from tools.xlsx_reader import XlsxReader
+
+
+@pytest.fixture
+def summary_workbook():
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "订单"
+    ws.append(["编号", "部门", "金额", None, "日期", "备注"])
+    for i in range(1, 201):
+        ws.append([i, f"部门{i % 4}", i * 1.5 if i % 10 else None, None,
+                   datetime.datetime(2024, 1, 1) + datetime.timedelta(days=i), "NA" if i % 2 else i])
+    wb.create_sheet("空白")
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+class TestSheetSummary:
+    """工作表概要测试"""
+
+    @pytest.mark.unit
+    def test_hyperloglog(self):
+        """测试基数估计的误差"""
+        small = HyperLogLog()
+        for i in range(50):
+            small.add(f"v{i % 10}")
+        assert small.count() == 10
+        large = HyperLogLog()
+        for i in range(20000):
+            large.add(str(i))
+        assert abs(large.count() - 20000) / 20000 < 0.05
+
+    @pytest.mark.unit
+    def test_column_type(self):
+        """测试列类型推断"""
+        assert column_type({}) == "empty"
+        assert column_type({"integer": 3}) == "integer"
+        assert column_type({"integer": 3, "number": 1}) == "number"
+        assert column_type({"string": 2}) == "string"
+        assert column_type({"string": 2, "integer": 1}) == "mixed"
+
+    @pytest.mark.unit
+    def test_summarize_workbook(self, summary_workbook):
+        """测试行列数、类型、空值、范围、不同值数量和抽样行"""
+        with XlsxReader(BytesIO(summary_workbook)) as reader:
+            summary = summarize_workbook(reader)
+        data, blank = summary["sheets"]
+        assert (data["name"], data["rows"], data["columns"]) == ("订单", 200, 5)
+        assert blank == {"name": "空白", "rows": 0, "columns": 0, "fields": [], "sample": []}
+        fields = {field["name"]: field for field in data["fields"]}
+        assert list(fields) == ["编号", "部门", "金额", "日期", "备注"]
+        assert fields["编号"] == {"name": "编号", "type": "integer", "non_null": 200, "nulls": 0,
+                                  "distinct": 200, "min": 1, "max": 200}
+        assert fields["部门"]["type"] == "string" and fields["部门"]["distinct"] == 4
+        assert fields["金额"]["type"] == "number" and fields["金额"]["nulls"] == 20
+        assert (fields["金额"]["min"], fields["金额"]["max"]) == (1.5, 298.5)
+        assert fields["日期"]["min"] == "2024-01-02T00:00:00"
+        # "NA" 按缺失值处理
+        assert fields["备注"]["type"] == "integer" and fields["备注"]["nulls"] == 100
+        assert len(data["sample"]) == 5
+        assert set(data["sample"][0]) == set(fields)
+
+    @pytest.mark.unit
+    def test_sample_is_stable(self, summary_workbook):
+        """测试抽样使用固定种子，指定工作表时按名称或序号只统计该工作表"""
+        with XlsxReader(BytesIO(summary_workbook)) as reader:
+            first = summarize_workbook(reader, "订单")
+            second = summarize_workbook(reader, "0")
+        assert first == second
+        assert [sheet["name"] for sheet in first["sheets"]] == ["订单"]
+
+    @pytest.mark.unit
+    def test_phantom_rows_and_frames(self):
+        """测试幻影行提前停止，以及 DataFrame 逐行输出中的空值"""
+        rows = [(1, {1: "a"}), (2, {1: 1})] + [(r, {}) for r in range(3, 50)] + [(50, {1: 2})]
+        assert summarize_rows("s", iter(rows), max_empty_rows=10)["rows"] == 1
+        assert summarize_rows("s", iter(rows), max_empty_rows=0)["rows"] == 49
+        df = pd.DataFrame([["a", None], [1, float("nan")], [pd.NaT, "x"]])
+        assert list(frame_rows(df)) == [(1, {1: "a"}), (2, {1: 1}), (3, {2: "x"})]
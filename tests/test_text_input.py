@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from openpyxl import load_workbook
+
+from tools.text_input import columnar_table, coerce_value, detect_encoding, open_text, read_table, resolve_input_format
+from tools.writeExcel import WriteExcelTool
+
+
+class TestTextInput:
+    """文本表格输入解析测试"""
+
+    @pytest.mark.unit
+    def test_coerce_value(self):
+        """测试数字文本转换为数字，前导零和超长整数保持文本"""
+        assert coerce_value("") is None
+        assert coerce_value("25") == 25
+        assert coerce_value("-3.5") == -3.5
+        assert coerce_value("1e3") == 1000.0
+        assert coerce_value("007") == "007"
+        assert coerce_value("1234567890123456789") == "1234567890123456789"
+        assert coerce_value("12a") == "12a"
+
+    @pytest.mark.unit
+    def test_read_csv(self):
+        """测试带引号、逗号和换行的字段"""
+        columns, rows = read_table(StringIO('姓名,备注,年龄\n张三,"a,b",25\n\n李四,"多\n行",\n', newline=""), "csv")
+        assert columns == ["姓名", "备注", "年龄"]
+        assert rows == [["张三", "a,b", 25], ["李四", "多\n行", None]]
+        with pytest.raises(ValueError, match="line 3 has 3 fields but the header has only 2"):
+            read_table(StringIO("a,b\n1,2\n3,4,5\n", newline=""), "csv")
+
+    @pytest.mark.unit
+    def test_read_ndjson(self):
+        """测试列顺序按首次出现排列，缺失的键为空"""
+        columns, rows = read_table(StringIO('{"a": 1, "b": "x"}\n\n{"c": true, "a": 2}\n'), "ndjson")
+        assert columns == ["a", "b", "c"]
+        assert rows == [[1, "x"], [2, None, True]]
+        with pytest.raises(ValueError, match="line 2"):
+            read_table(StringIO('{"a": 1}\n[1, 2]\n'), "ndjson")
+
+    @pytest.mark.unit
+    def test_encoding_and_format(self):
+        """测试编码识别和按扩展名判断输入格式"""
+        assert detect_encoding("姓名".encode("utf-8")[:-1]) == "utf-8-sig"
+        assert detect_encoding("姓名,年龄\n张三,25\n".encode("gb18030")) == "gb18030"
+        assert open_text(BytesIO("﻿姓名\n".encode("utf-8"))).read() == "姓名\n"
+        assert resolve_input_format(None, "报表.CSV") == "csv"
+        assert resolve_input_format("auto", "data.jsonl") == "ndjson"
+        assert resolve_input_format(None) == "json"
+        with pytest.raises(ValueError):
+            resolve_input_format("xml")
+
+    @pytest.mark.unit
+    def test_columnar_table(self):
+        """测试识别 columns + rows 和 {列名: 数组} 两种列式数据"""
+        assert columnar_table({"columns": ["a", "b"], "rows": [[1, 2], [3]]}) == (["a", "b"], [[1, 2], [3]])
+        assert columnar_table({"a": [1, 2], "b": ["x"]}) == (["a", "b"], [[1, "x"], [2, None]])
+        assert columnar_table({"a": 1, "b": [2]}) is None
+        assert columnar_table([{"a": 1}]) is None
+        assert columnar_table({}) is None
+        with pytest.raises(ValueError, match="rows\\[1\\] has 3 values"):
+            columnar_table({"columns": ["a", "b"], "rows": [[1], [1, 2, 3]]})
+
+
+class TestWriteExcelTextInput:
+    """WriteExcelTool 文本输入测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    def _invoke(self, params):
+        with patch.object(WriteExcelTool, 'create_text_message', side_effect=lambda text: text), \
+                patch.object(WriteExcelTool, 'create_blob_message', side_effect=lambda blob, meta: blob):
+            messages = list(self.tool._invoke(params))
+        return load_workbook(BytesIO(messages[1])).active
+
+    @pytest.mark.integration
+    def test_inline_tsv(self):
+        """测试 json_str 中的 TSV 文本"""
+        ws = self._invoke({'json_str': "姓名\t年龄\n张三\t25\n李四\t30\n", 'input_format': 'tsv'})
+        assert [list(row) for row in ws.iter_rows(values_only=True)] == [["姓名", "年龄"], ["张三", 25], ["李四", 30]]
+        # 字段较少的行其余单元格为空
+        ws = self._invoke({'json_str': "a\tb\n1\n2\t3\n", 'input_format': 'tsv'})
+        assert [list(row) for row in ws.iter_rows(values_only=True)] == [["a", "b"], [1, None], [2, 3]]
+
+    @pytest.mark.integration
+    def test_uploaded_csv_with_format(self, file_server):
+        """测试上传的 GB18030 编码 CSV，json_str 只包含格式配置"""
+        data_file = file_server("export.csv", "姓名,薪资\n张三,8000\n李四,9500\n".encode("gb18030"))
+        data_file.filename = "export.csv"
+        format_json = json.dumps({"format": {"column_formats": {"薪资": {"type": "currency"}}}})
+        ws = self._invoke({'json_str': format_json, 'data_file': data_file})
+        assert ws["A2"].value == "张三"
+        assert ws["B3"].value == 9500
+        assert ws["B3"].number_format == '"¥"#,##0.00'
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_uploaded_json_with_format(self, file_server, engine):
+        """测试上传的 JSON 文件，json_str 中的样式和合并单元格不会丢失"""
+        records = [{"姓名": "张三", "薪资": 8000}, {"姓名": "李四", "薪资": 9500}]
+        format_json = json.dumps({"format": {"engine": engine, "merge_cells": ["A2:A3"],
+                                             "cells": {"2,2": {"font": {"bold": True}}}}})
+        data_file = file_server("export.json", json.dumps(records, ensure_ascii=False).encode())
+        data_file.filename = "export.json"
+        ws = self._invoke({'json_str': format_json, 'data_file': data_file})
+        assert ws["B3"].value == 9500
+        assert ws["B2"].font.bold
+        assert [str(r) for r in ws.merged_cells.ranges] == ["A2:A3"]
+        # 文件自带 format 时逐项合并，同名配置项以 json_str 为准
+        document = {"data": records, "format": {"merge_cells": ["B2:B3"], "column_formats": {"薪资": {"type": "currency"}}}}
+        data_file = file_server("styled.json", json.dumps(document, ensure_ascii=False).encode())
+        data_file.filename = "styled.json"
+        ws = self._invoke({'json_str': format_json, 'data_file': data_file})
+        assert [str(r) for r in ws.merged_cells.ranges] == ["A2:A3"]
+        assert ws["B2"].font.bold
+        assert ws["B3"].number_format == '"¥"#,##0.00'
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_columnar_json(self, engine):
+        """测试列式 JSON 输入，两种引擎的结果一致"""
+        payload = {"columns": ["姓名", "薪资"], "rows": [["张三", 8000], ["李四"]],
+                   "format": {"engine": engine, "column_formats": {"薪资": {"type": "currency"}}}}
+        ws = self._invoke({'json_str': json.dumps(payload)})
+        assert [list(row) for row in ws.iter_rows(values_only=True)] == [["姓名", "薪资"], ["张三", 8000], ["李四", None]]
+        assert ws["B2"].number_format == '"¥"#,##0.00'
+        payload = {"data": {"姓名": ["张三", "李四"], "年龄": [25, 30]}, "format": {"engine": engine}}
+        ws = self._invoke({'json_str': json.dumps(payload)})
+        assert [list(row) for row in ws.iter_rows(values_only=True)] == [["姓名", "年龄"], ["张三", 25], ["李四", 30]]
+
+    @pytest.mark.unit
+    def test_parse_error(self):
+        """测试解析失败的错误信息"""
+        with pytest.raises(Exception, match="Error parsing NDJSON data"):
+            self.tool.generate_excel_bytes("not json", input_format="ndjson")
+        with pytest.raises(Exception, match="Error parsing CSV data: line 3 has 3 fields"):
+            self.tool.generate_excel_bytes("a,b\n1,2\n3,4,5\n", 'x', input_format='csv')
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import csv
+import io
+import json
+
+from tools.text_input import columnar_table
+from tools.text_output import encode_records, encode_text, resolve_output_format
+
+COLUMNS = ["姓名", "备注", "金额"]
+ROWS = [["张三", "a|b", "1.5"], ["李四", None, None], ["王五", "第一行\n第二行,\"引号\"", "3"]]
+
+
+class TestTextOutput:
+    """readExcel 输出编码测试"""
+
+    @pytest.mark.unit
+    def test_resolve_output_format(self):
+        """测试输出格式的解析"""
+        assert resolve_output_format(None) == "records"
+        assert resolve_output_format("CSV") == "csv"
+        with pytest.raises(ValueError, match="Unsupported output format"):
+            resolve_output_format("xml")
+
+    @pytest.mark.unit
+    def test_records_and_split(self):
+        """测试 records 与原有 JSON 输出一致，split 可以直接作为 writeExcel 的列式输入"""
+        records = [dict(zip(COLUMNS, row)) for row in ROWS]
+        assert encode_text(COLUMNS, ROWS) == json.dumps(records, ensure_ascii=False, separators=(',', ':'))
+        split = json.loads(encode_text(COLUMNS, ROWS, "split"))
+        assert split == {"columns": COLUMNS, "rows": ROWS}
+        assert columnar_table(split) == (COLUMNS, ROWS)
+        assert json.loads(encode_text(COLUMNS, [], "records")) == []
+        assert json.loads(encode_text(COLUMNS, [], "split")) == {"columns": COLUMNS, "rows": []}
+
+    @pytest.mark.unit
+    def test_markdown(self):
+        """测试 Markdown 表格的转义和空值"""
+        assert encode_text(COLUMNS, ROWS[:2], "markdown") == (
+            "| 姓名 | 备注 | 金额 |\n| --- | --- | --- |\n| 张三 | a\\|b | 1.5 |\n| 李四 |  |  |\n")
+        assert "| 第一行<br>第二行" in encode_text(COLUMNS, ROWS, "markdown")
+
+    @pytest.mark.unit
+    def test_csv(self):
+        """测试 CSV 的引号、换行和空值"""
+        text = encode_text(COLUMNS, ROWS, "csv")
+        assert list(csv.reader(io.StringIO(text))) == [COLUMNS] + [[v or "" for v in row] for row in ROWS]
+
+    @pytest.mark.unit
+    def test_streaming_chunks(self, monkeypatch):
+        """测试按行分片产出，且接受任意可迭代的行"""
+        monkeypatch.setattr("tools.text_output.CHUNK_ROWS", 2)
+        rows = ([str(i), None, str(i)] for i in range(5))
+        chunks = list(encode_records(COLUMNS, rows, "split"))
+        assert len(chunks) == 7
+        assert json.loads("".join(chunks))["rows"][-1] == ["4", None, "4"]
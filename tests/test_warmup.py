@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.pipeline import WorkerPool
+from tools.warmup import WARMUP_STEPS, parse_steps, warm_up
+
+
+class TestWarmup:
+    """延迟导入与启动预热测试"""
+
+    @pytest.mark.unit
+    def test_parse_steps(self, capsys):
+        """测试预热配置的解析"""
+        assert parse_steps(None) == []
+        assert parse_steps("off") == []
+        assert parse_steps("1") == list(WARMUP_STEPS)
+        assert parse_steps("ALL") == list(WARMUP_STEPS)
+        assert parse_steps("pools, imports,pools,bogus") == ["pools", "imports"]
+        assert "Unknown warm-up step 'bogus'" in capsys.readouterr().out
+
+    @pytest.mark.unit
+    def test_warm_up(self):
+        """测试执行各预热步骤并返回耗时，未配置时不执行"""
+        timings = warm_up(list(WARMUP_STEPS))
+        assert list(timings) == list(WARMUP_STEPS)
+        assert all(ms >= 0 for ms in timings.values())
+        assert warm_up([]) == {}
+
+    @pytest.mark.unit
+    def test_pool_prestart(self):
+        """测试预先启动工作池的全部线程"""
+        pool = WorkerPool(size=3)
+        pool.prestart()
+        # gevent 环境下为 gevent 的原生线程池
+        started = len(pool._pool._threads) if isinstance(pool._pool, ThreadPoolExecutor) else pool._pool.size
+        assert started == 3
+        assert pool.run(sum, [1, 2]) == 3
+
+    @pytest.mark.integration
+    def test_lazy_imports(self):
+        """测试导入工具模块时不加载 pandas 和 openpyxl"""
+        code = "import sys, tools.writeExcel, tools.readExcel; print(','.join(sorted(sys.modules)))"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        loaded = set(result.stdout.strip().split(","))
+        assert "tools.writeExcel" in loaded
+        assert not loaded & {"pandas", "numpy", "openpyxl"}
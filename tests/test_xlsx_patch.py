@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+from openpyxl import Workbook, load_workbook
+from openpyxl.formatting.rule import DataBarRule
+from openpyxl.styles import Font
+
+from tools.writeExcel import WriteExcelTool
+from tools.xlsx_patch import XlsxPatcher
+from tools.xlsx_reader import XlsxReader
+
+
+def _workbook_bytes():
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "数据"
+    ws.append(["姓名", "年龄"])
+    ws.append(["张三", 25])
+    ws.append(["李四", 30])
+    ws["B3"].font = Font(bold=True)
+    # 只有格式、没有值的行
+    ws["A4"].font = Font(italic=True)
+    wb.create_sheet("其他")["A1"] = "不变"
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _update(source, sheet=None, rows=(), patches=()):
+    output = BytesIO()
+    with XlsxPatcher(BytesIO(source), sheet) as patcher:
+        patcher.append(rows)
+        for ref, values in patches:
+            patcher.patch(ref, values)
+        patcher.write(output)
+    return output.getvalue()
+
+
+class TestXlsxPatcher:
+    """增量更新测试"""
+
+    @pytest.mark.unit
+    def test_append_records(self):
+        """测试按表头追加记录，新键追加为新列，只有格式的空行被复用并保留样式"""
+        updated = _update(_workbook_bytes(), rows=[{"姓名": "王五", "年龄": 28, "部门": "技术部"}, {"姓名": "赵六"}])
+        ws = load_workbook(BytesIO(updated))["数据"]
+        assert [list(row) for row in ws.iter_rows(values_only=True)] == [
+            ["姓名", "年龄", "部门"], ["张三", 25, None], ["李四", 30, None],
+            ["王五", 28, "技术部"], ["赵六", None, None]]
+        assert ws["A4"].font.i
+        assert ws.dimensions == "A1:C5"
+
+    @pytest.mark.unit
+    def test_patch_ranges(self):
+        """测试修改单元格保留原有样式，区域填充、二维数组和清除值"""
+        updated = _update(_workbook_bytes(), patches=[
+            ("B3", 31), ("A2", None), ("C1:C3", "x"), ("A7", [["a", 1], ["b", 2]])])
+        ws = load_workbook(BytesIO(updated))["数据"]
+        assert ws["B3"].value == 31
+        assert ws["B3"].font.b
+        assert ws["A2"].value is None
+        assert [ws.cell(row=r, column=3).value for r in (1, 2, 3)] == ["x", "x", "x"]
+        assert [[c.value for c in row] for row in ws["A7:B8"]] == [["a", 1], ["b", 2]]
+
+    @pytest.mark.unit
+    def test_untouched_parts_are_copied(self):
+        """测试未修改的部件按原始压缩数据拷贝，只有目标工作表被重写"""
+        source = _workbook_bytes()
+        updated = _update(source, sheet="其他", rows=[["新行"]])
+        with zipfile.ZipFile(BytesIO(source)) as before, zipfile.ZipFile(BytesIO(updated)) as after:
+            assert before.namelist() == after.namelist()
+            changed = [info.filename for info in before.infolist()
+                       if (info.CRC, info.compress_size) != (after.getinfo(info.filename).CRC,
+                                                            after.getinfo(info.filename).compress_size)]
+        # openpyxl 生成的 workbook.xml 已带有 fullCalcOnLoad，内容不变
+        assert changed == ["xl/worksheets/sheet2.xml"]
+        wb = load_workbook(BytesIO(updated))
+        assert wb.calculation.fullCalcOnLoad
+        assert [row[0] for row in wb["其他"].iter_rows(values_only=True)] == ["不变", "新行"]
+
+    @pytest.mark.unit
+    def test_full_calc_on_load(self):
+        """测试设置 fullCalcOnLoad：已有 calcPr 时补充属性，否则按元素顺序插入"""
+        assert XlsxPatcher._workbook(b'<workbook><calcPr calcId="1"/></workbook>') == \
+            b'<workbook><calcPr calcId="1" fullCalcOnLoad="1"/></workbook>'
+        assert XlsxPatcher._workbook(b'<x:workbook><x:sheets/><x:extLst/></x:workbook>') == \
+            b'<x:workbook><x:sheets/><x:calcPr fullCalcOnLoad="1"/><x:extLst/></x:workbook>'
+
+    @pytest.mark.unit
+    def test_calc_chain_removed(self):
+        """测试删除计算链及其关系和内容类型"""
+        source = BytesIO()
+        with zipfile.ZipFile(BytesIO(_workbook_bytes())) as src, zipfile.ZipFile(source, "w") as dst:
+            for info in src.infolist():
+                data = src.read(info.filename)
+                if info.filename == "[Content_Types].xml":
+                    data = data.replace(b"</Types>", b'<Override PartName="/xl/calcChain.xml" ContentType='
+                                        b'"application/vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/></Types>')
+                elif info.filename == "xl/_rels/workbook.xml.rels":
+                    data = data.replace(b"</Relationships>", b'<Relationship Id="rId99" Type="http://schemas.'
+                                        b'openxmlformats.org/officeDocument/2006/relationships/calcChain" '
+                                        b'Target="calcChain.xml"/></Relationships>')
+                dst.writestr(info, data)
+            dst.writestr("xl/calcChain.xml", b'<calcChain xmlns="http://schemas.openxmlformats.org/'
+                                             b'spreadsheetml/2006/main"><c r="B2" i="1"/></calcChain>')
+        updated = _update(source.getvalue(), patches=[("B2", 1)])
+        with zipfile.ZipFile(BytesIO(updated)) as zf:
+            assert "xl/calcChain.xml" not in zf.namelist()
+            assert b"calcChain" not in zf.read("[Content_Types].xml")
+            assert b"calcChain" not in zf.read("xl/_rels/workbook.xml.rels")
+        assert load_workbook(BytesIO(updated))["数据"]["B2"].value == 1
+
+    @pytest.mark.unit
+    def test_empty_sheet(self):
+        """测试空工作表先写入表头"""
+        wb = Workbook()
+        buffer = BytesIO()
+        wb.save(buffer)
+        updated = _update(buffer.getvalue(), rows=[{"a": 1, "b": 2}])
+        ws = load_workbook(BytesIO(updated)).active
+        assert [list(row) for row in ws.iter_rows(values_only=True)] == [["a", "b"], [1, 2]]
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_append_extends_table(self, simple_data, engine):
+        """测试向带表格和条件格式的工作表追加行时，表格、筛选和条件格式的范围覆盖新行"""
+        tool = WriteExcelTool(None, None)
+        source, _ = tool.generate_excel_bytes(json.dumps({"data": simple_data, "format": {
+            "engine": engine, "table": {"name": "Staff"},
+            "conditional_formats": [{"range": "B", "type": "data_bar"}, {"range": "A1", "type": "data_bar"}]}}))
+        updated = _update(source, rows=[{"姓名": "王五", "年龄": 28, "部门": "技术部"}, ["赵六", 35, "市场部"]])
+        ws = load_workbook(BytesIO(updated)).active
+        table = ws.tables["Staff"]
+        assert table.ref == "A1:C5"
+        assert table.autoFilter.ref == "A1:C5"
+        assert {str(cf.sqref) for cf in ws.conditional_formatting} == {"B2:B5", "A1"}
+        assert ws["A5"].value == "赵六"
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("engine", ["openpyxl", "stream"])
+    def test_append_new_key_widens_table(self, engine):
+        """测试追加的记录带新键时，表格和筛选向右延伸，tableColumns 补上新列"""
+        tool = WriteExcelTool(None, None)
+        source, _ = tool.generate_excel_bytes(json.dumps({"data": [{"姓名": "张三", "年龄": 25}, {"姓名": "李四", "年龄": 30}], "format": {
+            "engine": engine, "table": {"name": "Staff"}, "conditional_formats": [{"range": "B", "type": "data_bar"}]}}))
+        updated = _update(source, rows=[{"姓名": "王五", "部门": "技术部", "城市": "北京"}])
+        ws = load_workbook(BytesIO(updated)).active
+        table = ws.tables["Staff"]
+        assert table.ref == "A1:D4"
+        assert table.autoFilter.ref == "A1:D4"
+        assert [(column.id, column.name) for column in table.tableColumns] == [
+            (1, "姓名"), (2, "年龄"), (3, "部门"), (4, "城市")]
+        assert [cell.value for cell in ws[1]] == ["姓名", "年龄", "部门", "城市"]
+        assert [str(cf.sqref) for cf in ws.conditional_formatting] == ["B2:B4"]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("patch_first", [False, True])
+    def test_append_after_patches(self, patch_first):
+        """测试追加的行写在修改过的行之后，与调用 append 和 patch 的先后无关"""
+        output = BytesIO()
+        with XlsxPatcher(BytesIO(_workbook_bytes())) as patcher:
+            if patch_first:
+                patcher.patch("A5", "备注")
+            patcher.append([["王五", 28]])
+            if not patch_first:
+                patcher.patch("A5", "备注")
+            patcher.write(output)
+        ws = load_workbook(BytesIO(output.getvalue()))["数据"]
+        assert [list(row) for row in ws.iter_rows(min_row=4, values_only=True)] == [
+            [None, None], ["备注", None], ["王五", 28]]
+
+    @pytest.mark.unit
+    def test_append_extends_auto_filter(self):
+        """测试工作表筛选的范围延伸到追加的行，不包含最后一个有值的行的范围保持不变"""
+        wb = load_workbook(BytesIO(_workbook_bytes()))
+        wb["数据"].auto_filter.ref = "A1:B3"
+        wb["数据"].conditional_formatting.add("A1:B2", DataBarRule(start_type="min", end_type="max", color="638EC6"))
+        buffer = BytesIO()
+        wb.save(buffer)
+        updated = _update(buffer.getvalue(), rows=[["王五", 28], ["赵六", 35]])
+        ws = load_workbook(BytesIO(updated))["数据"]
+        assert ws.auto_filter.ref == "A1:B5"
+        assert [str(cf.sqref) for cf in ws.conditional_formatting] == ["A1:B2"]
+
+    @pytest.mark.unit
+    def test_sheet_scanned_once(self):
+        """测试追加时表头、最后一个有值的行和重写在同一遍扫描中完成"""
+        scans = []
+        original = XlsxPatcher._sheet_chunks
+
+        def counted(patcher):
+            scans.append(1)
+            return original(patcher)
+
+        with patch.object(XlsxPatcher, "_sheet_chunks", counted), \
+                patch.object(XlsxReader, "iter_rows", side_effect=AssertionError("sheet parsed separately")):
+            updated = _update(_workbook_bytes(), rows=[{"姓名": "王五", "部门": "技术部"}], patches=[("B2", 26)])
+        assert len(scans) == 1
+        ws = load_workbook(BytesIO(updated))["数据"]
+        assert [list(row) for row in ws.iter_rows(values_only=True)] == [
+            ["姓名", "年龄", "部门"], ["张三", 26, None], ["李四", 30, None], ["王五", None, "技术部"]]
+
+    @pytest.mark.unit
+    def test_invalid_range(self):
+        """测试无效的修改范围"""
+        with XlsxPatcher(BytesIO(_workbook_bytes())) as patcher:
+            with pytest.raises(ValueError):
+                patcher.patch("B", 1)
+
+
+class TestWriteExcelUpdate:
+    """WriteExcelTool 增量更新测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    @pytest.mark.integration
+    def test_update_base_file(self, file_server):
+        """测试传入 base_file 时更新上传的工作簿，默认沿用原文件名"""
+        base_file = file_server("daily.xlsx", _workbook_bytes())
+        base_file.filename = "daily.xlsx"
+        payload = {"data": [{"姓名": "王五", "年龄": 28}], "patches": [{"range": "B2", "value": 26}]}
+        with patch.object(WriteExcelTool, 'create_text_message', side_effect=lambda text: text), \
+                patch.object(WriteExcelTool, 'create_blob_message', side_effect=lambda blob, meta: (blob, meta)):
+            messages = list(self.tool._invoke({'json_str': json.dumps(payload), 'base_file': base_file}))
+        assert messages[0] == "Excel file 'daily.xlsx' updated successfully"
+        blob, meta = messages[1]
+        assert meta["filename"] == "daily.xlsx"
+        ws = load_workbook(BytesIO(blob))["数据"]
+        assert ws["B2"].value == 26
+        assert ws["A4"].value == "王五"
+
+    @pytest.mark.unit
+    def test_update_errors(self):
+        """测试非 xlsx 文件的错误信息"""
+        with pytest.raises(Exception, match="Error updating Excel file"):
+            self.tool.update_excel_bytes('[{"a": 1}]', BytesIO(b"not an excel file"))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import datetime
+import json
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
+
+from tools.xlsx_reader import LazySharedStrings, XlsxReader, dedup_columns, read_sheet_records
+
+
+def _records(columns, rows):
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _pandas_records(excel_bytes, sheet=0):
+    return json.loads(pd.read_excel(BytesIO(excel_bytes), dtype=str, sheet_name=sheet)
+                      .to_json(orient="records", force_ascii=False))
+
+
+@pytest.fixture
+def mixed_workbook():
+    """包含多种数据类型、空行、重复表头和多个工作表的工作簿"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "数据"
+    ws.append(["姓名", "姓名", None, "金额", 2024, "姓名.1"])
+    ws.append(["张三", 2.0, 1.5, True, "NA", ""])
+    ws.append([None] * 6)
+    ws.append([1e20, datetime.datetime(2024, 1, 2, 3, 4), datetime.date(2024, 1, 2),
+               datetime.time(12, 30), " 空格 ", "null"])
+    ws.append([None] * 7 + ["宽"])
+    ws["A1"].font = Font(bold=True)
+    ws["B2"].fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    ws.cell(row=20, column=1).font = Font(italic=True)
+    other = wb.create_sheet("其他")
+    other.append(["编号", "部门"])
+    other.append([1, "技术部"])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+class TestXlsxReader:
+    """流式读取器测试"""
+
+    @pytest.mark.unit
+    def test_sheet_names(self, mixed_workbook):
+        """测试通过 workbook.xml 和关系解析工作表"""
+        with XlsxReader(BytesIO(mixed_workbook)) as reader:
+            assert reader.sheet_names == ["数据", "其他"]
+
+    @pytest.mark.unit
+    def test_matches_pandas_dtype_str(self, mixed_workbook):
+        """测试读取结果与 pd.read_excel(dtype=str) 一致"""
+        with XlsxReader(BytesIO(mixed_workbook)) as reader:
+            columns, rows = read_sheet_records(reader)
+        assert _records(columns, rows) == _pandas_records(mixed_workbook)
+
+    @pytest.mark.unit
+    def test_select_sheet_by_name_and_index(self, mixed_workbook):
+        """测试按名称和序号选择工作表"""
+        with XlsxReader(BytesIO(mixed_workbook)) as reader:
+            by_name = _records(*read_sheet_records(reader, "其他"))
+            by_index = _records(*read_sheet_records(reader, "1"))
+        assert by_name == by_index == [{"编号": "1", "部门": "技术部"}]
+
+    @pytest.mark.unit
+    def test_missing_sheet(self, mixed_workbook):
+        """测试工作表不存在时的错误"""
+        with XlsxReader(BytesIO(mixed_workbook)) as reader:
+            with pytest.raises(Exception) as excinfo:
+                read_sheet_records(reader, "不存在")
+        assert "not found" in str(excinfo.value)
+
+    @pytest.mark.unit
+    def test_only_target_parts_are_inflated(self, mixed_workbook):
+        """测试只打开目标工作表、共享字符串和样式部件"""
+        with XlsxReader(BytesIO(mixed_workbook)) as reader:
+            opened = []
+            original_open = reader.zf.open
+
+            def tracking_open(name, *args, **kwargs):
+                opened.append(name)
+                return original_open(name, *args, **kwargs)
+
+            with patch.object(reader.zf, "open", side_effect=tracking_open):
+                read_sheet_records(reader, "其他")
+        assert "xl/worksheets/sheet2.xml" in opened
+        assert "xl/worksheets/sheet1.xml" not in opened
+        assert not any("theme" in name for name in opened)
+
+    @pytest.mark.unit
+    def test_dedup_columns(self):
+        """测试重复列名的处理规则"""
+        assert dedup_columns(["a", "a", None, "a.1"]) == ["a", "a.2", "Unnamed: 2", "a.1"]
+        assert dedup_columns(["x", "y", "x", "x"]) == ["x", "y", "x.1", "x.2"]
+
+    @pytest.mark.unit
+    def test_inline_strings_from_stream_engine(self, mock_runtime, mock_session):
+        """测试读取流式引擎生成的内联字符串工作簿"""
+        from tools.writeExcel import WriteExcelTool
+        data = [{"姓名": "张三", "年龄": 25}, {"姓名": "李四", "年龄": 30.5}]
+        excel_bytes, _ = WriteExcelTool(mock_runtime, mock_session).generate_excel_bytes(
+            json.dumps({"data": data, "format": {"engine": "stream"}}))
+        with XlsxReader(BytesIO(excel_bytes)) as reader:
+            records = _records(*read_sheet_records(reader))
+        assert records == [{"姓名": "张三", "年龄": "25"}, {"姓名": "李四", "年龄": "30.5"}]
+
+    @pytest.mark.unit
+    def test_phantom_rows_and_empty_columns(self):
+        """测试只有样式的幻影行不计入数据范围，连续过多时提前停止；去掉没有表头也没有值的列"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["编号", "名称", None, "备注"])
+        ws.append([1, "a", None, "NA"])
+        ws.append([2, "b"])
+        for row in range(4, 60):
+            for col in range(1, 5):
+                ws.cell(row=row, column=col).font = Font(bold=True)
+        ws.cell(row=80, column=1, value=3)
+        buffer = BytesIO()
+        wb.save(buffer)
+        with XlsxReader(BytesIO(buffer.getvalue())) as reader:
+            columns, rows = read_sheet_records(reader, max_empty_rows=20, prune_columns=True)
+            assert columns == ["编号", "名称", "备注"]
+            assert rows == [["1", "a", None], ["2", "b", None]]
+            # 不提前停止时读到最后一个有值的行，与 pandas 一致
+            columns, rows = read_sheet_records(reader, max_empty_rows=0)
+        assert len(rows) == 79 and rows[-1][0] == "3"
+        assert _records(columns, rows) == _pandas_records(buffer.getvalue())
+
+
+def _shared_strings_workbook():
+    """使用共享字符串表的最小工作簿（openpyxl 写出的是内联字符串）"""
+    main = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    rel = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    pkg = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+    cells = [("A1", 0), ("B1", 1), ("A2", 2), ("B2", 3), ("A3", 2), ("B3", 4)]
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("_rels/.rels", f'<Relationships {pkg}><Relationship Id="rId1" '
+                    f'Type="{rel}/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+        zf.writestr("xl/workbook.xml", f'<workbook {main} xmlns:r="{rel}"><sheets>'
+                    '<sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        zf.writestr("xl/_rels/workbook.xml.rels", f'<Relationships {pkg}>'
+                    f'<Relationship Id="rId1" Type="{rel}/worksheet" Target="worksheets/sheet1.xml"/>'
+                    f'<Relationship Id="rId2" Type="{rel}/sharedStrings" Target="sharedStrings.xml"/>'
+                    '</Relationships>')
+        zf.writestr("xl/sharedStrings.xml", f'<sst {main}>' + "".join(
+            f"<si><t>{text}</t></si>" for text in ["部门", "姓名", "技术部", "张三", "李四"]) + "</sst>")
+        rows = {}
+        for ref, idx in cells:
+            rows.setdefault(ref[1:], []).append(f'<c r="{ref}" t="s"><v>{idx}</v></c>')
+        zf.writestr("xl/worksheets/sheet1.xml", f'<worksheet {main}><sheetData>' + "".join(
+            f'<row r="{r}">{"".join(c)}</row>' for r, c in rows.items()) + "</sheetData></worksheet>")
+    return buffer.getvalue()
+
+
+class TestLazySharedStrings:
+    """按偏移量延迟解析的共享字符串表测试"""
+
+    @pytest.mark.unit
+    def test_lazy_matches_eager(self, monkeypatch):
+        """测试超过阈值时使用延迟解析，结果与整体加载一致"""
+        excel_bytes = _shared_strings_workbook()
+        with XlsxReader(BytesIO(excel_bytes)) as reader:
+            assert isinstance(reader.shared_strings, list)
+            eager = _records(*read_sheet_records(reader))
+        monkeypatch.setattr("tools.xlsx_reader.SST_LAZY_THRESHOLD", 0)
+        with XlsxReader(BytesIO(excel_bytes)) as reader:
+            assert isinstance(reader.shared_strings, LazySharedStrings)
+            lazy = _records(*read_sheet_records(reader))
+        assert lazy == eager == [{"部门": "技术部", "姓名": "张三"}, {"部门": "技术部", "姓名": "李四"}]
+
+    @pytest.mark.unit
+    def test_prefixed_rich_text_and_empty_items(self):
+        """测试带命名空间前缀、富文本、注音和空字符串项"""
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<x:sst xmlns:x="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="4">'
+            '<x:si><x:t>普通</x:t></x:si>'
+            '<x:si/>'
+            '<x:si><x:r><x:rPr><x:b/></x:rPr><x:t>富</x:t></x:r><x:r><x:t xml:space="preserve"> 文本</x:t></x:r>'
+            '<x:rPh><x:t>ふ</x:t></x:rPh></x:si>'
+            '<x:si><x:t>a&lt;b</x:t></x:si>'
+            '</x:sst>'
+        ).encode("utf-8")
+        strings = LazySharedStrings(BytesIO(xml), cache_size=2)
+        try:
+            assert len(strings) == 4
+            assert [strings[i] for i in range(4)] == ["普通", "", "富 文本", "a<b"]
+            assert strings[0] is strings[0]
+        finally:
+            strings.close()
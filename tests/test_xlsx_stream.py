@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+import json
+import zipfile
+import zlib
+from io import BytesIO
+from openpyxl import load_workbook
+
+from tools.writeExcel import WriteExcelTool
+from tools.xlsx_reader import XlsxReader, read_sheet_records
+from tools.xlsx_stream import (
+    XlsxStreamWriter, _deflate_chunk, crc32_combine, column_letter, column_index, parse_cell_key, plan_sheets,
+    resolve_workers, shared_string_columns, sheet_names, write_deflated_member
+)
+
+
+class TestXlsxStreamHelpers:
+    """流式写入辅助函数测试"""
+
+    @pytest.mark.unit
+    def test_column_letter_round_trip(self):
+        """测试列字母与列号互相转换"""
+        for idx in (1, 26, 27, 52, 703, 16384):
+            assert column_index(column_letter(idx)) == idx
+        assert column_letter(28) == "AB"
+
+    @pytest.mark.unit
+    def test_parse_cell_key(self):
+        """测试单元格键解析，支持字母和数字列索引"""
+        assert parse_cell_key("2,B") == (2, 2)
+        assert parse_cell_key("2,2") == (2, 2)
+        assert parse_cell_key("invalid") is None
+
+    @pytest.mark.unit
+    def test_crc32_combine(self):
+        """测试分段 CRC32 合并结果与整体计算一致"""
+        part1, part2 = b"hello " * 1000, "世界".encode("utf-8") * 777
+        combined = crc32_combine(zlib.crc32(part1), zlib.crc32(part2), len(part2))
+        assert combined == zlib.crc32(part1 + part2)
+
+    @pytest.mark.unit
+    def test_deflated_member_zip64(self):
+        """测试流式写入的成员始终带 zip64 扩展，超过 4 GiB 时也能写出正确的大小"""
+        compressed, crc, _ = _deflate_chunk(b"<sheetData/>", 6)
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            # 只检查文件头和目录中的大小，原始长度不必与数据一致
+            write_deflated_member(zf, "big.xml", [(compressed, crc, zipfile.ZIP64_LIMIT + 1)])
+            write_deflated_member(zf, "small.xml", [_deflate_chunk(b"<sheetData/>", 6)])
+        with zipfile.ZipFile(buffer) as zf:
+            assert zf.getinfo("big.xml").file_size == zipfile.ZIP64_LIMIT + 1
+            assert zf.read("small.xml") == b"<sheetData/>"
+
+    @pytest.mark.unit
+    def test_resolve_workers(self):
+        """测试并行进程数解析"""
+        assert resolve_workers(None) == 1
+        assert resolve_workers(4) == 4
+        assert resolve_workers("auto") >= 1
+
+
+class TestXlsxStreamWriter:
+    """流式写入器测试"""
+
+    def _write(self, columns, rows, format_config=None, workers=1):
+        buffer = BytesIO()
+        XlsxStreamWriter(format_config or {}, workers=workers).write(buffer, columns, rows)
+        return buffer
+
+    @pytest.mark.unit
+    def test_values_and_types(self):
+        """测试各类值的写入"""
+        buffer = self._write(["文本", "整数", "小数", "布尔", "空"], [["a<&>b", 1, 1.5, True, None]])
+        assert zipfile.ZipFile(buffer).testzip() is None
+        ws = load_workbook(buffer).active
+        assert [c.value for c in ws[1]] == ["文本", "整数", "小数", "布尔", "空"]
+        assert [c.value for c in ws[2]][:4] == ["a<&>b", 1, 1.5, True]
+        assert ws.cell(row=2, column=5).value is None
+
+    @pytest.mark.unit
+    def test_format_config_parity(self):
+        """测试格式配置与 openpyxl 路径语义一致"""
+        format_config = {
+            "start_row": 2,
+            "cells": {
+                "2,A": {"font": {"bold": True, "size": 14}, "background_color": "FFFF00"},
+                "3,2": {"alignment": {"horizontal": "center", "wrap_text": True}, "border": {"left": "thick"}}
+            },
+            "column_widths": {"A": 15, "2": 10},
+            "row_heights": {"1": 30, "3": 20},
+            "merge_cells": ["A5:B5", {"start": "C2", "end": "C3"}]
+        }
+        buffer = self._write(["姓名", "年龄", "部门"], [["张三", 25, "技术部"]], format_config)
+        ws = load_workbook(buffer).active
+
+        assert ws.cell(row=1, column=1).value is None
+        assert ws.cell(row=2, column=1).value == "姓名"
+        assert ws.cell(row=3, column=1).value == "张三"
+        assert ws["A2"].font.bold is True
+        assert ws["A2"].font.size == 14
+        assert ws["A2"].fill.start_color.rgb[2:] == "FFFF00"
+        assert ws["B3"].alignment.horizontal == "center"
+        assert ws["B3"].alignment.wrap_text is True
+        assert ws["B3"].border.left.style == "thick"
+        assert ws["B3"].border.right.style == "thin"
+        assert ws.column_dimensions["A"].width == 15
+        assert ws.column_dimensions["B"].width == 10
+        assert ws.row_dimensions[1].height == 30
+        assert ws.row_dimensions[3].height == 20
+        assert {str(r) for r in ws.merged_cells.ranges} == {"A5:B5", "C2:C3"}
+
+    @pytest.mark.unit
+    def test_show_header_false(self):
+        """测试不显示标题行"""
+        buffer = self._write(["a", "b"], [[1, 2], [3, 4]], {"show_header": False})
+        ws = load_workbook(buffer).active
+        assert [[c.value for c in row] for row in ws.iter_rows()] == [[1, 2], [3, 4]]
+
+    @pytest.mark.unit
+    def test_invalid_merge_is_skipped(self):
+        """测试无效的合并范围被跳过而不是导致失败"""
+        buffer = self._write(["a"], [[1]], {"merge_cells": ["not a range", "A1:B1"]})
+        ws = load_workbook(buffer).active
+        assert [str(r) for r in ws.merged_cells.ranges] == ["A1:B1"]
+
+    @pytest.mark.unit
+    def test_shared_strings(self):
+        """测试低基数文本列写入共享字符串表，每个不同值只存储一次，高基数列保持内联字符串"""
+        rows = [[f"员工{i}", ["技术部", "市场部"][i % 2], " 在职 "] for i in range(20)]
+        buffer = self._write(["姓名", "部门", "状态"], rows, {"cells": {"2,2": {"font": {"bold": True}}}})
+        with zipfile.ZipFile(buffer) as zf:
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+            sst = zf.read("xl/sharedStrings.xml").decode("utf-8")
+        assert sst.count("<si>") == 5
+        assert sst.count("技术部") == 1
+        assert '<t xml:space="preserve"> 在职 </t>' in sst
+        assert '<c r="A2" t="inlineStr">' in sheet
+        assert '<c r="B2" s="1" t="s">' in sheet
+        ws = load_workbook(buffer).active
+        assert [c.value for c in ws[3]] == ["员工1", "市场部", " 在职 "]
+        assert ws["B2"].font.bold is True
+        with XlsxReader(buffer) as reader:
+            assert read_sheet_records(reader)[1][-1] == ["员工19", "市场部", " 在职 "]
+
+    @pytest.mark.unit
+    def test_shared_strings_option(self):
+        """测试 shared_strings 为 false 时全部内联，为 true 时所有文本共享"""
+        rows = [[f"员工{i}", "技术部"] for i in range(10)]
+        with zipfile.ZipFile(self._write(["姓名", "部门"], rows, {"shared_strings": False})) as zf:
+            assert "xl/sharedStrings.xml" not in zf.namelist()
+            assert b"sharedStrings" not in zf.read("[Content_Types].xml")
+        with zipfile.ZipFile(self._write(["姓名", "部门"], rows, {"shared_strings": True})) as zf:
+            assert b"inlineStr" not in zf.read("xl/worksheets/sheet1.xml")
+            assert zf.read("xl/sharedStrings.xml").count(b"<si>") == 13
+        assert shared_string_columns([["a", 1, f"x{i}"] for i in range(10)], 3) == {1}
+        with pytest.raises(ValueError):
+            shared_string_columns([], 1, "sometimes")
+
+    @pytest.mark.unit
+    def test_plan_sheets(self):
+        """测试按行数上限预先拆分：第一个工作表从 start_row 开始，续表从第 1 行开始并重复表头"""
+        assert plan_sheets(3, max_rows=4) == [(1, 0, 3)]
+        assert plan_sheets(10, max_rows=4) == [(1, 0, 3), (1, 3, 6), (1, 6, 9), (1, 9, 10)]
+        assert plan_sheets(5, start_row=3, max_rows=4) == [(3, 0, 1), (1, 1, 4), (1, 4, 5)]
+        assert plan_sheets(8, show_header=False, max_rows=4) == [(1, 0, 4), (1, 4, 8)]
+        assert plan_sheets(0) == [(1, 0, 0)]
+        with pytest.raises(ValueError):
+            plan_sheets(1, start_row=4, max_rows=4)
+        assert sheet_names("销售:明细", 2) == ["销售_明细", "销售_明细_2"]
+        assert sheet_names("x" * 40, 2) == ["x" * 31, "x" * 29 + "_2"]
+        assert sheet_names(None, 1) == ["Sheet"]
+
+    @pytest.mark.unit
+    def test_split_sheets(self):
+        """测试超出行数上限时拆分为续表，重复表头、列格式、列宽、条件格式和表格"""
+        format_config = {
+            "sheet_name": "Data", "table": True, "column_widths": {"A": 20},
+            "column_formats": {"v": {"type": "currency"}},
+            "conditional_formats": [{"range": "B", "type": "cell", "operator": ">", "value": 5,
+                                     "format": {"font": {"bold": True}}}],
+            "cells": {"2,1": {"font": {"bold": True}}},
+        }
+        buffer = BytesIO()
+        XlsxStreamWriter(format_config, max_rows=4).write(buffer, ["name", "v"], [[f"n{i}", i] for i in range(7)])
+        wb = load_workbook(buffer)
+        assert wb.sheetnames == ["Data", "Data_2", "Data_3"]
+        assert [list(row) for row in wb["Data_3"].iter_rows(values_only=True)] == [["name", "v"], ["n6", 6]]
+        for idx, ws in enumerate(wb, 1):
+            assert ws["A1"].value == "name"
+            assert ws["B2"].number_format == '"¥"#,##0.00'
+            assert ws.column_dimensions["A"].width == 20
+            assert list(ws.tables) == ["Table1" if idx == 1 else f"Table1_{idx}"]
+            assert len(ws.conditional_formatting) == 1
+        # 按位置指定的单元格格式只作用于第一个工作表
+        assert wb["Data"]["A2"].font.b and not wb["Data_2"]["A2"].font.b
+
+    @pytest.mark.slow
+    def test_parallel_output_matches_serial(self, monkeypatch):
+        """测试多进程并行生成的工作表与单进程完全一致"""
+        monkeypatch.setattr("tools.xlsx_stream.MIN_ROWS_PER_CHUNK", 100)
+        columns = ["id", "name", "value"]
+        rows = [[i, f"名称{i}", i * 0.5, f"类别{i % 7}"] for i in range(1000)]
+        columns.append("category")
+        format_config = {"cells": {"500,2": {"font": {"bold": True}}}, "row_heights": {"700": 25}}
+
+        serial = self._write(columns, rows, format_config, workers=1)
+        parallel = self._write(columns, rows, format_config, workers=3)
+
+        serial_zip, parallel_zip = zipfile.ZipFile(serial), zipfile.ZipFile(parallel)
+        assert parallel_zip.testzip() is None
+        sheet = "xl/worksheets/sheet1.xml"
+        assert serial_zip.read(sheet) == parallel_zip.read(sheet)
+        assert serial_zip.read("xl/sharedStrings.xml") == parallel_zip.read("xl/sharedStrings.xml")
+
+        ws = load_workbook(parallel, read_only=True).active
+        values = list(ws.iter_rows(values_only=True))
+        assert len(values) == 1001
+        assert values[-1] == (999, "名称999", 499.5, "类别5")
+
+
+class TestWriteExcelStreamEngine:
+    """WriteExcelTool 流式引擎集成测试"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_runtime, mock_session):
+        """设置测试环境"""
+        self.tool = WriteExcelTool(mock_runtime, mock_session)
+
+    @pytest.mark.integration
+    def test_stream_engine_matches_openpyxl_values(self, simple_data):
+        """测试流式引擎与 openpyxl 引擎写出的数据一致"""
+        openpyxl_bytes, _ = self.tool.generate_excel_bytes(json.dumps(simple_data))
+        stream_bytes, filename = self.tool.generate_excel_bytes(
+            json.dumps({"data": simple_data, "format": {"engine": "stream"}}))
+        assert filename == "Formatted_Data.xlsx"
+
+        expected = list(load_workbook(BytesIO(openpyxl_bytes)).active.iter_rows(values_only=True))
+        actual = list(load_workbook(BytesIO(stream_bytes)).active.iter_rows(values_only=True))
+        assert actual == expected
+
+    @pytest.mark.integration
+    def test_cell_formats_match_openpyxl(self, simple_data, style_snapshot):
+        """测试两个引擎对 format.cells 的处理一致：字母列索引、数据区之外的单元格、同一单元格的重复键"""
+        format_config = {
+            "start_row": 2,
+            "column_formats": {"年龄": {"number_format": "0.00"}},
+            "cells": {
+                "2,A": {"font": {"bold": True, "size": 14}},
+                "1,1": {"background_color": "FFFF00"},
+                "9,9": {"font": {"bold": True}, "border": {"left": "thick"}},
+                "3,b": {"alignment": {"horizontal": "center", "wrap_text": True}},
+                "4,3": {"font": {"italic": True, "color": "FF0000"}},
+                "4,C": {"background_color": "00FF00"},
+                "0,1": {"font": {"bold": True}},
+                "3,2,1": {"font": {"bold": True}},
+                "5,1": "bold"
+            }
+        }
+        snapshots = []
+        for engine in ("openpyxl", "stream"):
+            excel_bytes, _ = self.tool.generate_excel_bytes(
+                json.dumps({"data": simple_data, "format": dict(format_config, engine=engine)}))
+            snapshots.append(style_snapshot(load_workbook(BytesIO(excel_bytes)).active))
+        openpyxl_cells, stream_cells = snapshots
+        assert stream_cells == openpyxl_cells
+        assert openpyxl_cells["A2"][1][0] is True
+        assert openpyxl_cells["A1"][2] == ("solid", "00FFFF00")
+        assert openpyxl_cells["I9"][3][0] == "thick"
+        assert openpyxl_cells["B3"][5] == "0.00"
+        # 后出现的键覆盖同一单元格的前一个键
+        assert openpyxl_cells["C4"][1][1] is not True and openpyxl_cells["C4"][2][0] == "solid"
+
+    @pytest.mark.integration
+    def test_workers_selects_stream_engine(self, simple_data):
+        """测试指定 workers 时默认使用流式引擎"""
+        excel_bytes, _ = self.tool.generate_excel_bytes(
+            json.dumps({"data": simple_data, "format": {"workers": 2}}))
+        names = zipfile.ZipFile(BytesIO(excel_bytes)).namelist()
+        # openpyxl 会写出主题部件，流式引擎不会
+        assert "xl/theme/theme1.xml" not in names
+        ws = load_workbook(BytesIO(excel_bytes)).active
+        assert ws.cell(row=3, column=1).value == "李四"
@@ -0,0 +1,169 @@
+"""
+列级数据类型与数字格式
+
+format.column_formats 按列声明数据类型和数字格式，每列只声明一次，不需要逐个单元格配置：
+
+    "column_formats": {
+        "入职日期": {"type": "date"},
+        "C": {"type": "currency", "number_format": "\"$\"#,##0.00"},
+        "4": {"number_format": "0.0%"}
+    }
+
+列可以用表头名称、列字母或从 1 开始的列号指定。type 决定值的转换规则和默认数字格式，
+number_format 可单独使用，也可以覆盖类型的默认格式。无法转换的值保持原样写入；integer 列中
+带小数的数字保留原值，只按整数格式显示。
+
+format.table 把数据区（含表头）注册为 Excel 表格（ListObject），带筛选按钮和镶边样式：
+
+    "table": true
+    "table": {"name": "Sales", "style": "TableStyleMedium2", "show_row_stripes": true}
+
+本模块只依赖标准库。
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+
+# 类型 -> 默认数字格式
+DEFAULT_NUMBER_FORMATS = {
+    "date": "yyyy-mm-dd",
+    "datetime": "yyyy-mm-dd hh:mm:ss",
+    "currency": '"¥"#,##0.00',
+    "percent": "0.00%",
+    "integer": "0",
+    "number": "#,##0.00",
+    "text": "@",
+}
+
+# Excel 内置数字格式编号，其余格式注册为 164 起的自定义格式
+BUILTIN_NUMBER_FORMATS = {
+    "General": 0, "0": 1, "0.00": 2, "#,##0": 3, "#,##0.00": 4, "0%": 9, "0.00%": 10,
+    "0.00E+00": 11, "mm-dd-yy": 14, "d-mmm-yy": 15, "d-mmm": 16, "mmm-yy": 17,
+    "h:mm AM/PM": 18, "h:mm:ss AM/PM": 19, "h:mm": 20, "h:mm:ss": 21, "m/d/yy h:mm": 22,
+    "@": 49,
+}
+FIRST_CUSTOM_NUMBER_FORMAT_ID = 164
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+_NUMBER_CLEAN_RE = re.compile(r"[,\s¥$€£￥]")
+_COLUMN_LETTERS_RE = re.compile(r"^[A-Za-z]{1,3}$")
+_TABLE_NAME_INVALID_RE = re.compile(r"[^\w.]")
+
+DEFAULT_TABLE_NAME = "Table1"
+DEFAULT_TABLE_STYLE = "TableStyleMedium9"
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        text = _NUMBER_CLEAN_RE.sub("", value)
+        percent = text.endswith("%")
+        try:
+            number = float(text[:-1] if percent else text)
+        except ValueError:
+            return None
+        return number / 100 if percent else number
+    return None
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        text = value.strip().replace("/", "-")
+        if text.endswith("Z"):
+            text = text[:-1]
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+        return parsed.replace(tzinfo=None)
+    return None
+
+
+def convert_value(value, dtype):
+    """按声明的类型转换单个值，无法转换时原样返回"""
+    if value is None or dtype is None or (isinstance(value, float) and value != value):
+        return value
+    if dtype in ("date", "datetime"):
+        parsed = _to_datetime(value)
+        if parsed is None:
+            return value
+        return parsed.date() if dtype == "date" and parsed.time() == time(0) else parsed
+    if dtype == "text":
+        return value if isinstance(value, str) else str(value)
+    number = _to_number(value)
+    if number is None:
+        return value
+    if dtype == "integer":
+        # 带小数的值不取整，保留原值，由整数数字格式控制显示，避免悄悄改变数据
+        return int(number) if float(number).is_integer() else number
+    return number
+
+
+def to_excel_serial(value):
+    """把 date/datetime 转换为 Excel 序列日期，其他值原样返回"""
+    if isinstance(value, datetime):
+        delta = value - EXCEL_EPOCH
+    elif isinstance(value, date):
+        delta = datetime(value.year, value.month, value.day) - EXCEL_EPOCH
+    else:
+        return value
+    serial = delta / timedelta(days=1)
+    # Excel 把 1900 年当作闰年，1900-03-01 之前的日期序号少 1
+    if 1 <= serial < 61:
+        serial -= 1
+    return serial
+
+
+def resolve_column_formats(column_formats, columns, column_index):
+    """
+    把 column_formats 的键解析为列号
+
+    :param columns: 表头名称列表
+    :param column_index: 列字母转列号的函数
+    :return: {列号: (类型, 数字格式)}，两者都可能为 None
+    """
+    resolved = {}
+    header_index = {str(name): idx for idx, name in enumerate(columns, 1)}
+    for key, spec in (column_formats or {}).items():
+        if not isinstance(spec, dict):
+            continue
+        key_text = str(key).strip()
+        if key_text in header_index:
+            col_idx = header_index[key_text]
+        elif _COLUMN_LETTERS_RE.match(key_text):
+            col_idx = column_index(key_text)
+        elif key_text.isdigit():
+            col_idx = int(key_text)
+        else:
+            continue
+        dtype = spec.get("type")
+        if dtype not in DEFAULT_NUMBER_FORMATS:
+            dtype = None
+        number_format = spec.get("number_format") or DEFAULT_NUMBER_FORMATS.get(dtype)
+        if dtype or number_format:
+            resolved[col_idx] = (dtype, number_format)
+    return resolved
+
+
+def table_options(value):
+    """解析 format.table：true 使用默认参数，对象可指定 name、style、show_row_stripes、show_column_stripes"""
+    if not value:
+        return None
+    options = value if isinstance(value, dict) else {}
+    # 表格名称只能包含字母、数字、下划线和点，且不能以数字开头
+    name = _TABLE_NAME_INVALID_RE.sub("_", str(options.get("name") or DEFAULT_TABLE_NAME))
+    if name[0].isdigit():
+        name = f"_{name}"
+    return {
+        "name": name,
+        "style": options.get("style", DEFAULT_TABLE_STYLE),
+        "show_row_stripes": bool(options.get("show_row_stripes", True)),
+        "show_column_stripes": bool(options.get("show_column_stripes", False)),
+    }
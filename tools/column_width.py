@@ -0,0 +1,108 @@
+"""
+自动列宽
+
+按列计算内容的显示宽度：东亚宽字符（中日韩文字、全角符号）计 2，其余字符计 1，多行文本
+取最长的一行；再按字号换算为 Excel 列宽。
+
+每列只在去重后的值上计算，并按字符数从长到短检查：一个字符串的显示宽度不会超过字符数的
+两倍，当剩余字符串的两倍长度也不超过当前最大宽度时即可提前结束，大多数值只需要一次 len()。
+
+本模块只依赖标准库。
+"""
+
+import unicodedata
+
+DEFAULT_FONT_SIZE = 11
+DEFAULT_MIN_WIDTH = 8
+DEFAULT_MAX_WIDTH = 100
+DEFAULT_PADDING = 2
+
+
+def display_width(text):
+    """字符串的显示宽度，多行文本取最长的一行"""
+    if "\n" in text:
+        return max(display_width(line) for line in text.split("\n"))
+    if text.isascii():
+        return len(text)
+    return sum(2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1 for ch in text)
+
+
+def _cell_text(value):
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        if value != value:
+            return ""
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else str(value)
+    return value if isinstance(value, str) else str(value)
+
+
+def max_display_width(values):
+    """一列值中最大的显示宽度，None 和 NaN 忽略"""
+    texts = {_cell_text(value) for value in values if value is not None}
+    best = 0
+    for text in sorted(texts, key=len, reverse=True):
+        if len(text) * 2 <= best:
+            break
+        if len(text) <= best and text.isascii():
+            continue
+        best = max(best, display_width(text))
+    return best
+
+
+def auto_width_options(value):
+    """解析 format.auto_width：true 使用默认参数，对象可指定 font_size、min_width、max_width、padding"""
+    if not value:
+        return None
+    options = value if isinstance(value, dict) else {}
+    return {
+        "font_size": options.get("font_size", DEFAULT_FONT_SIZE),
+        "min_width": options.get("min_width", DEFAULT_MIN_WIDTH),
+        "max_width": options.get("max_width", DEFAULT_MAX_WIDTH),
+        "padding": options.get("padding", DEFAULT_PADDING),
+    }
+
+
+def sized_cell_values(cells, parse_key, value_at):
+    """
+    找出 format.cells 中设置了字号的单元格，返回 {列号: [(值, 字号), ...]}
+
+    :param parse_key: 把单元格键解析为 (行号, 列号)，无法解析时返回 None
+    :param value_at: 按 (行号, 列号) 取单元格的值，数据区之外返回 None
+    """
+    sized = {}
+    for key, cell_format in (cells or {}).items():
+        font = cell_format.get("font") if isinstance(cell_format, dict) else None
+        pos = parse_key(key) if isinstance(font, dict) and "size" in font else None
+        if pos is None:
+            continue
+        try:
+            size = float(font["size"])
+        except (TypeError, ValueError):
+            continue
+        sized.setdefault(pos[1], []).append((value_at(*pos), size))
+    return sized
+
+
+def compute_column_widths(columns, column_values, options, sized_values=None):
+    """
+    计算各列的列宽
+
+    :param columns: 表头（不写表头时传空列表）
+    :param column_values: 每列的值序列，按列顺序排列
+    :param options: auto_width_options 的返回值
+    :param sized_values: sized_cell_values 的返回值，单独设置了字号的单元格按各自字号换算
+    :return: {列号(从 1 开始): 列宽}
+    """
+    widths = {}
+    sized_values = sized_values or {}
+    base_size = options["font_size"]
+    for col_idx, values in enumerate(column_values, 1):
+        header = columns[col_idx - 1] if col_idx <= len(columns) else None
+        chars = max(max_display_width(values), max_display_width([header])) * base_size
+        for value, size in sized_values.get(col_idx, ()):
+            if value is not None:
+                chars = max(chars, max_display_width([value]) * size)
+        width = chars / DEFAULT_FONT_SIZE + options["padding"]
+        widths[col_idx] = round(min(max(width, options["min_width"]), options["max_width"]), 2)
+    return widths
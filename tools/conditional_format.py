@@ -0,0 +1,130 @@
+"""
+条件格式
+
+format.conditional_formats 按区域声明规则，由 Excel 在打开文件时计算，生成时只写入与规则数量相关的
+内容，不再需要调用方自己找出满足条件的单元格并逐个列在 format.cells 中：
+
+    "conditional_formats": [
+        {"range": "D", "type": "cell", "operator": ">", "value": 8000,
+         "format": {"font": {"color": "CC0000", "bold": true}, "background_color": "FFE6E6"}},
+        {"range": "B2:B100", "type": "color_scale", "colors": ["F8696B", "63BE7B"]},
+        {"range": "C", "type": "data_bar", "color": "638EC6"},
+        {"range": "A2:D100", "type": "formula", "formula": "$D2>8000", "format": {...}}
+    ]
+
+range 可以是 "A2:D100" 形式的区域（多个区域用空格分隔），也可以是 "D"、"B:D" 形式的整列，
+整列只覆盖数据行（不含标题行）。无效的规则会打印警告并跳过。
+
+本模块只依赖标准库，把规则解析为两种引擎共用的规范形式。
+"""
+
+import re
+
+# 比较运算符：别名 -> Excel/openpyxl 的运算符名称
+OPERATORS = {
+    ">": "greaterThan", ">=": "greaterThanOrEqual", "<": "lessThan", "<=": "lessThanOrEqual",
+    "=": "equal", "==": "equal", "!=": "notEqual", "<>": "notEqual",
+    "between": "between", "not_between": "notBetween",
+}
+OPERATORS.update({name: name for name in list(OPERATORS.values())})
+
+DEFAULT_SCALE_COLORS = ["F8696B", "FFEB84", "63BE7B"]
+DEFAULT_BAR_COLOR = "638EC6"
+
+_AREA_RE = re.compile(r"^\$?([A-Za-z]{1,3})\$?(\d+)(?::\$?([A-Za-z]{1,3})\$?(\d+))?$")
+_COLUMNS_RE = re.compile(r"^([A-Za-z]{1,3})(?::([A-Za-z]{1,3}))?$")
+
+
+def formula_value(value):
+    """把比较值转换为公式文本：数字原样，"=" 开头的字符串视为公式，其余字符串加引号"""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    text = str(value)
+    if text.startswith("="):
+        return text[1:]
+    return '"' + text.replace('"', '""') + '"'
+
+
+def resolve_range(range_text, first_row, last_row):
+    """把 range 配置解析为 sqref，整列展开为数据行区域；无法解析或区域为空时返回 None"""
+    if not isinstance(range_text, str) or not range_text.strip():
+        return None
+    refs = []
+    for part in range_text.split():
+        columns = _COLUMNS_RE.match(part)
+        if columns:
+            if last_row < first_row:
+                return None
+            start, end = columns.group(1).upper(), (columns.group(2) or columns.group(1)).upper()
+            refs.append(f"{start}{first_row}:{end}{last_row}")
+            continue
+        area = _AREA_RE.match(part)
+        if not area:
+            return None
+        ref = f"{area.group(1).upper()}{area.group(2)}"
+        if area.group(3):
+            ref += f":{area.group(3).upper()}{area.group(4)}"
+        refs.append(ref)
+    return " ".join(refs)
+
+
+def _parse_rule(config, first_row, last_row):
+    """返回 (规范化的规则, 错误原因)"""
+    if not isinstance(config, dict):
+        return None, "rule must be an object"
+    ref = resolve_range(config.get("range"), first_row, last_row)
+    if ref is None:
+        return None, f"invalid range {config.get('range')!r}"
+    rule_type = config.get("type", "cell")
+    rule = {"ref": ref, "type": rule_type, "stop": bool(config.get("stop", False))}
+    if rule_type in ("cell", "formula"):
+        cell_format = config.get("format")
+        if not isinstance(cell_format, dict) or not cell_format:
+            return None, "missing format"
+        rule["format"] = cell_format
+    if rule_type == "cell":
+        operator = OPERATORS.get(config.get("operator", ">"))
+        if operator is None:
+            return None, f"unknown operator {config.get('operator')!r}"
+        values = config.get("value")
+        values = values if isinstance(values, list) else [values]
+        expected = 2 if operator in ("between", "notBetween") else 1
+        if len(values) != expected or any(value is None for value in values):
+            return None, f"operator {operator} expects {expected} value(s)"
+        rule["operator"] = operator
+        rule["formulas"] = [formula_value(value) for value in values]
+    elif rule_type == "formula":
+        formula = config.get("formula")
+        if not isinstance(formula, str) or not formula.strip():
+            return None, "missing formula"
+        rule["formulas"] = [formula[1:] if formula.startswith("=") else formula]
+    elif rule_type == "color_scale":
+        colors = config.get("colors") or DEFAULT_SCALE_COLORS
+        if not isinstance(colors, list) or len(colors) not in (2, 3):
+            return None, "color_scale expects 2 or 3 colors"
+        rule["colors"] = [str(color) for color in colors]
+    elif rule_type == "data_bar":
+        rule["color"] = str(config.get("color", DEFAULT_BAR_COLOR))
+    else:
+        return None, f"unknown type {rule_type!r}"
+    return rule, None
+
+
+def parse_conditional_formats(configs, first_row, last_row):
+    """
+    解析 format.conditional_formats
+
+    :param first_row: 数据区第一行（整列区域的起始行）
+    :param last_row: 数据区最后一行
+    :return: 规范化的规则列表，按配置顺序排列（即优先级从高到低）
+    """
+    rules = []
+    for idx, config in enumerate(configs or []):
+        rule, reason = _parse_rule(config, first_row, last_row)
+        if rule is None:
+            print(f"Warning: Skipped conditional format #{idx + 1}: {reason}")
+            continue
+        rules.append(rule)
+    return rules
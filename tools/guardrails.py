@@ -0,0 +1,160 @@
+"""
+输入规模检查与引擎选择
+
+在解析和生成之前按输入规模预估开销：超出上限的请求直接以明确的错误拒绝，而不是在
+json.loads 或内存工作簿中耗尽插件 256 MB 的内存配额后被强制结束；其余请求按规模选择
+开销最小的引擎：
+
+- writeExcel：小表格使用 openpyxl 内存工作簿，单元格数、样式条目数或 JSON 长度超过阈值时
+  自动切换到 stream 引擎；format.engine 显式指定时按指定的引擎执行。行数超出单个工作表的上限时
+  只有 stream 引擎能拆分为多个工作表，此时总是使用 stream 引擎。两个引擎对同一 format 写出相同的
+  格式，自动切换只影响耗时，不影响结果
+- readExcel：xlsx 使用流式读取器，旧版 xls 只能由 pandas 整体加载，因此上限更低
+
+阈值通过环境变量调整：
+    EXCEL_TOOL_MAX_PAYLOAD_BYTES     json_str 或上传数据文件的最大字节数，默认 64 MB
+    EXCEL_TOOL_MAX_CELLS             单次生成的最大单元格数（行数 × 列数），默认 20,000,000
+    EXCEL_TOOL_MAX_STYLED_CELLS      format.cells 的最大条目数，默认 500,000
+    EXCEL_TOOL_MAX_READ_BYTES        读取或更新的 Excel 文件的最大字节数，默认 100 MB
+    EXCEL_TOOL_MAX_SHEET_BYTES       解压后工作表 XML 的最大字节数，默认 1 GB
+    EXCEL_TOOL_MAX_XLS_BYTES         旧版 xls 文件的最大字节数，默认 20 MB
+    EXCEL_TOOL_STREAM_CELLS          超过该单元格数时自动使用 stream 引擎，默认 100,000
+    EXCEL_TOOL_STREAM_STYLED_CELLS   format.cells 超过该条目数时自动使用 stream 引擎，默认 20,000
+    EXCEL_TOOL_STREAM_PAYLOAD_BYTES  json_str 超过该字节数时自动使用 stream 引擎，默认 8 MB
+
+本模块只依赖标准库。
+"""
+
+import os
+
+from tools.xlsx_stream import EXCEL_MAX_ROWS
+
+MAX_PAYLOAD_BYTES = int(os.environ.get("EXCEL_TOOL_MAX_PAYLOAD_BYTES", 64 * 1024 * 1024))
+MAX_CELLS = int(os.environ.get("EXCEL_TOOL_MAX_CELLS", 20_000_000))
+MAX_STYLED_CELLS = int(os.environ.get("EXCEL_TOOL_MAX_STYLED_CELLS", 500_000))
+MAX_READ_BYTES = int(os.environ.get("EXCEL_TOOL_MAX_READ_BYTES", 100 * 1024 * 1024))
+MAX_SHEET_BYTES = int(os.environ.get("EXCEL_TOOL_MAX_SHEET_BYTES", 1024 * 1024 * 1024))
+MAX_XLS_BYTES = int(os.environ.get("EXCEL_TOOL_MAX_XLS_BYTES", 20 * 1024 * 1024))
+STREAM_CELLS = int(os.environ.get("EXCEL_TOOL_STREAM_CELLS", 100_000))
+STREAM_STYLED_CELLS = int(os.environ.get("EXCEL_TOOL_STREAM_STYLED_CELLS", 20_000))
+STREAM_PAYLOAD_BYTES = int(os.environ.get("EXCEL_TOOL_STREAM_PAYLOAD_BYTES", 8 * 1024 * 1024))
+
+# 统计列数时检查的记录数，记录通常结构一致，不必遍历全部
+COLUMN_SAMPLE_SIZE = 100
+
+
+class InputTooLargeError(Exception):
+    """输入超出配置的上限"""
+
+
+class Limits:
+    """决策阈值，默认值来自环境变量"""
+
+    def __init__(self, max_payload_bytes=None, max_cells=None, max_styled_cells=None, max_read_bytes=None,
+                 max_sheet_bytes=None, max_xls_bytes=None, stream_cells=None, stream_styled_cells=None,
+                 stream_payload_bytes=None):
+        def pick(value, default):
+            return default if value is None else value
+
+        self.max_payload_bytes = pick(max_payload_bytes, MAX_PAYLOAD_BYTES)
+        self.max_cells = pick(max_cells, MAX_CELLS)
+        self.max_styled_cells = pick(max_styled_cells, MAX_STYLED_CELLS)
+        self.max_read_bytes = pick(max_read_bytes, MAX_READ_BYTES)
+        self.max_sheet_bytes = pick(max_sheet_bytes, MAX_SHEET_BYTES)
+        self.max_xls_bytes = pick(max_xls_bytes, MAX_XLS_BYTES)
+        self.stream_cells = pick(stream_cells, STREAM_CELLS)
+        self.stream_styled_cells = pick(stream_styled_cells, STREAM_STYLED_CELLS)
+        self.stream_payload_bytes = pick(stream_payload_bytes, STREAM_PAYLOAD_BYTES)
+
+
+DEFAULT_LIMITS = Limits()
+
+
+def _check(value, limit, what, setting):
+    if value is not None and value > limit:
+        raise InputTooLargeError(f"Input too large: {what} {value:,} exceeds the limit of {limit:,} ({setting})")
+
+
+def check_payload(size, limits=DEFAULT_LIMITS):
+    """在解析之前检查 json_str（UTF-8 编码后的字节数）或上传数据文件的大小"""
+    _check(size, limits.max_payload_bytes, "payload size", "EXCEL_TOOL_MAX_PAYLOAD_BYTES")
+
+
+def table_shape(df_data):
+    """估算数据的 (行数, 列数)：列数取前若干条记录的键（或数组元素）数量"""
+    records = [df_data] if isinstance(df_data, dict) else df_data
+    if not isinstance(records, list):
+        return 0, 0
+    columns = set()
+    width = 0
+    for record in records[:COLUMN_SAMPLE_SIZE]:
+        if isinstance(record, dict):
+            columns.update(record)
+        elif isinstance(record, (list, tuple)):
+            width = max(width, len(record))
+    return len(records), max(len(columns), width)
+
+
+class WritePlan:
+    """writeExcel 的规模估算和选定的引擎"""
+
+    __slots__ = ("engine", "rows", "columns", "styled_cells", "payload_bytes", "reason")
+
+    def __init__(self, engine, rows, columns, styled_cells, payload_bytes, reason):
+        self.engine = engine
+        self.rows = rows
+        self.columns = columns
+        self.styled_cells = styled_cells
+        self.payload_bytes = payload_bytes
+        self.reason = reason
+
+    @property
+    def cells(self):
+        return self.rows * self.columns
+
+
+def plan_write(payload_bytes, rows, columns, format_config, workers=1, limits=DEFAULT_LIMITS):
+    """
+    检查生成规模并选择引擎，超出上限时抛出 InputTooLargeError
+
+    :param workers: 解析后的并行进程数，大于 1 时只能使用 stream 引擎
+    """
+    styled_cells = len(format_config.get('cells') or {})
+    _check(rows * columns, limits.max_cells, "cell count", "EXCEL_TOOL_MAX_CELLS")
+    _check(styled_cells, limits.max_styled_cells, "styled cell count", "EXCEL_TOOL_MAX_STYLED_CELLS")
+
+    engine = format_config.get('engine')
+    sheet_rows = rows + (1 if format_config.get('show_header', True) else 0) + format_config.get('start_row', 1) - 1
+    if sheet_rows > EXCEL_MAX_ROWS:
+        engine, reason = 'stream', "row limit"
+    elif engine in ('openpyxl', 'stream'):
+        reason = "requested"
+    elif workers > 1:
+        engine, reason = 'stream', "parallel workers"
+    elif rows * columns > limits.stream_cells:
+        engine, reason = 'stream', "cell count"
+    elif styled_cells > limits.stream_styled_cells:
+        engine, reason = 'stream', "styled cell count"
+    elif payload_bytes > limits.stream_payload_bytes:
+        engine, reason = 'stream', "payload size"
+    else:
+        engine, reason = 'openpyxl', "small input"
+    return WritePlan(engine, rows, columns, styled_cells, payload_bytes, reason)
+
+
+def check_read(file_size, limits=DEFAULT_LIMITS):
+    """在下载之前检查 Excel 文件的大小"""
+    _check(file_size, limits.max_read_bytes, "file size", "EXCEL_TOOL_MAX_READ_BYTES")
+
+
+def plan_read(is_xlsx, file_size=None, sheet_bytes=None, limits=DEFAULT_LIMITS):
+    """
+    选择读取引擎：xlsx 使用流式读取器并检查解压后的工作表大小，其他格式由 pandas 整体加载
+
+    :return: "stream" 或 "pandas"
+    """
+    if is_xlsx:
+        _check(sheet_bytes, limits.max_sheet_bytes, "uncompressed sheet size", "EXCEL_TOOL_MAX_SHEET_BYTES")
+        return "stream"
+    _check(file_size, limits.max_xls_bytes, "xls file size", "EXCEL_TOOL_MAX_XLS_BYTES")
+    return "pandas"
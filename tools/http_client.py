@@ -0,0 +1,222 @@
+"""
+共享的异步 HTTP 客户端
+
+所有下载都通过同一个带连接池（HTTP keep-alive）的 httpx.AsyncClient 完成，客户端运行在
+后台事件循环线程上；同步代码提交协程并等待结果，多个请求的网络 I/O 在事件循环中重叠进行。
+httpx 由 dify_plugin 依赖引入。
+
+对较大的文件，open_remote 返回按需发起 Range 请求的只读文件对象：zipfile 先读取末尾的
+中央目录，之后只下载真正需要的压缩包成员，而不是整个工作簿。
+
+配置通过环境变量调整：
+    EXCEL_TOOL_HTTP_CONNECT_TIMEOUT 连接超时（秒），默认 10
+    EXCEL_TOOL_HTTP_READ_TIMEOUT    读取超时（秒），默认 60
+    EXCEL_TOOL_HTTP_MAX_CONNECTIONS 连接池大小，默认 10
+    EXCEL_TOOL_HTTP_KEEPALIVE       空闲连接保持时间（秒），默认 30
+    EXCEL_TOOL_HTTP_RETRIES         连接失败时的重试次数，默认 2
+    EXCEL_TOOL_RANGE_THRESHOLD      超过该大小（字节）的文件使用 Range 按需读取，默认 4 MB
+    EXCEL_TOOL_RANGE_BLOCK_SIZE     每次 Range 请求的最小字节数，默认 256 KB
+"""
+
+import asyncio
+import io
+import os
+import re
+import threading
+
+import httpx
+
+CONNECT_TIMEOUT = float(os.environ.get("EXCEL_TOOL_HTTP_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = float(os.environ.get("EXCEL_TOOL_HTTP_READ_TIMEOUT", 60))
+MAX_CONNECTIONS = int(os.environ.get("EXCEL_TOOL_HTTP_MAX_CONNECTIONS", 10))
+KEEPALIVE_EXPIRY = float(os.environ.get("EXCEL_TOOL_HTTP_KEEPALIVE", 30))
+RETRIES = int(os.environ.get("EXCEL_TOOL_HTTP_RETRIES", 2))
+RANGE_THRESHOLD = int(os.environ.get("EXCEL_TOOL_RANGE_THRESHOLD", 4 * 1024 * 1024))
+RANGE_BLOCK_SIZE = int(os.environ.get("EXCEL_TOOL_RANGE_BLOCK_SIZE", 256 * 1024))
+
+_CONTENT_RANGE = re.compile(r"bytes\s+\d+-\d+/(\d+)")
+
+
+class _LoopThread:
+    """在后台线程中运行的事件循环"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="excel-tool-http", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout=None):
+        """提交协程并阻塞等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+
+class AsyncHttpClient:
+    """延迟创建的共享客户端，首次使用时启动事件循环线程"""
+
+    def __init__(self):
+        self._loop_thread = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop_thread is None:
+                self._loop_thread = _LoopThread()
+                self._client = self._loop_thread.run(self._create_client())
+        return self._loop_thread
+
+    async def _create_client(self):
+        transport = httpx.AsyncHTTPTransport(
+            retries=RETRIES,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_CONNECTIONS,
+                                keepalive_expiry=KEEPALIVE_EXPIRY),
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            follow_redirects=True,
+        )
+
+    def _run(self, coro):
+        loop_thread = self._ensure_started()
+        return loop_thread.run(coro)
+
+    async def _get(self, url):
+        response = await self._client.get(url)
+        response.raise_for_status()
+        return response.content
+
+    async def _get_range(self, url, start, end):
+        response = await self._client.get(url, headers={"Range": f"bytes={start}-{end}"})
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise Exception(f"Server ignored range request for {url}")
+        return response.content
+
+    async def _probe(self, url):
+        """
+        探测服务端是否支持 Range：请求第一个字节，支持时返回 (文件大小, None)；
+        不支持时服务端会返回完整内容，直接作为下载结果返回 (None, 内容)，不浪费这次请求
+        """
+        async with self._client.stream("GET", url, headers={"Range": "bytes=0-0"}) as response:
+            response.raise_for_status()
+            match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if response.status_code == 206 and match:
+                # 读完这一个字节，连接才能放回连接池复用
+                await response.aread()
+                return int(match.group(1)), None
+            return None, await response.aread()
+
+    def fetch_bytes(self, url):
+        """下载 url 的完整内容"""
+        return self._run(self._get(url))
+
+    def fetch_range(self, url, start, end):
+        """下载 [start, end] 闭区间内的字节"""
+        return self._run(self._get_range(url, start, end))
+
+    def probe(self, url):
+        return self._run(self._probe(url))
+
+
+http_client = AsyncHttpClient()
+
+
+def fetch_bytes(url):
+    """通过共享客户端下载文件内容"""
+    return http_client.fetch_bytes(url)
+
+
+class RemoteFile(io.RawIOBase):
+    """
+    基于 HTTP Range 请求的只读、可 seek 文件对象
+
+    每次读取至少下载 block_size 字节并缓存为当前窗口，顺序的小块读取（zipfile 解压时的
+    典型模式）不会产生大量请求。
+    """
+
+    def __init__(self, url, size, client=None, block_size=RANGE_BLOCK_SIZE):
+        super().__init__()
+        self.url = url
+        self.size = size
+        self.client = client or http_client
+        self.block_size = block_size
+        self.pos = 0
+        self.bytes_fetched = 0
+        self.requests = 0
+        self._window_start = 0
+        self._window = b""
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self.pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self.pos = pos
+        return self.pos
+
+    def _fill(self, start, length):
+        end = min(self.size, start + max(length, self.block_size)) - 1
+        self._window = self.client.fetch_range(self.url, start, end)
+        self._window_start = start
+        self.bytes_fetched += len(self._window)
+        self.requests += 1
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.pos
+        size = min(size, self.size - self.pos)
+        if size <= 0:
+            return b""
+        offset = self.pos - self._window_start
+        if offset < 0 or offset + size > len(self._window):
+            self._fill(self.pos, size)
+            offset = 0
+        data = self._window[offset:offset + size]
+        self.pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readall(self):
+        return self.read(-1)
+
+
+def open_remote(url, size_hint=None):
+    """
+    打开远程文件，返回可 seek 的只读文件对象
+
+    小文件（或已知大小低于阈值）直接整体下载；较大的文件在服务端支持 Range 时返回
+    RemoteFile 按需读取，否则退回整体下载。
+    """
+    if size_hint is not None and size_hint < RANGE_THRESHOLD:
+        return io.BytesIO(fetch_bytes(url))
+    size, content = http_client.probe(url)
+    if content is not None:
+        return io.BytesIO(content)
+    if size < RANGE_THRESHOLD:
+        return io.BytesIO(fetch_bytes(url))
+    return RemoteFile(url, size)
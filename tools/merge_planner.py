@@ -0,0 +1,120 @@
+"""
+合并单元格规划
+
+一次性解析 format.merge_cells 中的全部范围，用扫描线检测重叠，再把无冲突的范围批量
+登记到工作表：
+
+- 按起始行排序后自上而下扫描，活动集合中保存当前行仍覆盖的范围；由于冲突的范围不会
+  进入活动集合，活动范围的列区间互不相交，可以按起始列有序存放，新范围只需用二分查找
+  检查左右两个相邻区间，整体为 O(n log n)
+- 发生重叠（包括完全包含和重复）时保留先扫描到的范围，即起始行更靠上、同一行时起始列
+  更靠左的范围，另一个作为冲突报告
+- 无效或冲突的范围不会写入文件：openpyxl 对被包含的范围会静默忽略，对部分重叠的范围
+  会照常写出，导致 Excel 打开时提示文件损坏
+
+本模块只依赖标准库。
+"""
+
+import heapq
+from bisect import bisect_left, insort
+
+from tools.xlsx_stream import column_letter, merge_range_ref, parse_cell_ref
+
+
+class MergeRange:
+    """已解析的合并范围，行列号从 1 开始"""
+
+    __slots__ = ("min_row", "min_col", "max_row", "max_col", "source")
+
+    def __init__(self, min_row, min_col, max_row, max_col, source=None):
+        self.min_row = min_row
+        self.min_col = min_col
+        self.max_row = max_row
+        self.max_col = max_col
+        self.source = source
+
+    @property
+    def ref(self):
+        return (f"{column_letter(self.min_col)}{self.min_row}:"
+                f"{column_letter(self.max_col)}{self.max_row}")
+
+    def __repr__(self):
+        return f"MergeRange({self.ref})"
+
+
+def parse_merge_range(merge_range):
+    """解析字符串/对象/数组格式的合并范围，起止顺序颠倒时自动调整，无法解析时返回 None"""
+    ref = merge_range_ref(merge_range)
+    parts = ref.split(":") if isinstance(ref, str) else []
+    if len(parts) != 2:
+        return None
+    start, end = parse_cell_ref(parts[0]), parse_cell_ref(parts[1])
+    if start is None or end is None:
+        return None
+    return MergeRange(min(start[0], end[0]), min(start[1], end[1]),
+                      max(start[0], end[0]), max(start[1], end[1]), merge_range)
+
+
+class MergePlan:
+    """
+    合并单元格规划结果
+
+    :ivar ranges: 可以安全合并的范围（按配置中的顺序）
+    :ivar conflicts: 被跳过的范围，每项为 {"range", "reason", "conflicts_with"} 字典
+    """
+
+    def __init__(self, ranges, conflicts):
+        self.ranges = ranges
+        self.conflicts = conflicts
+
+    @property
+    def refs(self):
+        return [merge.ref for merge in self.ranges]
+
+    def warn(self):
+        """按原有格式打印被跳过的范围"""
+        for conflict in self.conflicts:
+            detail = conflict["reason"]
+            if conflict.get("conflicts_with"):
+                detail += f" with {conflict['conflicts_with']}"
+            print(f"Warning: Failed to merge cells {conflict['range']}: {detail}")
+
+
+def plan_merges(merge_cells):
+    """解析全部合并范围并检测重叠，返回 MergePlan"""
+    conflicts = []
+    parsed = []
+    for idx, merge_range in enumerate(merge_cells or []):
+        merge = parse_merge_range(merge_range)
+        if merge is None:
+            conflicts.append({"range": merge_range, "reason": "invalid range"})
+        else:
+            parsed.append((idx, merge))
+
+    parsed.sort(key=lambda item: (item[1].min_row, item[1].min_col, item[0]))
+    # 活动范围：按起始列有序的 (起始列, 结束列, 范围)，以及按结束行排序的堆用于过期
+    active_starts = []
+    active = {}
+    expiry = []
+    accepted = []
+    for idx, merge in parsed:
+        while expiry and expiry[0][0] < merge.min_row:
+            _, min_col = heapq.heappop(expiry)
+            del active_starts[bisect_left(active_starts, min_col)]
+            del active[min_col]
+        pos = bisect_left(active_starts, merge.min_col)
+        blocker = None
+        if pos < len(active_starts) and active_starts[pos] <= merge.max_col:
+            blocker = active[active_starts[pos]]
+        elif pos > 0 and active[active_starts[pos - 1]].max_col >= merge.min_col:
+            blocker = active[active_starts[pos - 1]]
+        if blocker is not None:
+            conflicts.append({"range": merge.source, "reason": "overlaps", "conflicts_with": blocker.ref})
+            continue
+        insort(active_starts, merge.min_col)
+        active[merge.min_col] = merge
+        heapq.heappush(expiry, (merge.max_row, merge.min_col))
+        accepted.append((idx, merge))
+
+    accepted.sort(key=lambda item: item[0])
+    return MergePlan([merge for _, merge in accepted], conflicts)
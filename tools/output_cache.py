@@ -0,0 +1,179 @@
+"""
+writeExcel 的输出缓存
+
+Dify 的重试和重复运行的工作流经常发送逐字节相同的请求，每次都重新生成同一个工作簿。生成结果
+完全由请求参数和生成配置决定（docProps 和 zip 成员使用固定的时间戳，见
+tools.xlsx_stream.FIXED_TIMESTAMP），因此以请求的哈希为键缓存生成的内容，命中时直接返回。
+
+两级缓存，都按最近使用的顺序淘汰，超过有效期的条目视为未命中：
+    EXCEL_TOOL_OUTPUT_CACHE_BYTES       内存缓存的总字节数上限，0 表示关闭，默认 32 MB
+    EXCEL_TOOL_OUTPUT_CACHE_DIR         磁盘缓存目录，默认不使用；多个插件进程可以共享同一目录
+    EXCEL_TOOL_OUTPUT_CACHE_DISK_BYTES  磁盘缓存的总字节数上限，默认 512 MB
+    EXCEL_TOOL_OUTPUT_CACHE_TTL         条目的有效期（秒），0 表示不过期，默认 3600
+
+本模块只依赖标准库。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+OUTPUT_CACHE_BYTES = int(os.environ.get("EXCEL_TOOL_OUTPUT_CACHE_BYTES", 32 * 1024 * 1024))
+OUTPUT_CACHE_DIR = os.environ.get("EXCEL_TOOL_OUTPUT_CACHE_DIR", "")
+OUTPUT_CACHE_DISK_BYTES = int(os.environ.get("EXCEL_TOOL_OUTPUT_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+OUTPUT_CACHE_TTL = float(os.environ.get("EXCEL_TOOL_OUTPUT_CACHE_TTL", 3600))
+# 生成结果的格式变化时递增，使已有的磁盘缓存失效
+CACHE_VERSION = 1
+
+_SUFFIX = ".xlsx.cache"
+
+
+def request_key(*parts):
+    """
+    请求的缓存键：依次计入各部分的哈希，字符串按原文，其他值按 JSON（键排序）
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for part in (CACHE_VERSION,) + parts:
+        text = part if isinstance(part, str) else json.dumps(part, sort_keys=True, default=repr)
+        data = text.encode("utf-8")
+        # 写入长度，避免相邻部分拼接后产生歧义
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def canonical_json(text):
+    """
+    JSON 输入的规范形式：去掉多余的空白并统一字符串转义，只有这些差别的请求使用同一缓存键；
+    无法解析时返回原文
+
+    键的顺序保持不变：记录中键的顺序决定列的顺序，format.cells 中同一单元格的多个键以后出现的为准，
+    排序后不同的请求会得到相同的键。
+    """
+    try:
+        return json.dumps(json.loads(text), separators=(",", ":"), ensure_ascii=False)
+    except ValueError:
+        return text
+
+
+class OutputCache:
+    """内存 + 磁盘两级 LRU 缓存，条目为 (内容, 元数据字典)"""
+
+    def __init__(self, max_bytes=OUTPUT_CACHE_BYTES, directory=OUTPUT_CACHE_DIR,
+                 max_disk_bytes=OUTPUT_CACHE_DISK_BYTES, ttl=OUTPUT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.directory = directory or None
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        # key -> (写入时间, 内容, 元数据)，按最近使用排序
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 or self.directory is not None
+
+    def _expired(self, created):
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def get(self, key):
+        """返回 (内容, 元数据)，未命中时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    return entry[1], entry[2]
+                self._evict(key)
+        entry = self._disk_get(key)
+        if entry is None:
+            return None
+        created, data, meta = entry
+        self._remember(key, created, data, meta)
+        return data, meta
+
+    def put(self, key, data, meta):
+        created = time.time()
+        self._remember(key, created, data, meta)
+        self._disk_put(key, created, data, meta)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remember(self, key, created, data, meta):
+        # 超过上限的单个条目不进入内存缓存，避免把其他条目全部挤出
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (created, data, meta)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, data, _ = self._entries.pop(key)
+        self._size -= len(data)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _disk_get(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                data = f.read()
+            created = meta.pop("created")
+            # 过期或不完整的文件
+            if self._expired(created) or len(data) != meta.pop("size"):
+                os.remove(path)
+                return None
+            # 修改时间即最近使用时间
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return created, data, meta
+
+    def _disk_put(self, key, created, data, meta):
+        """缓存只用于加速，写入失败时忽略"""
+        if self.directory is None or len(data) > self.max_disk_bytes:
+            return
+        header = json.dumps(dict(meta, created=created, size=len(data)), ensure_ascii=False)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(header.encode("utf-8") + b"\n")
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        """总大小超过上限时删除最久未使用的文件"""
+        try:
+            entries = [(entry.stat(), entry.path) for entry in os.scandir(self.directory)
+                       if entry.name.endswith(_SUFFIX)]
+            total = sum(stat.st_size for stat, _ in entries)
+            for stat, path in sorted(entries, key=lambda item: item[0].st_mtime):
+                if total <= self.max_disk_bytes:
+                    break
+                os.remove(path)
+                total -= stat.st_size
+        except OSError:
+            pass
+
+
+output_cache = OutputCache()
@@ -0,0 +1,133 @@
+"""
+工具调用执行层
+
+- 准入控制：按预估内存开销占用全局预算，并发的大请求排队执行，而不是同时挤占
+  插件 256 MB 的内存配额
+- 有界工作池：解析、序列化等 CPU 密集步骤在固定大小的工作池中执行；在 dify_plugin
+  的 gevent 环境下使用原生线程池，避免长时间计算阻塞事件循环上的其他请求
+
+配置通过环境变量调整：
+    EXCEL_TOOL_MEMORY_BUDGET     全局内存预算（字节），默认 160 MB
+    EXCEL_TOOL_POOL_SIZE         工作池大小，默认 2
+    EXCEL_TOOL_ADMISSION_TIMEOUT 排队等待的最长秒数，默认 300
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+MEMORY_BUDGET = int(os.environ.get("EXCEL_TOOL_MEMORY_BUDGET", 160 * 1024 * 1024))
+POOL_SIZE = int(os.environ.get("EXCEL_TOOL_POOL_SIZE", 2))
+ADMISSION_TIMEOUT = float(os.environ.get("EXCEL_TOOL_ADMISSION_TIMEOUT", 300))
+
+# 预估内存开销时使用的放大系数：JSON 文本解析为 Python 对象、再构建工作簿的峰值约为
+# 原始文本的数倍；xlsx 是压缩包，解压并解析后的峰值通常是文件大小的十倍以上
+WRITE_COST_FACTOR = 8
+READ_COST_FACTOR = 12
+# 无法得知文件大小时按此值估算
+DEFAULT_READ_SIZE = 1024 * 1024
+
+
+def estimate_write_cost(json_str):
+    """预估 writeExcel 调用的峰值内存（字节）"""
+    return len(json_str) * WRITE_COST_FACTOR
+
+
+def estimate_read_cost(file_size):
+    """预估 readExcel 调用的峰值内存（字节）"""
+    return (file_size or DEFAULT_READ_SIZE) * READ_COST_FACTOR
+
+
+class AdmissionController:
+    """
+    基于内存预算的准入控制
+
+    每个请求在执行前按预估开销占用预算，预算不足时排队等待。超过总预算的单个请求
+    会被限制为占满整个预算，即只能在没有其他请求运行时独占执行。
+    """
+
+    def __init__(self, budget=MEMORY_BUDGET, timeout=ADMISSION_TIMEOUT):
+        self.budget = budget
+        self.timeout = timeout
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, cost):
+        """占用预算，返回实际占用的数值；超时仍无法获得预算时抛出异常"""
+        cost = max(0, min(int(cost), self.budget))
+        with self._cond:
+            admitted = self._cond.wait_for(lambda: self.in_use + cost <= self.budget, timeout=self.timeout)
+            if not admitted:
+                raise Exception("Excel tool is busy: timed out waiting for memory budget, please retry later")
+            self.in_use += cost
+        return cost
+
+    def release(self, cost):
+        with self._cond:
+            self.in_use -= cost
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, cost):
+        """在上下文内占用预算"""
+        held = self.acquire(cost)
+        try:
+            yield
+        finally:
+            self.release(held)
+
+
+def _gevent_patched():
+    """dify_plugin 导入时会对 threading 做 gevent 猴子补丁"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+class WorkerPool:
+    """有界工作池：gevent 环境下使用 gevent 的原生线程池，否则使用标准线程池"""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = max(1, size)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if _gevent_patched():
+                    from gevent.threadpool import ThreadPool
+                    self._pool = ThreadPool(self.size)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="excel-tool")
+            return self._pool
+
+    def prestart(self):
+        """预先创建工作池并启动全部线程，首个请求不再承担创建线程的开销"""
+        pool = self._get_pool()
+        if isinstance(pool, ThreadPoolExecutor):
+            # 标准线程池在提交任务时才按需创建线程，每次调用补充一个线程，直到达到上限
+            for _ in range(self.size):
+                pool._adjust_thread_count()
+        else:
+            pool.size = self.size
+
+    def run(self, func, *args, **kwargs):
+        """在工作池中执行 func 并等待结果，异常原样抛出"""
+        pool = self._get_pool()
+        if isinstance(pool, ThreadPoolExecutor):
+            return pool.submit(func, *args, **kwargs).result()
+        return pool.apply(func, args, kwargs)
+
+
+admission = AdmissionController()
+worker_pool = WorkerPool()
+
+
+def run_blocking(func, *args, cost=0, **kwargs):
+    """在准入控制下，把阻塞的 CPU 密集步骤放到工作池中执行"""
+    with admission.admit(cost):
+        return worker_pool.run(func, *args, **kwargs)
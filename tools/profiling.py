@@ -0,0 +1,165 @@
+"""
+分阶段耗时与内存统计
+
+工具参数 profile 为 true 时，生成/读取过程按阶段（解析、构建数据、写单元格、样式、
+列宽行高、合并单元格、序列化、输出消息）记录耗时和内存分配，结果作为额外的 JSON 文本
+消息返回，同时以结构化日志输出到 excel_tool.profile。
+
+内存通过 tracemalloc 统计：allocated_bytes 为阶段结束时净增的内存，peak_bytes 为阶段内
+相对起点的峰值。tracemalloc 是进程级的：同时开启统计的请求共用一次追踪，按引用计数在最后一个
+结束时停止；峰值只能整体重置，因此只有一个请求在统计、且追踪由本模块开启时才记录 peak_bytes，
+否则为 null，不会打乱其他请求或 benchmarks 自行开启的追踪。allocated_bytes 在并发时会相互计入，
+仅用于诊断。
+未开启时 phase() 不做任何记录，开销可以忽略。
+
+工具参数 debug 为 "cprofile" 时，整个生成/解析过程在 cProfile 下运行，统计结果以 pstats
+二进制文件的形式作为 blob 消息返回，可用 pstats.Stats(路径) 或 snakeviz 等工具离线分析。
+"""
+
+import cProfile
+import json
+import logging
+import marshal
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger("excel_tool.profile")
+
+# 正在统计内存的 PhaseProfiler 数量、追踪是否由它们开启，以及开始统计的累计次数（用于判断阶段内是否有新的实例加入）
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+_tracing_generation = 0
+
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_owned, _tracing_generation
+    with _tracing_lock:
+        if _tracing_users == 0:
+            _tracing_owned = not tracemalloc.is_tracing()
+            if _tracing_owned:
+                tracemalloc.start()
+        _tracing_users += 1
+        _tracing_generation += 1
+
+
+def _release_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+def _reset_peak():
+    """只有一个实例在统计且追踪由本模块开启时重置峰值，返回当时的累计次数；否则返回 None"""
+    with _tracing_lock:
+        if _tracing_users != 1 or not _tracing_owned:
+            return None
+        tracemalloc.reset_peak()
+        return _tracing_generation
+
+
+def _peak_isolated(generation):
+    """重置峰值之后没有其他实例开始统计"""
+    with _tracing_lock:
+        return generation is not None and generation == _tracing_generation and _tracing_users == 1
+
+
+class PhaseProfiler:
+    """按阶段记录耗时和内存分配，同名阶段多次进入时累加"""
+
+    def __init__(self, enabled=False, trace_memory=True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.phases = {}
+        self._tracing = False
+        self._start = time.perf_counter()
+        if self.trace_memory:
+            _acquire_tracing()
+            self._tracing = True
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        if self.trace_memory:
+            generation = _reset_peak()
+            mem_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self.phases.setdefault(name, {"duration_ms": 0.0, "allocated_bytes": 0, "peak_bytes": 0})
+            stats["duration_ms"] += elapsed * 1000
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                stats["allocated_bytes"] += current - mem_before
+                if not _peak_isolated(generation):
+                    # 其他请求同时在统计，峰值无法区分
+                    stats["peak_bytes"] = None
+                elif stats["peak_bytes"] is not None:
+                    stats["peak_bytes"] = max(stats["peak_bytes"], peak - mem_before)
+
+    def report(self, **extra):
+        """返回各阶段统计（毫秒保留三位小数），extra 中的字段原样附加"""
+        phases = [{"phase": name, **stats, "duration_ms": round(stats["duration_ms"], 3)}
+                  for name, stats in self.phases.items()]
+        return {
+            **extra,
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 3),
+            "phases": phases,
+        }
+
+    def close(self):
+        """结束本实例的内存统计，最后一个实例结束时停止追踪"""
+        if self._tracing:
+            _release_tracing()
+            self._tracing = False
+
+    def finish(self, **extra):
+        """停止内存追踪，记录结构化日志并返回 JSON 字符串"""
+        self.close()
+        report = self.report(**extra)
+        payload = json.dumps(report, ensure_ascii=False)
+        logger.info(payload)
+        return payload
+
+
+# 未开启统计时共享的空实现
+NULL_PROFILER = PhaseProfiler(enabled=False)
+
+PSTATS_MIME_TYPE = "application/octet-stream"
+
+
+def debug_mode(value):
+    """
+    解析 debug 参数：
+    "cprofile" 返回 "cprofile"；true / "true" / "save" 返回 "save"（保留原有的本地保存行为）；
+    其余（未设置、false、"off"）返回 None
+    """
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value == "cprofile":
+            return "cprofile"
+        return "save" if value in ("true", "save") else None
+    return "save" if value else None
+
+
+def run_profiled(func, *args, **kwargs):
+    """
+    在 cProfile 下执行 func，返回 (结果, pstats 二进制内容)
+
+    cProfile 只统计当前线程，因此需要在实际执行的工作线程内调用；
+    流式引擎 fork 出的子进程不在统计范围内。
+    """
+    profile = cProfile.Profile()
+    result = profile.runcall(func, *args, **kwargs)
+    profile.create_stats()
+    # 与 pstats.Stats.dump_stats 写出的格式相同
+    return result, marshal.dumps(profile.stats)
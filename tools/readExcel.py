@@ -4,14 +4,117 @@ from typing import Any
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
-import pandas as pd
+import json
+import zipfile
+
+from tools.guardrails import check_read, plan_read
+from tools.http_client import open_remote
+from tools.pipeline import admission, estimate_read_cost, worker_pool
+from tools.profiling import NULL_PROFILER, PSTATS_MIME_TYPE, PhaseProfiler, debug_mode, run_profiled
+from tools.sheet_summary import SUMMARY_FORMAT, frame_rows, summarize_rows, summarize_workbook
+from tools.text_output import encode_text, resolve_output_format
+from tools.xlsx_reader import XlsxReader, parse_row_range, read_sheet_records
 
 class ReadExcelTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         file_meta = tool_parameters['file']
+        sheet = tool_parameters.get('sheet') or None
+        profiler = PhaseProfiler(enabled=bool(tool_parameters.get('profile', False)))
+        profile_cpu = debug_mode(tool_parameters.get('debug', False)) == 'cprofile'
+        pstats_bytes = None
         try:
-            df = pd.read_excel(file_meta.url, dtype=str)
+            output_format = tool_parameters.get('output_format')
+            if str(output_format).lower() == SUMMARY_FORMAT:
+                output_format = SUMMARY_FORMAT
+            else:
+                output_format = resolve_output_format(output_format)
+            row_range = parse_row_range(tool_parameters.get('row_range'))
+            file_size = getattr(file_meta, 'size', None)
+            # 超出上限的文件在下载之前拒绝
+            check_read(file_size)
+            with admission.admit(estimate_read_cost(file_size)):
+                # 大文件按需发起 Range 请求，只下载中央目录和实际读取的工作簿部件
+                with profiler.phase('download'):
+                    source = open_remote(file_meta.url, file_size)
+                if profile_cpu:
+                    output_text, pstats_bytes = worker_pool.run(
+                        run_profiled, self._read_records, source, sheet, profiler, output_format, row_range)
+                else:
+                    output_text = worker_pool.run(self._read_records, source, sheet, profiler, output_format,
+                                                  row_range)
         except Exception as e:
+            profiler.close()
             raise Exception(f"Error reading Excel file: {str(e)}")
 
-        yield self.create_text_message(df.to_json(orient="records", force_ascii=False))
\ No newline at end of file
+        if pstats_bytes is not None:
+            yield self.create_text_message("[DEBUG] cProfile stats attached as 'readExcel.pstats'.")
+            yield self.create_blob_message(
+                blob=pstats_bytes,
+                meta={"mime_type": PSTATS_MIME_TYPE, "filename": "readExcel.pstats"}
+            )
+        with profiler.phase('emit'):
+            message = self.create_text_message(output_text)
+        yield message
+        if profiler.enabled:
+            yield self.create_text_message(
+                profiler.finish(tool="readExcel", input_bytes=file_size, output_bytes=len(output_text)))
+
+    def _read_records(self, source, sheet=None, profiler=NULL_PROFILER, output_format="records",
+                      row_range=None) -> str:
+        """
+        解析 Excel 文件对象并按 output_format 编码（默认为 records 格式的 JSON）
+
+        :param row_range: parse_row_range 的结果，只返回这些行
+        """
+        if output_format == SUMMARY_FORMAT:
+            return self._read_summary(source, sheet, profiler)
+        if not zipfile.is_zipfile(source):
+            # 非 xlsx（如旧版 xls）交给 pandas 整体加载，pandas 只在这条路径上导入
+            import pandas as pd
+
+            source.seek(0, 2)
+            plan_read(False, file_size=source.tell())
+            source.seek(0)
+            with profiler.phase('parse'):
+                df = pd.read_excel(source, dtype=str, sheet_name=sheet if sheet is not None else 0)
+                # 与 xlsx 一致：去掉末尾的空行以及既没有表头也没有值的列
+                empty = [col for col in df.columns
+                         if isinstance(col, str) and col.startswith("Unnamed: ") and df[col].isna().all()]
+                df = df.drop(columns=empty)
+                last = df.last_valid_index()
+                df = df.iloc[:0] if last is None else df.loc[:last]
+                if row_range is not None:
+                    # DataFrame 的第 0 行为 Excel 的第 2 行
+                    first_row, last_row = row_range
+                    df = df.iloc[first_row - 2:None if last_row is None else last_row - 1]
+            with profiler.phase('serialize'):
+                rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+                return encode_text([str(col) for col in df.columns], rows, output_format)
+        # xlsx 只解压目标工作表和共享字符串，逐行流式解析
+        with profiler.phase('parse'):
+            with XlsxReader(source) as reader:
+                plan_read(True, sheet_bytes=reader.sheet_size(sheet))
+                columns, rows = read_sheet_records(reader, sheet, prune_columns=True, row_range=row_range)
+        with profiler.phase('serialize'):
+            return encode_text(columns, rows, output_format)
+
+    def _read_summary(self, source, sheet=None, profiler=NULL_PROFILER) -> str:
+        """一次遍历得到全部工作表（或指定的工作表）的结构和统计概要"""
+        with profiler.phase('parse'):
+            if zipfile.is_zipfile(source):
+                with XlsxReader(source) as reader:
+                    for name, _ in reader.select_sheets(sheet):
+                        plan_read(True, sheet_bytes=reader.sheet_size(name))
+                    summary = summarize_workbook(reader, sheet)
+            else:
+                import pandas as pd
+
+                source.seek(0, 2)
+                plan_read(False, file_size=source.tell())
+                source.seek(0)
+                frames = pd.read_excel(source, header=None, sheet_name=sheet)
+                if not isinstance(frames, dict):
+                    frames = {sheet: frames}
+                summary = {"sheets": [summarize_rows(str(name), frame_rows(df)) for name, df in frames.items()]}
+        with profiler.phase('serialize'):
+            return json.dumps(summary, ensure_ascii=False, separators=(',', ':'))
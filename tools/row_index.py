@@ -0,0 +1,218 @@
+"""
+工作表的行偏移量索引
+
+反复按行范围读取同一个大文件时，每次都要从头解析工作表 XML，而 XML 解析占了读取耗时的
+绝大部分（单纯解压只占几个百分点）。顺序读取工作表时顺带记录检查点：解压后的 XML 中大约每
+CHECKPOINT_BYTES 字节处一个 <row> 起始标签的偏移量及其行号，保存为缓存目录中的小文件。之后
+读取某个行范围时，只解析开头部分（含表头行），然后解压并丢弃到起始行之前最近的检查点，从那里
+继续解析，跳过的部分完全不经过 XML 解析器。
+
+索引以工作表部件的 CRC-32 和压缩前后的大小为键，同一文件再次上传时命中，内容变化时自然失效。
+跳转前核对该位置确实是对应行号的 <row> 起始标签，不一致时删除索引并从头解析。行元素没有 r
+属性时行号依赖顺序，不建立索引。
+
+    EXCEL_TOOL_ROW_INDEX_DIR        索引目录，默认为系统临时目录下的 excel-tool-row-index，off 表示关闭
+    EXCEL_TOOL_ROW_INDEX_MIN_BYTES  工作表解压后达到该大小（字节）时才建立索引，默认 16 MB
+
+本模块只依赖标准库。
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+ROW_INDEX_DIR = os.environ.get("EXCEL_TOOL_ROW_INDEX_DIR",
+                               os.path.join(tempfile.gettempdir(), "excel-tool-row-index"))
+ROW_INDEX_MIN_BYTES = int(os.environ.get("EXCEL_TOOL_ROW_INDEX_MIN_BYTES", 16 * 1024 * 1024))
+# 相邻检查点之间的字节数：跳转后最多多解析这么多字节
+CHECKPOINT_BYTES = 256 * 1024
+# 索引文件数超过该值时删除最久未使用的
+MAX_INDEX_FILES = 1000
+INDEX_VERSION = 1
+
+_ROW_START_RE = re.compile(rb"<(?:[\w.-]+:)?row\b([^>]*)>")
+_ROW_NUMBER_RE = re.compile(rb"""(?:^|\s)r\s*=\s*["'](\d+)["']""")
+# 保留上一个片段的末尾，找到跨片段的 <row ...> 起始标签
+_CARRY_BYTES = 1024
+
+
+def index_dir():
+    """索引目录；关闭时返回 None"""
+    value = ROW_INDEX_DIR.strip()
+    return None if value.lower() in ("", "off", "0", "false") else value
+
+
+def index_key(info):
+    """工作表部件的指纹：CRC-32 和压缩前后的大小"""
+    text = f"{info.CRC:08x}:{info.compress_size}:{info.file_size}"
+    return hashlib.blake2b(text.encode("ascii"), digest_size=16).hexdigest()
+
+
+class RowIndex:
+    """
+    检查点列表 [(行号, 偏移量)]，行号和偏移量都递增。第一个检查点为第一个行元素；它是第 1 行
+    （表头）时第二个检查点为紧随其后的行元素，两者之间的内容在跳转时原样保留。
+    """
+
+    def __init__(self, path, checkpoints=()):
+        self.path = path
+        self.checkpoints = [(int(row), int(offset)) for row, offset in checkpoints]
+        self.valid = True
+        self._saved = len(self.checkpoints)
+
+    @classmethod
+    def open(cls, info):
+        """返回压缩包成员 info 对应的索引（可能还没有检查点）；未启用或工作表较小时返回 None"""
+        directory = index_dir()
+        if directory is None or info.file_size < ROW_INDEX_MIN_BYTES:
+            return None
+        path = os.path.join(directory, index_key(info) + ".json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            index = cls(path, data["checkpoints"] if data.get("version") == INDEX_VERSION else ())
+            # 修改时间即最近使用时间
+            os.utime(path)
+            return index
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls(path)
+
+    def next_offset(self):
+        """下一个检查点的最小偏移量"""
+        if not self.checkpoints:
+            return 0
+        row, offset = self.checkpoints[-1]
+        if len(self.checkpoints) == 1 and row == 1:
+            return offset + 1
+        return offset + CHECKPOINT_BYTES
+
+    def record(self, row, offset):
+        """追加检查点；行号或偏移量不递增时索引作废"""
+        if self.checkpoints and (row <= self.checkpoints[-1][0] or offset <= self.checkpoints[-1][1]):
+            self.valid = False
+        if self.valid:
+            self.checkpoints.append((row, offset))
+        return self.valid
+
+    def seek_point(self, start_row):
+        """
+        读取 start_row 及之后的行时的跳转位置 (保留的开头部分的长度, 检查点行号, 检查点偏移量)；
+        跳不过任何内容时返回 None
+        """
+        if not self.valid or len(self.checkpoints) < 2:
+            return None
+        first_row, first_offset = self.checkpoints[0]
+        prefix_end = self.checkpoints[1][1] if first_row == 1 else first_offset
+        pos = bisect.bisect_right(self.checkpoints, (start_row, float("inf"))) - 1
+        if pos < 0 or self.checkpoints[pos][1] <= prefix_end:
+            return None
+        return (prefix_end,) + self.checkpoints[pos]
+
+    def save(self):
+        """有新的检查点时写回索引文件；索引只用于加速，写入失败时忽略"""
+        if not self.valid or len(self.checkpoints) <= self._saved:
+            return
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "checkpoints": self.checkpoints}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            return
+        self._saved = len(self.checkpoints)
+        _prune(directory)
+
+    def discard(self):
+        """删除与文件内容不符的索引"""
+        self.valid = False
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _prune(directory, max_files=MAX_INDEX_FILES):
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".json")]
+        if len(entries) <= max_files:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - max_files]:
+            os.remove(entry.path)
+    except OSError:
+        pass
+
+
+class IndexedStream:
+    """
+    工作表 XML 的只读流：读取的同时记录新的检查点；指定 start_row 且索引中有合适的检查点时，
+    输出开头部分后直接跳到该检查点
+    """
+
+    def __init__(self, raw, index, start_row=None):
+        self._raw = raw
+        self._index = index
+        # 下一个字节在解压后的 XML 中的偏移量
+        self._pos = 0
+        self._pending = b""
+        self._carry = b""
+        self._next_at = index.next_offset()
+        self._recording = index.valid
+        self._jump = index.seek_point(start_row) if start_row else None
+
+    def read(self, size=-1):
+        if self._jump is not None and self._pos >= self._jump[0]:
+            self._seek_checkpoint()
+        if self._pending:
+            data = self._pending if size is None or size < 0 else self._pending[:size]
+            self._pending = self._pending[len(data):]
+        else:
+            if self._jump is not None and (size is None or size < 0 or self._pos + size > self._jump[0]):
+                size = self._jump[0] - self._pos
+            data = self._raw.read(size)
+            self._scan(data)
+        self._pos += len(data)
+        return data
+
+    def _seek_checkpoint(self):
+        prefix_end, row, offset = self._jump
+        self._jump = None
+        # 向前 seek 时 ZipExtFile 解压并丢弃中间的数据
+        self._raw.seek(offset)
+        head = self._raw.read(_CARRY_BYTES)
+        match = _ROW_START_RE.match(head)
+        number = _ROW_NUMBER_RE.search(match.group(1)) if match else None
+        if number is None or int(number.group(1)) != row:
+            self._index.discard()
+            self._recording = False
+            self._raw.seek(prefix_end)
+            return
+        self._pos = offset
+        self._carry = b""
+        self._scan(head)
+        self._pending = head
+
+    def _scan(self, data):
+        """在新读到的数据中记录越过 _next_at 之后的第一个行元素"""
+        if not self._recording or not data:
+            return
+        buffer = self._carry + data
+        base = self._pos - len(self._carry)
+        while True:
+            start = self._next_at - base
+            if start >= len(buffer):
+                break
+            match = _ROW_START_RE.search(buffer, max(start, 0))
+            if match is None:
+                break
+            number = _ROW_NUMBER_RE.search(match.group(1))
+            if number is None or not self._index.record(int(number.group(1)), base + match.start()):
+                self._recording = False
+                return
+            self._next_at = self._index.next_offset()
+        self._carry = buffer[-_CARRY_BYTES:]
@@ -0,0 +1,72 @@
+from collections.abc import Generator
+from typing import Any
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+import json
+import zipfile
+
+from tools.guardrails import check_read, plan_read
+from tools.http_client import open_remote
+from tools.pipeline import admission, estimate_read_cost, worker_pool
+from tools.profiling import NULL_PROFILER, PhaseProfiler
+from tools.sheet_search import DEFAULT_MAX_MATCHES, build_block_filter, build_matcher, search_sheets, search_workbook
+from tools.sheet_summary import frame_rows
+from tools.xlsx_reader import XlsxReader
+
+class SearchExcelTool(Tool):
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        file_meta = tool_parameters['file']
+        sheet = tool_parameters.get('sheet') or None
+        columns = [c for c in str(tool_parameters.get('columns') or '').split(',') if c.strip()]
+        profiler = PhaseProfiler(enabled=bool(tool_parameters.get('profile', False)))
+        query = (tool_parameters.get('query'), tool_parameters.get('match_type'),
+                 bool(tool_parameters.get('case_sensitive', False)))
+        try:
+            # 查找条件有误时在下载之前报错
+            build_matcher(*query)
+            max_matches = int(tool_parameters.get('max_matches') or DEFAULT_MAX_MATCHES)
+            file_size = getattr(file_meta, 'size', None)
+            check_read(file_size)
+            with admission.admit(estimate_read_cost(file_size)):
+                # 只下载实际解析到的部分：找到足够的匹配后不再请求后面的数据
+                with profiler.phase('download'):
+                    source = open_remote(file_meta.url, file_size)
+                result_json = worker_pool.run(self._search, source, query, sheet, columns, max_matches, profiler)
+        except Exception as e:
+            profiler.close()
+            raise Exception(f"Error searching Excel file: {str(e)}")
+
+        with profiler.phase('emit'):
+            message = self.create_text_message(result_json)
+        yield message
+        if profiler.enabled:
+            yield self.create_text_message(
+                profiler.finish(tool="searchExcel", input_bytes=file_size, output_bytes=len(result_json)))
+
+    def _search(self, source, query, sheet=None, columns=None, max_matches=DEFAULT_MAX_MATCHES,
+                profiler=NULL_PROFILER) -> str:
+        """流式查找匹配的单元格，返回 JSON；query 为 (查找内容, 匹配方式, 是否区分大小写)"""
+        matcher = build_matcher(*query)
+        with profiler.phase('parse'):
+            if zipfile.is_zipfile(source):
+                with XlsxReader(source) as reader:
+                    for name, _ in reader.select_sheets(sheet):
+                        plan_read(True, sheet_bytes=reader.sheet_size(name))
+                    result = search_workbook(reader, matcher, sheet, columns, max_matches,
+                                             block_filter=build_block_filter(reader, *query))
+            else:
+                # 旧版 xls 交给 pandas 整体加载
+                import pandas as pd
+
+                source.seek(0, 2)
+                plan_read(False, file_size=source.tell())
+                source.seek(0)
+                frames = pd.read_excel(source, header=None, sheet_name=sheet)
+                if not isinstance(frames, dict):
+                    frames = {sheet: frames}
+                result = search_sheets(((str(name), frame_rows(df)) for name, df in frames.items()),
+                                       matcher, columns, max_matches)
+        with profiler.phase('serialize'):
+            return json.dumps(result, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,226 @@
+"""
+工作表的流式单元格查找
+
+逐行流式解析工作表，按子串、完全匹配、正则表达式或数值范围查找单元格，返回匹配单元格的
+坐标以及所在行的内容（以表头为键）。找到 max_matches 个匹配行后立即停止解析，大文件通过
+Range 请求读取时，后面的数据也不会被下载。
+
+单元格按 readExcel 输出的文本匹配（整数不带 ".0"，默认缺失值字符串视为空值）；数值范围
+匹配数字单元格以及内容为数字的文本单元格。首行为表头，只在数据行中查找。
+
+查找内容只可能出现在文本单元格中时（子串或完全匹配，且含有数字、日期、布尔值的文本中不会
+出现的字符），先在未解析的 XML 上按约 256 KB 的行块预筛选：块中既没有查找内容本身，也没有引用
+匹配的共享字符串时整块跳过，不再逐个单元格解析。没有匹配或匹配靠后时，查找耗时接近解压耗时。
+
+本模块只依赖标准库。
+"""
+
+import math
+import re
+
+from tools.xlsx_reader import MAX_EMPTY_ROWS, LazySharedStrings, cell_to_str, header_names, used_rows
+from tools.xlsx_stream import column_index, column_letter
+
+MATCH_TYPES = ("contains", "exact", "regex", "range")
+DEFAULT_MAX_MATCHES = 50
+# 单次查找返回的最大匹配行数
+MAX_MATCHES_LIMIT = 1000
+
+_COLUMN_LETTER_RE = re.compile(r"^[A-Za-z]{1,3}$")
+# 数字、日期时间、时间间隔、布尔值转换后的文本只由这些字符组成（忽略大小写）
+_NON_TEXT_CHARS = frozenset("0123456789.+-:, adefilnrstuy")
+# 原始 XML 中会改变文本内容的写法：字符引用、富文本片段（<r>、<x:r>）
+_RAW_ESCAPES = (b"&#", b"<r>", b"<r ", b":r>", b":r ")
+_SHARED_VALUE_RE = re.compile(rb"<(?:[\w.-]+:)?v>(\d+)</")
+# casefold 后含有 ASCII 字母的非 ASCII 字符（如 ß、开尔文符号、连字 ﬁ）
+_ASCII_FOLDING = "ßİŉſǰẖẗẘẙẚẞ\u212aﬀﬁﬂﬃﬄﬅﬆ"
+
+
+def parse_range(query):
+    """解析数值范围："10..20"、"10.."、"..20"，单个数字表示等于该值"""
+    text = str(query).strip()
+    low, sep, high = text.partition("..")
+    try:
+        low = float(low) if low.strip() else -math.inf
+        high = (float(high) if high.strip() else math.inf) if sep else low
+    except ValueError:
+        raise ValueError(f"Invalid numeric range: {query!r}, expected e.g. 10..20, 10.. or ..20")
+    if low > high:
+        raise ValueError(f"Invalid numeric range: {query!r}, the lower bound exceeds the upper bound")
+    return low, high
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None
+    return None
+
+
+def build_matcher(query, match_type="contains", case_sensitive=False):
+    """返回 matcher(value, text) -> bool；value 为单元格的原值，text 为其文本"""
+    match_type = str(match_type or "contains").lower()
+    if match_type not in MATCH_TYPES:
+        raise ValueError(f"Unsupported match type: {match_type}")
+    if query is None or str(query) == "":
+        raise ValueError("Search query must not be empty")
+    query = str(query)
+    if match_type == "range":
+        low, high = parse_range(query)
+
+        def matcher(value, text):
+            number = _number(value)
+            return number is not None and low <= number <= high
+        return matcher
+    if match_type == "regex":
+        try:
+            pattern = re.compile(query, 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}")
+        return lambda value, text: pattern.search(text) is not None
+    if not case_sensitive:
+        query = query.casefold()
+    if match_type == "exact":
+        if case_sensitive:
+            return lambda value, text: text == query
+        return lambda value, text: text.casefold() == query
+    if case_sensitive:
+        return lambda value, text: query in text
+    return lambda value, text: query in text.casefold()
+
+
+def build_block_filter(reader, query, match_type="contains", case_sensitive=False):
+    """
+    构造 XlsxReader.iter_rows 的行块预筛选函数；只在可以保证不漏掉匹配时使用，否则返回 None
+
+    查找内容只可能匹配文本单元格时，匹配的单元格在原始 XML 中要么直接包含查找内容（内联字符串、
+    公式的文本结果），要么引用一个匹配的共享字符串。延迟解析的共享字符串表同样先按原始 XML
+    预筛选，只解析可能匹配的字符串。
+    """
+    match_type = str(match_type or "contains").lower()
+    if match_type not in ("contains", "exact") or query is None:
+        return None
+    text = str(query)
+    if not text or set(text.casefold()) <= _NON_TEXT_CHARS:
+        return None
+    if any(c in text for c in "&<>\"'\r\n"):
+        # 在 XML 中需要转义或会被规范化的字符
+        return None
+    if not case_sensitive and any(not c.isascii() and c.lower() != c.upper() for c in text):
+        return None
+    needle = (text if case_sensitive else text.lower()).encode("utf-8")
+    matcher = build_matcher(text, match_type, case_sensitive)
+    # 忽略大小写时，个别非 ASCII 字符 casefold 后与查找内容中的 ASCII 字母相同，含有这些字符的块同样需要解析
+    folding = () if case_sensitive else tuple(
+        c.encode("utf-8") for c in _ASCII_FOLDING if set(c.casefold()) & set(text.casefold()))
+
+    def raw_match(data):
+        """原始 XML 中可能含有匹配的文本"""
+        if needle in (data if case_sensitive else data.lower()) or any(s in data for s in _RAW_ESCAPES):
+            return True
+        return any(s in data for s in folding)
+
+    # 匹配的共享字符串的序号（原始 XML 中 <v> 的内容）
+    shared_strings = reader.shared_strings
+    if isinstance(shared_strings, LazySharedStrings):
+        indexes = shared_strings.candidates(raw_match)
+    else:
+        indexes = range(len(shared_strings))
+    hits = set()
+    for idx in indexes:
+        value = shared_strings[idx]
+        value_text = cell_to_str(value)
+        if value_text is not None and matcher(value, value_text):
+            hits.add(str(idx).encode("ascii"))
+
+    def keep(block):
+        if raw_match(block):
+            return True
+        return bool(hits) and not hits.isdisjoint(_SHARED_VALUE_RE.findall(block))
+    return keep
+
+
+def _resolve_columns(columns, header):
+    """把列名或列字母解析为列号集合；None 表示全部列"""
+    if not columns:
+        return None
+    by_name = {str(value): col_idx for col_idx, value in header.items()}
+    resolved = set()
+    for column in columns:
+        column = str(column).strip()
+        if column in by_name:
+            resolved.add(by_name[column])
+        elif _COLUMN_LETTER_RE.match(column):
+            resolved.add(column_index(column.upper()))
+    return resolved
+
+
+def search_rows(name, rows, matcher, columns=None, max_empty_rows=MAX_EMPTY_ROWS):
+    """
+    在一个工作表中查找，逐个产出匹配的行：
+    {"sheet": 名称, "row": 行号, "cells": [匹配单元格的坐标], "record": {列名: 文本}}
+
+    :param rows: 逐行产出 (行号, {列号: 值}) 的可迭代对象，与 XlsxReader.iter_rows 相同
+    :param columns: 只在这些列（表头名称或列字母）中查找
+    """
+    header = {}
+    targets = None
+    for row_idx, values in used_rows(rows, max_empty_rows):
+        if row_idx == 1:
+            header = {col_idx: value for col_idx, value in values.items() if value != ""}
+            targets = _resolve_columns(columns, header)
+            continue
+        if targets is None and columns:
+            # 没有表头行时只能按列字母指定
+            targets = _resolve_columns(columns, header)
+        texts = {}
+        cells = []
+        for col_idx, value in sorted(values.items()):
+            text = cell_to_str(value)
+            if text is None:
+                continue
+            texts[col_idx] = text
+            if (targets is None or col_idx in targets) and matcher(value, text):
+                cells.append(f"{column_letter(col_idx)}{row_idx}")
+        if cells:
+            names = header_names(header, max(max(header, default=0), max(texts)))
+            yield {"sheet": name, "row": row_idx, "cells": cells,
+                   "record": {names[col_idx - 1]: text for col_idx, text in texts.items()}}
+
+
+def search_workbook(reader, matcher, sheet=None, columns=None, max_matches=DEFAULT_MAX_MATCHES, block_filter=None):
+    """
+    在全部工作表（或指定的工作表）中查找，找到 max_matches 个匹配行后停止
+
+    :param block_filter: build_block_filter 构造的行块预筛选函数
+    """
+    sheets = ((name, reader.iter_rows(name, block_filter)) for name, _ in reader.select_sheets(sheet))
+    # 预筛选跳过的行不会产出，连续的幻影行计数不再可靠
+    return search_sheets(sheets, matcher, columns, max_matches,
+                         max_empty_rows=MAX_EMPTY_ROWS if block_filter is None else 0)
+
+
+def search_sheets(sheets, matcher, columns=None, max_matches=DEFAULT_MAX_MATCHES, max_empty_rows=MAX_EMPTY_ROWS):
+    """
+    依次在 (名称, 逐行输出) 中查找，返回 {"matches": [...], "limit_reached": 是否因达到上限而提前停止}
+    """
+    max_matches = max(1, min(int(max_matches), MAX_MATCHES_LIMIT))
+    matches = []
+    for name, rows in sheets:
+        found = search_rows(name, rows, matcher, columns, max_empty_rows)
+        try:
+            for match in found:
+                matches.append(match)
+                if len(matches) >= max_matches:
+                    return {"matches": matches, "limit_reached": True}
+        finally:
+            # 提前结束时关闭生成器，停止解压和下载
+            found.close()
+    return {"matches": matches, "limit_reached": False}
@@ -0,0 +1,201 @@
+"""
+工作表概要：一次流式遍历得到结构和统计信息
+
+readExcel 的 summary 模式不返回数据行，而是对每个工作表返回行数、列数，以及每一列的推断
+类型、非空数和空值数、最小值/最大值（数字和日期时间列）、不同值数量的估计值，外加少量
+抽样行。工作流可以先看概要，再决定读取哪个工作表、用哪种输出格式。
+
+内存占用与工作表行数无关：
+- 不同值数量用 HyperLogLog 估计，每列固定 4 KB 的寄存器，相对误差约 1.6%
+- 抽样行用蓄水池抽样，只保留 SAMPLE_ROWS 行；随机数种子固定，同一文件的结果稳定
+
+行、列的范围和空值的判定与 read_sheet_records 一致：首行为表头，默认缺失值字符串视为空值，
+既没有表头也没有值的列不列出，连续过多的幻影行后停止遍历。
+
+本模块只依赖标准库。
+"""
+
+import datetime
+import hashlib
+import math
+import random
+
+from tools.xlsx_reader import MAX_EMPTY_ROWS, cell_to_str, header_names, used_rows
+
+# readExcel 的 output_format 取该值时返回概要
+SUMMARY_FORMAT = "summary"
+# 每个工作表的抽样行数
+SAMPLE_ROWS = 5
+# HyperLogLog 的精度：2^12 个寄存器
+HLL_PRECISION = 12
+SAMPLE_SEED = 0
+
+
+class HyperLogLog:
+    """基数估计：64 位哈希的前 precision 位选择寄存器，其余位中首个 1 的位置更新寄存器"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, text):
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        bits = 64 - self.precision
+        rank = bits - (value & ((1 << bits) - 1)).bit_length() + 1
+        idx = value >> bits
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # 基数较小时改用线性计数
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+def value_kind(value):
+    """单元格值的类型名称"""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return "datetime"
+    if isinstance(value, datetime.time):
+        return "time"
+    if isinstance(value, datetime.timedelta):
+        return "duration"
+    return "string"
+
+
+def column_type(kinds):
+    """由各类型的出现次数推断列的类型：整数和小数混合时为 number，其他组合为 mixed"""
+    if not kinds:
+        return "empty"
+    if set(kinds) <= {"integer", "number"}:
+        return "integer" if "number" not in kinds else "number"
+    return next(iter(kinds)) if len(kinds) == 1 else "mixed"
+
+
+class ColumnStats:
+    __slots__ = ("count", "kinds", "minimum", "maximum", "distinct")
+
+    def __init__(self):
+        self.count = 0
+        self.kinds = {}
+        # 数字和日期时间分别记录最小值、最大值：{"number": 值, "datetime": 值}
+        self.minimum = {}
+        self.maximum = {}
+        self.distinct = HyperLogLog()
+
+    def add(self, value, text):
+        self.count += 1
+        kind = value_kind(value)
+        self.kinds[kind] = self.kinds.get(kind, 0) + 1
+        if kind in ("integer", "number"):
+            self._extend("number", value)
+        elif isinstance(value, datetime.datetime):
+            self._extend("datetime", value)
+        self.distinct.add(text)
+
+    def _extend(self, family, value):
+        if family not in self.minimum or value < self.minimum[family]:
+            self.minimum[family] = value
+        if family not in self.maximum or value > self.maximum[family]:
+            self.maximum[family] = value
+
+    def describe(self, name, rows):
+        kind = column_type(self.kinds)
+        field = {"name": name, "type": kind, "non_null": self.count, "nulls": rows - self.count,
+                 "distinct": min(self.distinct.count(), self.count) if self.count else 0}
+        if len(self.kinds) > 1:
+            field["types"] = dict(sorted(self.kinds.items(), key=lambda item: -item[1]))
+        family = "number" if kind in ("integer", "number") else kind
+        if family in self.minimum:
+            low, high = self.minimum[family], self.maximum[family]
+            if family == "datetime":
+                low, high = low.isoformat(), high.isoformat()
+            field["min"], field["max"] = low, high
+        return field
+
+
+def summarize_rows(name, rows, sample_size=SAMPLE_ROWS, max_empty_rows=MAX_EMPTY_ROWS):
+    """
+    概要统计一个工作表
+
+    :param rows: 逐行产出 (行号, {列号: 值}) 的可迭代对象，与 XlsxReader.iter_rows 相同
+    """
+    header = {}
+    stats = {}
+    sample = []
+    rng = random.Random(SAMPLE_SEED)
+    seen = 0
+    last_row = 0
+    width = 0
+    for row_idx, values in used_rows(rows, max_empty_rows):
+        if row_idx == 1:
+            header = {col_idx: value for col_idx, value in values.items() if value != ""}
+            if header:
+                width = max(width, max(header))
+                last_row = 1
+            continue
+        texts = {}
+        present = False
+        for col_idx, value in values.items():
+            if value == "":
+                continue
+            # 非空单元格决定行宽和数据范围，即使其值按缺失值处理
+            present = True
+            width = max(width, col_idx)
+            text = cell_to_str(value)
+            if text is not None:
+                texts[col_idx] = text
+                column = stats.get(col_idx)
+                if column is None:
+                    column = stats[col_idx] = ColumnStats()
+                column.add(value, text)
+        if not present:
+            continue
+        last_row = max(last_row, row_idx)
+        # 蓄水池抽样
+        seen += 1
+        if len(sample) < sample_size:
+            sample.append((row_idx, texts))
+        else:
+            slot = rng.randrange(seen)
+            if slot < sample_size:
+                sample[slot] = (row_idx, texts)
+
+    columns = header_names(header, width)
+    kept = [col_idx for col_idx in range(1, width + 1) if col_idx in header or col_idx in stats]
+    data_rows = max(0, last_row - 1)
+    fields = [(stats.get(col_idx) or ColumnStats()).describe(columns[col_idx - 1], data_rows)
+              for col_idx in kept]
+    return {
+        "name": name,
+        "rows": data_rows,
+        "columns": len(kept),
+        "fields": fields,
+        "sample": [{columns[col_idx - 1]: texts.get(col_idx) for col_idx in kept}
+                   for _, texts in sorted(sample, key=lambda item: item[0])],
+    }
+
+
+def frame_rows(df):
+    """把 pd.read_excel(header=None) 得到的 DataFrame 转换为与 XlsxReader.iter_rows 相同的逐行输出"""
+    for row_idx, row in enumerate(df.itertuples(index=False, name=None), 1):
+        # NaN、NaT 与自身不相等
+        yield row_idx, {col_idx: value for col_idx, value in enumerate(row, 1)
+                        if value is not None and value == value}
+
+
+def summarize_workbook(reader, sheet=None, sample_size=SAMPLE_ROWS):
+    """概要统计工作簿中的全部工作表，指定 sheet 时只统计该工作表"""
+    return {"sheets": [summarize_rows(name, reader.iter_rows(name), sample_size)
+                       for name, _ in reader.select_sheets(sheet)]}
@@ -0,0 +1,150 @@
+"""
+文本表格输入：CSV / TSV / NDJSON，以及 JSON 的列式数据
+
+writeExcel 除 JSON 外还接受更紧凑的文本格式。输入按行增量解析（CSV/TSV 使用 csv 模块，NDJSON
+每行一个 JSON 对象），直接得到表头和行列表交给流式引擎，不再构建整个 JSON 对象图。
+JSON 输入也可以是列式的（columns + rows 或 {列名: 数组}），不必在每条记录中重复列名，
+同样直接得到表头和行列表。
+
+CSV/TSV 的首行为表头；数字文本转换为数字（有前导零或超过 15 位的整数保持文本，避免编号、
+证件号等丢失前导零或精度），空字段为空单元格。上传的文件按 UTF-8（可带 BOM）读取，
+无法按 UTF-8 解码时按 GB18030 读取。
+
+本模块只依赖标准库。
+"""
+
+import csv
+import io
+import itertools
+import json
+import os
+import re
+
+INPUT_FORMATS = ("json", "csv", "tsv", "ndjson")
+# 上传文件的扩展名 -> 输入格式
+FILE_EXTENSIONS = {".csv": "csv", ".tsv": "tsv", ".tab": "tsv", ".ndjson": "ndjson", ".jsonl": "ndjson",
+                   ".json": "json"}
+# 用于判断编码的文件开头长度
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+_INT_RE = re.compile(r"^[+-]?(?:0|[1-9]\d{0,14})$")
+_FLOAT_RE = re.compile(r"^[+-]?(?:(?:\d+\.\d*|\.\d+)(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+)$")
+
+
+def resolve_input_format(input_format, filename=None):
+    """解析输入格式：auto（默认）时按上传文件的扩展名判断，无法判断时为 json"""
+    fmt = str(input_format or "auto").lower()
+    if fmt == "auto":
+        return FILE_EXTENSIONS.get(os.path.splitext(filename or "")[1].lower(), "json")
+    if fmt not in INPUT_FORMATS:
+        raise ValueError(f"Unsupported input format: {input_format}")
+    return fmt
+
+
+def coerce_value(text):
+    """把 CSV 字段转换为单元格的值：空字段为 None，数字文本转换为数字，其余保持文本"""
+    if text == "":
+        return None
+    if _INT_RE.match(text):
+        return int(text)
+    if _FLOAT_RE.match(text):
+        return float(text)
+    return text
+
+
+def detect_encoding(sample):
+    """UTF-8（含 BOM）解码失败时按 GB18030 处理，中文 Excel 导出的 CSV 常用该编码"""
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # 样本末尾被截断的多字节字符不算解码失败
+        if e.start < len(sample) - 3:
+            return "gb18030"
+    return "utf-8-sig"
+
+
+def open_text(source):
+    """把上传文件（二进制文件对象）包装为逐行读取的文本流"""
+    if isinstance(source, io.RawIOBase):
+        source = io.BufferedReader(source)
+    sample = source.read(ENCODING_SAMPLE_SIZE)
+    source.seek(0)
+    return io.TextIOWrapper(source, encoding=detect_encoding(sample), newline="")
+
+
+def read_delimited(lines, delimiter=","):
+    """逐行解析 CSV/TSV，返回 (表头, 行列表)；字段数多于表头的行视为错误，较短的行其余单元格为空"""
+    reader = csv.reader(lines, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return [], []
+    rows = []
+    for row in reader:
+        if not row:
+            continue
+        if len(row) > len(header):
+            raise ValueError(f"line {reader.line_num} has {len(row)} fields but the header has only {len(header)}")
+        rows.append([coerce_value(field) for field in row])
+    return header, rows
+
+
+def read_ndjson(lines):
+    """逐行解析 NDJSON，返回 (表头, 行列表)；列顺序为各键首次出现的顺序，与 JSON 数组输入一致"""
+    index = {}
+    columns = []
+    rows = []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {line_no}: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"line {line_no}: expected a JSON object")
+        row = [None] * len(columns)
+        for key, value in record.items():
+            idx = index.get(key)
+            if idx is None:
+                idx = index[key] = len(columns)
+                columns.append(key)
+                row.append(None)
+            row[idx] = value
+        rows.append(row)
+    return columns, rows
+
+
+def columnar_table(data):
+    """
+    识别列式的 JSON 数据，返回 (表头, 行列表)；不是列式数据时返回 None
+
+    - {"columns": [...], "rows": [[...], ...]}：行按位置对应列，较短的行其余单元格为空
+    - {"列名": [...], ...}：每个键对应一列，各列长度不同时较短的列以空值补齐
+    """
+    if not isinstance(data, dict) or not data:
+        return None
+    if data.keys() == {"columns", "rows"} and isinstance(data["columns"], list) \
+            and isinstance(data["rows"], list):
+        columns = data["columns"]
+        rows = data["rows"]
+        for idx, row in enumerate(rows):
+            if not isinstance(row, list):
+                raise ValueError(f"rows[{idx}]: expected an array")
+            if len(row) > len(columns):
+                raise ValueError(f"rows[{idx}] has {len(row)} values but there are only {len(columns)} columns")
+        return columns, rows
+    if all(isinstance(values, list) for values in data.values()):
+        return list(data), [list(row) for row in itertools.zip_longest(*data.values())]
+    return None
+
+
+def read_table(lines, input_format):
+    """按输入格式解析逐行文本，返回 (表头, 行列表)"""
+    if input_format == "csv":
+        return read_delimited(lines, ",")
+    if input_format == "tsv":
+        return read_delimited(lines, "\t")
+    if input_format == "ndjson":
+        return read_ndjson(lines)
+    raise ValueError(f"Unsupported input format: {input_format}")
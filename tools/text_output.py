@@ -0,0 +1,88 @@
+"""
+readExcel 的输出编码：records / split JSON / Markdown 表格 / CSV
+
+records 格式在每一行中重复全部列名，宽表的输出字节数和下游模型的 token 数成倍增加。
+其余格式只写一次列名：
+    split     {"columns": [...], "rows": [[...], ...]}，与 writeExcel 的列式输入格式相同
+    markdown  Markdown 表格，空值为空单元格，"|" 转义、换行替换为 <br>
+    csv       首行为表头，空值为空字段
+
+编码器逐行产出文本片段，不构建中间的记录列表。本模块只依赖标准库。
+"""
+
+import csv
+import io
+import json
+
+OUTPUT_FORMATS = ("records", "split", "markdown", "csv")
+# 每个片段包含的行数
+CHUNK_ROWS = 1000
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def resolve_output_format(output_format):
+    fmt = str(output_format or "records").lower()
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    return fmt
+
+
+def _chunks(rows, encode_row, separator=""):
+    """每 CHUNK_ROWS 行拼接为一个片段"""
+    batch = []
+    for row in rows:
+        batch.append(encode_row(row))
+        if len(batch) >= CHUNK_ROWS:
+            yield separator.join(batch)
+            batch = []
+    if batch:
+        yield separator.join(batch)
+
+
+def _json_array(chunks):
+    """把逗号分隔的片段包成 JSON 数组"""
+    yield "["
+    for idx, chunk in enumerate(chunks):
+        yield chunk if idx == 0 else "," + chunk
+    yield "]"
+
+
+def _markdown_cell(value):
+    if value is None:
+        return ""
+    text = str(value).replace("\\", "\\\\").replace("|", "\\|")
+    return text.replace("\r\n", "<br>").replace("\n", "<br>").replace("\r", "<br>")
+
+
+def _markdown_row(values):
+    return "| " + " | ".join(_markdown_cell(value) for value in values) + " |\n"
+
+
+def encode_records(columns, rows, output_format="records"):
+    """逐片段产出编码后的文本；rows 可以是任意可迭代对象，值为字符串或 None"""
+    fmt = resolve_output_format(output_format)
+    if fmt == "records":
+        yield from _json_array(_chunks(rows, lambda row: _dumps(dict(zip(columns, row))), ","))
+    elif fmt == "split":
+        yield '{"columns":' + _dumps(list(columns)) + ',"rows":'
+        yield from _json_array(_chunks(rows, _dumps, ","))
+        yield "}"
+    elif fmt == "markdown":
+        yield _markdown_row(columns) + "|" + " --- |" * len(columns) + "\n"
+        yield from _chunks(rows, _markdown_row)
+    else:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= 1 << 16:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+
+def encode_text(columns, rows, output_format="records"):
+    return "".join(encode_records(columns, rows, output_format))
@@ -0,0 +1,96 @@
+"""
+启动预热
+
+pandas 和 openpyxl 在所选引擎首次用到时才导入，插件进程可以更快地开始接收请求；代价是
+第一个请求要承担导入和初始化的开销。部署方可以在启动时执行预热，把这部分开销提前：
+
+- imports：导入 pandas 和 openpyxl 中 openpyxl 引擎用到的模块
+- styles：用两种引擎各生成一个带样式的小工作簿，提前完成默认样式表的构建，以及首次调用
+  时才进行的模块导入和正则编译
+- pools：创建工作池并启动全部线程
+
+通过环境变量 EXCEL_TOOL_WARMUP 配置：未设置、"0" 或 "off" 时不预热；"1"、"on" 或 "all"
+时执行全部步骤；也可以用逗号分隔指定部分步骤，例如 "imports,pools"。
+"""
+
+import json
+import logging
+import os
+import time
+from io import BytesIO
+
+logger = logging.getLogger("excel_tool.warmup")
+
+WARMUP = os.environ.get("EXCEL_TOOL_WARMUP", "")
+WARMUP_STEPS = ("imports", "styles", "pools")
+
+
+def parse_steps(value):
+    """解析预热配置，返回要执行的步骤；无法识别的步骤打印警告后忽略"""
+    value = str(value or "").strip().lower()
+    if value in ("", "0", "off", "false"):
+        return []
+    if value in ("1", "on", "all", "true"):
+        return list(WARMUP_STEPS)
+    steps = []
+    for step in (part.strip() for part in value.split(",")):
+        if step in WARMUP_STEPS:
+            if step not in steps:
+                steps.append(step)
+        elif step:
+            print(f"Warning: Unknown warm-up step '{step}' ignored")
+    return steps
+
+
+def _warm_imports():
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    import openpyxl.formatting.rule  # noqa: F401
+    import openpyxl.styles  # noqa: F401
+    import openpyxl.utils.dataframe  # noqa: F401
+    import openpyxl.worksheet.merge  # noqa: F401
+    import openpyxl.worksheet.table  # noqa: F401
+
+
+def _warm_styles():
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    from tools.xlsx_stream import XlsxStreamWriter
+
+    wb = Workbook()
+    cell = wb.active.cell(row=1, column=1, value="warm-up")
+    cell.font = Font(bold=True)
+    cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    cell.border = Border(left=Side(style="thin"))
+    cell.alignment = Alignment(horizontal="center")
+    wb.save(BytesIO())
+
+    format_config = {"cells": {"1,1": {"font": {"bold": True}, "background_color": "366092"}}}
+    XlsxStreamWriter(format_config).write(BytesIO(), ["warm-up"], [[1]])
+
+
+def _warm_pools():
+    from tools.pipeline import worker_pool
+    worker_pool.prestart()
+
+
+_STEP_FUNCS = {"imports": _warm_imports, "styles": _warm_styles, "pools": _warm_pools}
+
+
+def warm_up(steps=None):
+    """
+    按配置执行预热步骤，返回 {步骤: 耗时毫秒}
+
+    :param steps: 步骤列表；为 None 时读取 EXCEL_TOOL_WARMUP
+    """
+    if steps is None:
+        steps = parse_steps(WARMUP)
+    timings = {}
+    for step in steps:
+        start = time.perf_counter()
+        _STEP_FUNCS[step]()
+        timings[step] = round((time.perf_counter() - start) * 1000, 3)
+    if timings:
+        logger.info(json.dumps({"warmup_ms": timings}))
+    return timings
@@ -4,82 +4,387 @@ from typing import Any
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
-import pandas as pd
 from io import StringIO, BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.utils import get_column_letter, column_index_from_string
 import json
+import os
+import zipfile
+from copy import copy
+
+from tools.column_types import convert_value, resolve_column_formats, table_options
+from tools.column_width import auto_width_options, compute_column_widths, sized_cell_values
+from tools.conditional_format import parse_conditional_formats
+from tools.guardrails import DEFAULT_LIMITS, InputTooLargeError, check_payload, check_read, plan_write, table_shape
+from tools.http_client import open_remote
+from tools.merge_planner import plan_merges
+from tools.output_cache import canonical_json, output_cache, request_key
+from tools.pipeline import estimate_read_cost, estimate_write_cost, run_blocking
+from tools.profiling import NULL_PROFILER, PSTATS_MIME_TYPE, PhaseProfiler, debug_mode, run_profiled
+from tools.text_input import columnar_table, open_text, read_table, resolve_input_format
+from tools.xlsx_patch import XlsxPatcher
+from tools.xlsx_stream import (DOC_CREATOR, FIXED_TIMESTAMP, ReproducibleZipFile, XlsxStreamWriter, parse_cell_key,
+                               resolve_cell_formats, resolve_workers, sheet_title)
 
 class WriteExcelTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
-        json_str = tool_parameters['json_str']
+        json_str = tool_parameters.get('json_str') or ''
+        # 大小上限和统计中的 input_bytes 都按 UTF-8 字节数计算，与上传文件的 size 一致
+        payload_size = len(json_str.encode('utf-8'))
         filename = tool_parameters.get('filename', 'Formatted Data')
-        debug = tool_parameters.get('debug', False)
-        excel_bytes, filename_with_ext = self.generate_excel_bytes(json_str, filename)
-        if debug:
+        base_file = tool_parameters.get('base_file')
+        data_file = tool_parameters.get('data_file')
+        debug = debug_mode(tool_parameters.get('debug', False))
+        profiler = PhaseProfiler(enabled=bool(tool_parameters.get('profile', False)))
+        pstats_bytes = None
+        diagnostics = {}
+        cache_key = None
+        # 生成过程在有界工作池中执行，并按预估内存开销排队，避免大请求阻塞或挤爆插件进程
+        try:
+            # 超出上限的输入在排队和解析之前拒绝
+            try:
+                check_payload(payload_size)
+            except InputTooLargeError as e:
+                action = "updating" if base_file is not None else "creating"
+                raise Exception(f"Error {action} Excel file: {str(e)}")
+            if base_file is not None:
+                # 增量更新模式：在上传的工作簿上追加行或修改区域，默认沿用原文件名
+                if not tool_parameters.get('filename'):
+                    filename = os.path.splitext(getattr(base_file, 'filename', None) or 'Formatted Data')[0]
+                base_size = getattr(base_file, 'size', None)
+                try:
+                    check_read(base_size)
+                except InputTooLargeError as e:
+                    raise Exception(f"Error updating Excel file: {str(e)}")
+                with profiler.phase('download'):
+                    try:
+                        source = open_remote(base_file.url, base_size)
+                    except Exception as e:
+                        raise Exception(f"Error updating Excel file: {str(e)}")
+                func, args = self.update_excel_bytes, (json_str, source, filename, profiler)
+                cost = estimate_write_cost(json_str) + estimate_read_cost(base_size)
+            elif data_file is not None:
+                # 从上传的 CSV/TSV/NDJSON/JSON 文件读取数据，格式默认按扩展名判断
+                input_format = resolve_input_format(tool_parameters.get('input_format'),
+                                                    getattr(data_file, 'filename', None))
+                data_size = getattr(data_file, 'size', None)
+                try:
+                    check_payload(data_size)
+                except InputTooLargeError as e:
+                    raise Exception(f"Error reading input file: {str(e)}")
+                with profiler.phase('download'):
+                    try:
+                        source = open_remote(data_file.url, data_size)
+                    except Exception as e:
+                        raise Exception(f"Error reading input file: {str(e)}")
+                func, args = self.generate_excel_bytes, (json_str, filename, profiler, diagnostics, input_format,
+                                                         source)
+                cost = estimate_write_cost(json_str) + estimate_read_cost(data_size)
+            else:
+                input_format = resolve_input_format(tool_parameters.get('input_format'))
+                func, args = self.generate_excel_bytes, (json_str, filename, profiler, diagnostics, input_format)
+                cost = estimate_write_cost(json_str)
+                if output_cache.enabled and debug != 'cprofile':
+                    # 结果只取决于参数和引擎阈值，重复的请求直接返回之前生成的内容；JSON 按规范形式计算，
+                    # CSV、TSV 和 NDJSON 中的空白可能是数据的一部分，按原文计算
+                    key_input = canonical_json(json_str) if input_format == 'json' else json_str
+                    cache_key = request_key(key_input, filename, input_format, vars(DEFAULT_LIMITS))
+            cached = None
+            if cache_key is not None:
+                with profiler.phase('cache'):
+                    cached = output_cache.get(cache_key)
+            if cached is not None:
+                excel_bytes, meta = cached
+                filename_with_ext = meta['filename']
+                diagnostics.update(meta['diagnostics'], cache='hit')
+            elif debug == 'cprofile':
+                (excel_bytes, filename_with_ext), pstats_bytes = run_blocking(run_profiled, func, *args, cost=cost)
+            else:
+                excel_bytes, filename_with_ext = run_blocking(func, *args, cost=cost)
+                if cache_key is not None:
+                    output_cache.put(cache_key, excel_bytes, {'filename': filename_with_ext,
+                                                              'diagnostics': dict(diagnostics)})
+                    diagnostics['cache'] = 'miss'
+        except Exception:
+            profiler.close()
+            raise
+        if debug == 'save':
             with open(filename_with_ext, "wb") as f:
                 f.write(excel_bytes)
             yield self.create_text_message(f"[DEBUG] Excel file '{filename_with_ext}' saved to local directory.")
-        yield self.create_text_message(f"Excel file '{filename_with_ext}' generated successfully with formatting and merged cells")
-        yield self.create_blob_message(
-            blob=excel_bytes,
-            meta={
-                "mime_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                "filename": filename_with_ext
-            }
-        )
-
-    def generate_excel_bytes(self, jsonData: str, filename: str = "Formatted Data"):
-        """生成Excel二进制内容和最终文件名"""
+        if pstats_bytes is not None:
+            stats_filename = f"{filename_with_ext[:-len('.xlsx')]}.pstats"
+            yield self.create_text_message(f"[DEBUG] cProfile stats attached as '{stats_filename}'.")
+            yield self.create_blob_message(
+                blob=pstats_bytes,
+                meta={"mime_type": PSTATS_MIME_TYPE, "filename": stats_filename}
+            )
+        with profiler.phase('emit'):
+            messages = [
+                self.create_text_message(
+                    f"Excel file '{filename_with_ext}' updated successfully" if base_file is not None else
+                    f"Excel file '{filename_with_ext}' generated successfully with formatting and merged cells"),
+                self.create_blob_message(
+                    blob=excel_bytes,
+                    meta={
+                        "mime_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        "filename": filename_with_ext
+                    }
+                ),
+            ]
+        yield from messages
+        if diagnostics.get('merge_conflicts'):
+            # 被跳过的合并范围以结构化的 JSON 返回，便于调用方修正配置
+            yield self.create_text_message(json.dumps(
+                {"merge_conflicts": diagnostics['merge_conflicts']}, ensure_ascii=False))
+        if profiler.enabled:
+            yield self.create_text_message(
+                profiler.finish(tool="writeExcel", input_bytes=payload_size, output_bytes=len(excel_bytes),
+                                engine=diagnostics.get('engine'), cache=diagnostics.get('cache')))
+
+    def generate_excel_bytes(self, jsonData: str, filename: str = "Formatted Data", profiler=NULL_PROFILER,
+                             diagnostics=None, input_format="json", data_source=None):
+        """
+        生成Excel二进制内容和最终文件名
+
+        profiler 用于记录各阶段耗时和内存；传入字典 diagnostics 时，被跳过的合并范围写入其中的 merge_conflicts，
+        选定的引擎写入 engine。未指定 format.engine 时按数据规模选择引擎，见 tools/guardrails.py。
+        input_format 为 csv/tsv/ndjson 时 jsonData 为对应格式的文本；传入上传的文件 data_source 时从文件读取
+        数据，jsonData 可以为空或 {"format": {...}} 形式的格式配置
+        """
+        caller_format = {}
+        if data_source is not None and input_format == 'json':
+            # json_str 中的格式配置合并到上传的 JSON 文档中，同名的配置项以 json_str 为准
+            caller_format = self._format_from_config(jsonData)
+            jsonData = open_text(data_source).read()
+        elif data_source is not None or input_format != 'json':
+            return self._generate_from_text(jsonData, filename, profiler, diagnostics, input_format, data_source)
         try:
-            data = json.loads(jsonData)
+            with profiler.phase('parse'):
+                data = json.loads(jsonData)
+            if caller_format:
+                data = self._merge_format(data, caller_format)
             if isinstance(data, dict) and 'data' in data and 'format' in data:
                 df_data = data['data']
                 format_config = data.get('format', {})
-                if isinstance(df_data, list):
-                    df = pd.DataFrame(df_data)
-                elif isinstance(df_data, dict):
-                    df = pd.DataFrame([df_data])
-                else:
-                    df = pd.DataFrame(df_data)
+            elif isinstance(data, dict) and 'columns' in data and 'rows' in data:
+                # 列式输入：{"columns": [...], "rows": [[...]], "format": {...}}
+                df_data = {'columns': data['columns'], 'rows': data['rows']}
+                format_config = data.get('format') or {}
             else:
-                if isinstance(data, list):
-                    df = pd.DataFrame(data)
-                elif isinstance(data, dict):
-                    df = pd.DataFrame([data])
-                else:
-                    df = pd.DataFrame(data)
+                df_data = data
                 format_config = {}
+            # 列式数据直接得到表头和行列表，不再逐条处理记录字典
+            table = columnar_table(df_data)
+        except Exception as e:
+            raise Exception(f"Error parsing JSON string: {str(e)}")
+
+        workers = format_config.get('workers', 1)
+        # 按规模选择引擎：小表格使用 openpyxl，大表格或指定多个并行进程时使用流式引擎
+        rows, columns = (len(table[1]), len(table[0])) if table else table_shape(df_data)
+        try:
+            plan = plan_write(len(jsonData.encode('utf-8')), rows, columns, format_config, resolve_workers(workers))
+        except InputTooLargeError as e:
+            raise Exception(f"Error creating Excel file: {str(e)}")
+        engine = plan.engine
+        if diagnostics is not None:
+            diagnostics['engine'] = engine
+        if engine == 'stream' and table:
+            excel_bytes, merge_conflicts = self._write_stream(*table, format_config, workers, profiler)
+        elif engine == 'stream':
+            excel_bytes, merge_conflicts = self._generate_with_stream(df_data, format_config, workers, profiler)
+        else:
+            excel_bytes, merge_conflicts = self._generate_with_openpyxl(df_data, format_config, profiler, table)
+        if diagnostics is not None and merge_conflicts:
+            diagnostics['merge_conflicts'] = merge_conflicts
+        filename_with_ext = f"{filename.replace(' ', '_')}.xlsx"
+        return excel_bytes, filename_with_ext
+
+    @staticmethod
+    def _format_from_config(jsonData):
+        """上传数据文件时 json_str 中 {"format": {...}} 形式的格式配置，json_str 为空时返回空字典"""
+        try:
+            if jsonData and jsonData.strip():
+                config = json.loads(jsonData)
+                return (config.get('format') or {}) if isinstance(config, dict) else {}
+        except Exception as e:
+            raise Exception(f"Error parsing JSON string: {str(e)}")
+        return {}
+
+    @staticmethod
+    def _merge_format(data, caller_format):
+        """把格式配置合并到 JSON 文档中：文档自带 format 时逐项合并，否则包装为 {"data", "format"}"""
+        if isinstance(data, dict) and ('data' in data or data.keys() >= {'columns', 'rows'}):
+            return dict(data, format={**(data.get('format') or {}), **caller_format})
+        return {'data': data, 'format': caller_format}
+
+    def _generate_from_text(self, jsonData, filename, profiler, diagnostics, input_format, data_source):
+        """逐行解析 CSV/TSV/NDJSON 输入，直接交给流式引擎写出"""
+        format_config = self._format_from_config(jsonData) if data_source is not None else {}
+        try:
+            with profiler.phase('parse'):
+                lines = open_text(data_source) if data_source is not None else StringIO(jsonData or "", newline="")
+                columns, rows = read_table(lines, input_format)
+        except Exception as e:
+            raise Exception(f"Error parsing {input_format.upper()} data: {str(e)}")
+        try:
+            # 文本输入始终使用流式引擎，这里只检查规模
+            plan_write(len((jsonData or "").encode('utf-8')), len(rows), len(columns), format_config)
+        except InputTooLargeError as e:
+            raise Exception(f"Error creating Excel file: {str(e)}")
+        if diagnostics is not None:
+            diagnostics['engine'] = 'stream'
+        excel_bytes, merge_conflicts = self._write_stream(columns, rows, format_config,
+                                                          format_config.get('workers', 1), profiler)
+        if diagnostics is not None and merge_conflicts:
+            diagnostics['merge_conflicts'] = merge_conflicts
+        return excel_bytes, f"{filename.replace(' ', '_')}.xlsx"
+
+    def update_excel_bytes(self, jsonData: str, source, filename: str = "Formatted Data", profiler=NULL_PROFILER):
+        """
+        在已有工作簿上追加行或修改区域，返回更新后的内容和文件名
+
+        jsonData 为数据数组时追加到第一个工作表；为对象时支持 data（追加的行）、patches
+        （[{"range": "B5", "values": ...}]）和 sheet（工作表名称或序号）。追加的行写在最后一个有值的行和
+        patches 修改过的行之后
+        """
+        try:
+            with profiler.phase('parse'):
+                data = json.loads(jsonData)
+            if isinstance(data, dict) and ('data' in data or 'patches' in data):
+                rows = data.get('data') or []
+                patches = data.get('patches') or []
+                sheet = data.get('sheet')
+            else:
+                rows, patches, sheet = data, [], None
+            if isinstance(rows, dict):
+                rows = [rows]
+        except Exception as e:
+            raise Exception(f"Error parsing JSON string: {str(e)}")
+
+        excel_buffer = BytesIO()
+        try:
+            with XlsxPatcher(source, sheet) as patcher:
+                with profiler.phase('cell_write'):
+                    patcher.append(rows)
+                    for patch in patches:
+                        patcher.patch(patch.get('range'), patch.get('values', patch.get('value')))
+                with profiler.phase('serialize'):
+                    patcher.write(excel_buffer)
+        except Exception as e:
+            raise Exception(f"Error updating Excel file: {str(e)}")
+        return excel_buffer.getvalue(), f"{filename.replace(' ', '_')}.xlsx"
+
+    def _build_dataframe(self, df_data, table=None):
+        """将 JSON 数据转换为 DataFrame，table 为列式数据解析出的 (表头, 行列表)"""
+        # pandas 和 openpyxl 在所选引擎首次用到时才导入，缩短插件冷启动时间
+        import pandas as pd
+        try:
+            if table is not None:
+                return pd.DataFrame(table[1], columns=table[0])
+            elif isinstance(df_data, list):
+                return pd.DataFrame(df_data)
+            elif isinstance(df_data, dict):
+                return pd.DataFrame([df_data])
+            else:
+                return pd.DataFrame(df_data)
         except Exception as e:
             raise Exception(f"Error parsing JSON string: {str(e)}")
 
+    def _records_to_rows(self, df_data):
+        """将 JSON 数据转换为表头和行列表（流式引擎使用，记录为字典时不经过 DataFrame）"""
+        records = [df_data] if isinstance(df_data, dict) else df_data
+        if isinstance(records, list) and all(isinstance(record, dict) for record in records):
+            # 列顺序与 pd.DataFrame 一致：按各键首次出现的顺序
+            columns = list(dict.fromkeys(key for record in records for key in record))
+            rows = [[record.get(column) for column in columns] for record in records]
+            return columns, rows
+        df = self._build_dataframe(df_data)
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+        return list(df.columns), rows
+
+    def _generate_with_openpyxl(self, df_data, format_config, profiler=NULL_PROFILER, table=None):
+        """使用 openpyxl 内存工作簿生成 Excel，返回 (内容, 被跳过的合并范围)"""
+        from openpyxl import Workbook
+        from openpyxl.utils import column_index_from_string
+        from openpyxl.utils.dataframe import dataframe_to_rows
+
+        with profiler.phase('frame_build'):
+            df = self._build_dataframe(df_data, table)
         excel_buffer = BytesIO()
         try:
             wb = Workbook()
             ws = wb.active
+            ws.title = sheet_title(format_config.get('sheet_name'))
             show_header = format_config.get('show_header', True)
             # 获取开始行配置，默认为第1行
             start_row = format_config.get('start_row', 1)
-            for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=show_header), start_row):
-                for c_idx, value in enumerate(row, 1):
-                    cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                    self._apply_cell_format(cell, format_config, r_idx, c_idx)
-            self._apply_column_width(ws, format_config)
-            self._apply_row_height(ws, format_config)
-            self._apply_merge_cells(ws, format_config)
-            wb.save(excel_buffer)
-            excel_buffer.seek(0)
+            end_row = start_row - 1
+            data_first_row = start_row + 1 if show_header else start_row
+            table = self._table_options(format_config, show_header, len(df.columns))
+            column_formats = resolve_column_formats(
+                format_config.get('column_formats'), [str(col) for col in df.columns], column_index_from_string
+            )
+            converters = {col_idx: dtype for col_idx, (dtype, _) in column_formats.items() if dtype}
+            with profiler.phase('cell_write'):
+                for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=show_header), start_row):
+                    for c_idx, value in enumerate(row, 1):
+                        if r_idx < data_first_row:
+                            # 表格的列名必须是字符串
+                            value = str(value) if table else value
+                        elif converters and c_idx in converters:
+                            value = convert_value(value, converters[c_idx])
+                        ws.cell(row=r_idx, column=c_idx, value=value)
+                    end_row = r_idx
+            with profiler.phase('styling'):
+                self._apply_column_formats(ws, column_formats, data_first_row, end_row, len(df.columns))
+                self._apply_cell_formats(ws, format_config)
+                self._apply_conditional_formats(ws, format_config, data_first_row, end_row)
+                if table:
+                    self._apply_table(ws, table, start_row, end_row, len(df.columns))
+            with profiler.phase('dimensions'):
+                self._apply_auto_width(ws, df, format_config, start_row, show_header)
+                self._apply_column_width(ws, format_config)
+                self._apply_row_height(ws, format_config)
+            with profiler.phase('merges'):
+                merge_plan = self._apply_merge_cells(ws, format_config)
+            with profiler.phase('serialize'):
+                self._save_workbook(wb, excel_buffer)
+                excel_buffer.seek(0)
         except Exception as e:
             raise Exception(f"Error creating Excel file: {str(e)}")
-        filename_with_ext = f"{filename.replace(' ', '_')}.xlsx"
-        return excel_buffer.getvalue(), filename_with_ext
+        return excel_buffer.getvalue(), merge_plan.conflicts
+
+    def _save_workbook(self, wb, output):
+        """
+        与 wb.save 相同，但 docProps 和 zip 成员使用固定的时间戳，相同的输入得到逐字节相同的输出
+        """
+        from openpyxl.writer.excel import ExcelWriter
+
+        wb.properties.created = wb.properties.modified = FIXED_TIMESTAMP
+        wb.properties.creator = DOC_CREATOR
+        archive = ReproducibleZipFile(output, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        ExcelWriter(wb, archive).save()
+
+    def _generate_with_stream(self, df_data, format_config, workers=1, profiler=NULL_PROFILER):
+        """使用流式引擎生成 Excel，workers > 1 时多进程并行序列化工作表，返回 (内容, 被跳过的合并范围)"""
+        with profiler.phase('frame_build'):
+            columns, rows = self._records_to_rows(df_data)
+        return self._write_stream(columns, rows, format_config, workers, profiler)
+
+    def _write_stream(self, columns, rows, format_config, workers=1, profiler=NULL_PROFILER):
+        """把表头和行列表交给流式引擎写出，返回 (内容, 被跳过的合并范围)"""
+        excel_buffer = BytesIO()
+        try:
+            writer = XlsxStreamWriter(format_config, workers=workers, profiler=profiler)
+            writer.write(excel_buffer, columns, rows)
+        except Exception as e:
+            raise Exception(f"Error creating Excel file: {str(e)}")
+        return excel_buffer.getvalue(), writer.merge_conflicts
     
     def _normalize_cell_key(self, row_idx, col_idx):
         """标准化单元格键，支持字母和数字两种列索引格式"""
         # 如果col_idx是字符串（字母格式），转换为数字
         if isinstance(col_idx, str):
+            from openpyxl.utils import column_index_from_string
             try:
                 col_num = column_index_from_string(col_idx.upper())
                 return f"{row_idx},{col_num}"
@@ -90,13 +395,99 @@ class WriteExcelTool(Tool):
             # 如果col_idx是数字，直接使用
             return f"{row_idx},{col_idx}"
     
-    def _apply_cell_format(self, cell, format_config, row_idx, col_idx):
-        """应用单元格格式"""
-        # 标准化单元格键，支持字母和数字两种列索引格式
-        cell_key = self._normalize_cell_key(row_idx, col_idx)
-        
-        # 获取单元格特定的格式配置
-        cell_format = format_config.get('cells', {}).get(cell_key, {})
+    def _table_options(self, format_config, show_header, ncols):
+        """解析 format.table，不写表头时无法创建表格"""
+        options = table_options(format_config.get('table'))
+        if options is not None and not (show_header and ncols):
+            print("Warning: format.table requires show_header, table skipped")
+            return None
+        return options
+
+    def _apply_column_formats(self, ws, column_formats, first_row, last_row, ncols):
+        """应用列级数字格式：每列只在第一个非空单元格上设置一次，其余单元格复用同一份样式"""
+        for col_idx, (_, number_format) in column_formats.items():
+            if not number_format or col_idx > ncols:
+                continue
+            template = None
+            for (cell,) in ws.iter_rows(min_row=first_row, max_row=last_row, min_col=col_idx, max_col=col_idx):
+                if cell.value is None:
+                    continue
+                if template is None:
+                    cell.number_format = number_format
+                    template = cell._style
+                else:
+                    cell._style = copy(template)
+
+    def _apply_conditional_formats(self, ws, format_config, first_row, last_row):
+        """应用条件格式：按区域添加规则，由 Excel 在打开时计算，不逐个单元格设置样式"""
+        from openpyxl.formatting.rule import CellIsRule, ColorScaleRule, DataBarRule, FormulaRule
+
+        rules = parse_conditional_formats(format_config.get('conditional_formats'), first_row, last_row)
+        for rule in rules:
+            if rule['type'] == 'cell':
+                cf_rule = CellIsRule(operator=rule['operator'], formula=rule['formulas'], stopIfTrue=rule['stop'],
+                                     **self._differential_style(rule['format']))
+            elif rule['type'] == 'formula':
+                cf_rule = FormulaRule(formula=rule['formulas'], stopIfTrue=rule['stop'],
+                                      **self._differential_style(rule['format']))
+            elif rule['type'] == 'color_scale':
+                start_color, *mid_color, end_color = rule['colors']
+                mid = {'mid_type': 'percentile', 'mid_value': 50, 'mid_color': mid_color[0]} if mid_color else {}
+                cf_rule = ColorScaleRule(start_type='min', start_color=start_color,
+                                         end_type='max', end_color=end_color, **mid)
+            else:
+                cf_rule = DataBarRule(start_type='min', end_type='max', color=rule['color'])
+            ws.conditional_formatting.add(rule['ref'], cf_rule)
+
+    def _differential_style(self, cell_format):
+        """条件格式的差异样式：只包含配置中出现的字体、背景和边框"""
+        from openpyxl.styles import Border, Font, PatternFill, Side
+
+        style = {}
+        font_config = cell_format.get('font')
+        if isinstance(font_config, dict):
+            style['font'] = Font(bold=font_config.get('bold', False), italic=font_config.get('italic', False),
+                                 color=font_config.get('color'))
+        if 'background_color' in cell_format:
+            style['fill'] = PatternFill(start_color=cell_format['background_color'],
+                                        end_color=cell_format['background_color'], fill_type='solid')
+        border_config = cell_format.get('border')
+        if isinstance(border_config, dict):
+            style['border'] = Border(**{side: Side(style=border_config.get(side, 'thin'))
+                                        for side in ('left', 'right', 'top', 'bottom')})
+        return style
+
+    def _apply_table(self, ws, table, start_row, end_row, ncols):
+        """把数据区（含表头）注册为 Excel 表格"""
+        from openpyxl.utils import get_column_letter
+        from openpyxl.worksheet.table import Table, TableStyleInfo
+
+        # 表格至少包含表头和一行数据
+        ref = f"A{start_row}:{get_column_letter(ncols)}{max(end_row, start_row + 1)}"
+        style = TableStyleInfo(name=table['style'], showFirstColumn=False, showLastColumn=False,
+                               showRowStripes=table['show_row_stripes'],
+                               showColumnStripes=table['show_column_stripes'])
+        ws.add_table(Table(displayName=table['name'], ref=ref, tableStyleInfo=style))
+
+    def _apply_cell_formats(self, ws, format_config):
+        """
+        只遍历 format.cells 中配置的单元格并应用格式，与流式引擎语义一致：列索引支持字母和数字，
+        数据区之外（start_row 之前、最后一行之后或超出列数）的单元格同样应用格式
+        """
+        for (row_idx, col_idx), cell_format in resolve_cell_formats(format_config.get('cells')).items():
+            self._apply_cell_format(ws.cell(row=row_idx, column=col_idx), format_config, row_idx, col_idx,
+                                    cell_format)
+
+    def _apply_cell_format(self, cell, format_config, row_idx, col_idx, cell_format=None):
+        """应用单元格格式；未给出 cell_format 时按 "行,列" 键从 format.cells 中查找"""
+        from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+        if cell_format is None:
+            # 标准化单元格键，支持字母和数字两种列索引格式
+            cell_key = self._normalize_cell_key(row_idx, col_idx)
+
+            # 获取单元格特定的格式配置
+            cell_format = format_config.get('cells', {}).get(cell_key, {})
         
         # 字体设置
         if 'font' in cell_format:
@@ -142,6 +533,8 @@ class WriteExcelTool(Tool):
     
     def _normalize_column_index(self, col_idx):
         """标准化列索引，支持字母和数字两种格式"""
+        from openpyxl.utils import get_column_letter
+
         if isinstance(col_idx, str):
             # 如果已经是字母格式，直接返回
             if col_idx.isalpha():
@@ -155,6 +548,29 @@ class WriteExcelTool(Tool):
             # 如果是数字，转换为字母
             return get_column_letter(col_idx)
     
+    def _apply_auto_width(self, ws, df, format_config, start_row, show_header):
+        """按内容自动设置列宽（format.auto_width），之后 column_widths 中显式指定的列宽会覆盖"""
+        from openpyxl.utils import get_column_letter
+
+        options = auto_width_options(format_config.get('auto_width'))
+        if options is None:
+            return
+
+        def value_at(row_idx, col_idx):
+            # 取类型转换之前的值，与流式引擎一致
+            offset = row_idx - start_row - (1 if show_header else 0)
+            if not 1 <= col_idx <= len(df.columns) or offset < -1 or offset >= len(df):
+                return None
+            if offset == -1:
+                return df.columns[col_idx - 1] if show_header else None
+            return df.iat[offset, col_idx - 1]
+
+        sized = sized_cell_values(format_config.get('cells'), parse_cell_key, value_at)
+        columns = [str(col) for col in df.columns] if show_header else []
+        column_values = [df.iloc[:, idx].tolist() for idx in range(len(df.columns))]
+        for col_idx, width in compute_column_widths(columns, column_values, options, sized).items():
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+
     def _apply_column_width(self, ws, format_config):
         """应用列宽设置"""
         column_widths = format_config.get('column_widths', {})
@@ -170,24 +586,14 @@ class WriteExcelTool(Tool):
             ws.row_dimensions[int(row_num)].height = height
     
     def _apply_merge_cells(self, ws, format_config):
-        """应用合并单元格设置"""
-        merge_cells = format_config.get('merge_cells', [])
-        for merge_range in merge_cells:
-            try:
-                # 支持多种格式的合并范围
-                if isinstance(merge_range, str):
-                    # 格式: "A1:B2"
-                    ws.merge_cells(merge_range)
-                elif isinstance(merge_range, dict):
-                    # 格式: {"start": "A1", "end": "B2"}
-                    start = merge_range.get('start')
-                    end = merge_range.get('end')
-                    if start and end:
-                        ws.merge_cells(f"{start}:{end}")
-                elif isinstance(merge_range, list) and len(merge_range) == 2:
-                    # 格式: ["A1", "B2"]
-                    start, end = merge_range
-                    ws.merge_cells(f"{start}:{end}")
-            except Exception as e:
-                print(f"Warning: Failed to merge cells {merge_range}: {str(e)}")
-                continue
\ No newline at end of file
+        """应用合并单元格设置：先整体规划、剔除无效和重叠的范围，再批量登记，返回 MergePlan"""
+        from openpyxl.worksheet.merge import MergedCellRange
+
+        plan = plan_merges(format_config.get('merge_cells', []))
+        plan.warn()
+        # 规划后的范围互不重叠，直接加入集合，跳过 ws.merge_cells 每次线性扫描已有范围的包含检查
+        merged = [MergedCellRange(ws, merge.ref) for merge in plan.ranges]
+        ws.merged_cells.ranges.update(merged)
+        for mcr in merged:
+            ws._clean_merge_range(mcr)
+        return plan
@@ -0,0 +1,521 @@
+"""
+增量更新已有的 xlsx
+
+在已有工作簿上追加行或修改指定区域，而不是重新生成整个文件：
+
+- 未改动的压缩包成员按原始压缩数据直接拷贝，不解压也不重新压缩
+- 目标工作表按行流式扫描，只重写被修改的行，新行按行号顺序插入
+- 被修改的单元格保留原有样式（s 属性），值以内联字符串或数字写入
+
+追加的行从最后一个有值的行（包括修改过的行，与调用 append 和 patch 的先后无关）之后开始；
+只有格式、没有值的空行会被当作可写入的行，保留其样式。表头和最后一个有值的行在重写工作表的
+同一遍扫描中确定：最后一个有值的行之后的内容暂存到扫描结束再写出。覆盖到最后一个有值的行的
+表格（xl/tables/*.xml 的 ref 和 autoFilter）、工作表筛选和条件格式的范围向下延伸到追加的最后
+一行；记录中的新键追加到表头末尾时，右边界为原表头最后一列的表格和筛选同时向右延伸，表格的
+tableColumns 补上对应的列。追加时写出前无法确定最终范围，因此删除可选的 <dimension> 元素，
+由打开文件的程序自行计算。
+
+更新后的工作簿设置 fullCalcOnLoad 并删除计算链（calcChain.xml），打开时重新计算公式，避免
+公式结果与新数据不一致。
+
+本模块只依赖标准库。
+"""
+
+import bisect
+import posixpath
+import re
+import struct
+import zipfile
+from io import BytesIO
+
+from tools.xlsx_reader import XlsxReader
+from tools.xlsx_stream import (
+    DEFAULT_COMPRESS_LEVEL, _deflate_chunk, column_index, column_letter, escape_attr, parse_cell_ref,
+    serialize_cell, write_deflated_member
+)
+
+# 解压后按块读取工作表，以及累积多少输出后压缩一次
+READ_CHUNK_SIZE = 1024 * 1024
+FLUSH_SIZE = 1024 * 1024
+# 拷贝原始压缩数据的块大小
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+_ROW_RE = re.compile(rb"<((?:[\w.-]+:)?)row\b([^>]*?)(?:/>|>(.*?)</(?:[\w.-]+:)?row\s*>)", re.S)
+_CELL_RE = re.compile(rb"<(?:[\w.-]+:)?c\b([^>]*?)(?:/>|>.*?</(?:[\w.-]+:)?c\s*>)", re.S)
+_ROW_NUM_RE = re.compile(rb'\br="(\d+)"')
+_CELL_COL_RE = re.compile(rb'\br="\$?([A-Za-z]{1,3})\$?\d+"')
+_STYLE_RE = re.compile(rb'\bs="(\d+)"')
+_SPANS_RE = re.compile(rb'\s+spans="[^"]*"')
+_VALUE_RE = re.compile(rb"<(?:[\w.-]+:)?(?:v|is|f)\b")
+_DIMENSION_RE = re.compile(rb'<((?:[\w.-]+:)?)dimension\b[^>]*?ref="([^"]*)"[^>]*/>')
+_WORKSHEET_RE = re.compile(rb"<((?:[\w.-]+:)?)worksheet\b[^>]*>")
+_SHEET_DATA_RE = re.compile(rb"<((?:[\w.-]+:)?)sheetData\b")
+_EMPTY_SHEET_DATA_RE = re.compile(rb"<((?:[\w.-]+:)?)sheetData\s*/>")
+_SHEET_DATA_END_RE = re.compile(rb"</(?:[\w.-]+:)?sheetData\s*>")
+# 追加行时需要延伸的范围：表格、筛选和条件格式
+_EXTENDED_REF_RE = re.compile(
+    rb'(<(?:[\w.-]+:)?(table|autoFilter|conditionalFormatting)\b[^>]*?\s(?:sq)?ref=")([^"]*)(")')
+_TABLE_COLUMNS_RE = re.compile(rb'<((?:[\w.-]+:)?)tableColumns\b([^>]*?)(/?)>')
+_TABLE_COLUMNS_END_RE = re.compile(rb"</(?:[\w.-]+:)?tableColumns\s*>")
+_TABLE_COLUMN_ID_RE = re.compile(rb'<(?:[\w.-]+:)?tableColumn\b[^>]*?\bid="(\d+)"')
+_COUNT_RE = re.compile(rb'\bcount="\d*"')
+_NEW_CELL_TAG_RE = re.compile(rb"<(/?)(c|is|t|v)\b")
+_CALC_PR_RE = re.compile(rb"<((?:[\w.-]+:)?)calcPr\b([^>]*?)(/?)>")
+_WORKBOOK_RE = re.compile(rb"<((?:[\w.-]+:)?)workbook\b")
+# workbook.xml 中位于 calcPr 之后的元素，新建 calcPr 时插入到它们之前
+_AFTER_CALC_PR_RE = re.compile(
+    rb"<(?:[\w.-]+:)?(?:oleSize|customWorkbookViews|pivotCaches|smartTagPr|smartTagTypes|webPublishing|"
+    rb"fileRecoveryPr|webPublishObjects|extLst)\b|</(?:[\w.-]+:)?workbook\s*>")
+
+
+def copy_member(src_zf, zinfo, dst_zf):
+    """把 src_zf 中的成员按原始压缩数据拷贝到 dst_zf，不解压、不重新压缩"""
+    fp = src_zf.fp
+    fp.seek(zinfo.header_offset)
+    header = _LOCAL_HEADER.unpack(fp.read(_LOCAL_HEADER.size))
+    fp.seek(zinfo.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1])
+
+    new_info = zipfile.ZipInfo(zinfo.filename, date_time=zinfo.date_time)
+    new_info.compress_type = zinfo.compress_type
+    new_info.external_attr = zinfo.external_attr
+    new_info.CRC = zinfo.CRC
+    new_info.file_size = zinfo.file_size
+    new_info.compress_size = zinfo.compress_size
+    out = dst_zf.fp
+    new_info.header_offset = out.tell()
+    out.write(new_info.FileHeader())
+    remaining = zinfo.compress_size
+    while remaining:
+        block = fp.read(min(COPY_CHUNK_SIZE, remaining))
+        if not block:
+            raise Exception(f"Truncated workbook part: {zinfo.filename}")
+        out.write(block)
+        remaining -= len(block)
+    dst_zf.filelist.append(new_info)
+    dst_zf.NameToInfo[new_info.filename] = new_info
+    dst_zf.start_dir = out.tell()
+    dst_zf._didModify = True
+
+
+def split_rows(chunks):
+    """
+    把工作表 XML 的字节块切分为 (匹配, 字节)：<row> 元素的匹配对象及其原文，
+    或行与行之间的其他内容（匹配为 None）。不完整的行留到下一块再处理。
+    """
+    buffer = b""
+    for chunk in chunks:
+        buffer = buffer + chunk if buffer else chunk
+        pos = 0
+        for match in _ROW_RE.finditer(buffer):
+            if match.start() > pos:
+                yield None, buffer[pos:match.start()]
+            yield match, match.group(0)
+            pos = match.end()
+        buffer = buffer[pos:]
+    if buffer:
+        yield None, buffer
+
+
+def _range_bounds(ref):
+    """解析 "A1" 或 "A1:C3"，返回 (起始行, 起始列, 结束行, 结束列)，无法解析时返回 None"""
+    if not isinstance(ref, str):
+        return None
+    corners = [parse_cell_ref(part) for part in ref.split(":")]
+    if not 1 <= len(corners) <= 2 or any(corner is None for corner in corners):
+        return None
+    rows = [row for row, _ in corners]
+    cols = [col for _, col in corners]
+    return min(rows), min(cols), max(rows), max(cols)
+
+
+class XlsxPatcher:
+    """
+    在已有工作簿的一个工作表上追加行、修改区域，再写出新的工作簿
+
+    :param source: 文件路径或可 seek 的二进制文件对象
+    :param sheet: 工作表名称或从 0 开始的序号，默认第一个工作表
+    """
+
+    def __init__(self, source, sheet=None):
+        self.reader = XlsxReader(source)
+        self.sheet_member = self.reader._member(self.reader.sheet_part(sheet))
+        self.sheet = sheet
+        # {行号: {列号: 值}}
+        self.cells = {}
+        # 待追加的行，在重写工作表时确定位置
+        self._appended = []
+        # 表头行号和 {表头文本: 列号}、追加到表头末尾的 {列号: 表头文本}，以及扫描后最后一个有值的行、追加的最后一行
+        self._header_row = None
+        self._header = None
+        self._new_columns = {}
+        self._last_value_row = None
+        self._last_row = None
+
+    def close(self):
+        self.reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _sheet_chunks(self):
+        with self.reader.zf.open(self.sheet_member) as f:
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    def set_cell(self, row_idx, col_idx, value):
+        self.cells.setdefault(row_idx, {})[col_idx] = value
+
+    def append(self, rows):
+        """
+        在最后一个有值的行之后追加数据，位置在 write 时确定
+
+        行为记录（字典）时按表头文本对应到列，表头中没有的键作为新列追加到表头末尾；
+        空工作表先写入表头。行为数组时按列顺序写入。通过 patch 登记的修改也算作有值的行，
+        追加的行不会覆盖它们。
+        """
+        self._appended.extend(rows or [])
+
+    def _needs_header(self):
+        return any(isinstance(row, dict) for row in self._appended)
+
+    def _read_header(self, root, row_xml, row_idx):
+        """解析第一个有值的行作为表头；行中没有可解析的值时返回 False"""
+        prefix = root.group(1) if root else b""
+        fragment = (root.group(0) if root else b"<worksheet>") + row_xml + b"</%sworksheet>" % prefix
+        for _, values in self.reader.parse_rows(BytesIO(fragment)):
+            if values:
+                self._header_row = row_idx
+                self._header = {str(value): col_idx for col_idx, value in values.items()}
+                self._extend_header()
+                return True
+        return False
+
+    def _extend_header(self):
+        """表头中没有的键作为新列写入表头行"""
+        next_col = max(self._header.values(), default=0) + 1
+        for row in self._appended:
+            for key in (row if isinstance(row, dict) else ()):
+                if str(key) not in self._header:
+                    self._header[str(key)] = next_col
+                    self._new_columns[next_col] = str(key)
+                    self.set_cell(self._header_row, next_col, str(key))
+                    next_col += 1
+
+    def _place_appended(self, last_value_row):
+        """扫描到工作表末尾后登记追加的行，返回新登记的行号"""
+        before = set(self.cells)
+        # 已经登记的修改也算作有值的行
+        written = [row_idx for row_idx, values in self.cells.items()
+                   if any(value is not None for value in values.values())]
+        next_row = max([last_value_row] + written) + 1
+        if self._needs_header() and self._header is None:
+            self._header_row, self._header = next_row, {}
+            self._extend_header()
+            next_row += 1
+        for offset, row in enumerate(self._appended):
+            if isinstance(row, dict):
+                for key, value in row.items():
+                    self.set_cell(next_row + offset, self._header[str(key)], value)
+            else:
+                for col_idx, value in enumerate(row if isinstance(row, list) else [row], 1):
+                    self.set_cell(next_row + offset, col_idx, value)
+        self._last_value_row = last_value_row
+        self._last_row = next_row + len(self._appended) - 1
+        return set(self.cells) - before
+
+    def patch(self, ref, values):
+        """
+        修改区域的值：单个值填充整个区域，一维数组写入从左上角开始的一行，二维数组逐行写入；
+        值为 None 时清除单元格的值（保留样式）
+        """
+        bounds = _range_bounds(ref)
+        if bounds is None:
+            raise ValueError(f"Invalid patch range: {ref!r}")
+        min_row, min_col, max_row, max_col = bounds
+        if isinstance(values, list):
+            grid = values if values and all(isinstance(row, list) for row in values) else [values]
+            for r_offset, row in enumerate(grid):
+                for c_offset, value in enumerate(row):
+                    self.set_cell(min_row + r_offset, min_col + c_offset, value)
+        else:
+            for row_idx in range(min_row, max_row + 1):
+                for col_idx in range(min_col, max_col + 1):
+                    self.set_cell(row_idx, col_idx, values)
+
+    def _dimension(self, head):
+        """把 <dimension> 扩展到覆盖所有修改的单元格；有追加的行时删除"""
+        match = _DIMENSION_RE.search(head)
+        if match is not None and self._appended:
+            return head[:match.start()] + head[match.end():]
+        if match is None or not self.cells:
+            return head
+        bounds = _range_bounds(match.group(2).decode())
+        rows = list(self.cells)
+        cols = [col for row in self.cells.values() for col in row]
+        if bounds is not None:
+            rows += [bounds[0], bounds[2]]
+            cols += [bounds[1], bounds[3]]
+        ref = f"{column_letter(min(cols))}{min(rows)}:{column_letter(max(cols))}{max(rows)}"
+        element = f'<{match.group(1).decode()}dimension ref="{escape_attr(ref)}"/>'.encode()
+        return head[:match.start()] + element + head[match.end():]
+
+    @staticmethod
+    def _cells_xml(row_idx, values, styles, prefix):
+        parts = []
+        for col_idx in sorted(values):
+            cell_xml = serialize_cell(f"{column_letter(col_idx)}{row_idx}", values[col_idx], styles.get(col_idx, 0))
+            if cell_xml:
+                parts.append(cell_xml.encode("utf-8"))
+        xml = b"".join(parts)
+        return _NEW_CELL_TAG_RE.sub(rb"<\1" + prefix + rb"\2", xml) if prefix else xml
+
+    def _new_row(self, row_idx, values, prefix):
+        cells = self._cells_xml(row_idx, values, {}, prefix)
+        if not cells:
+            return b""
+        return b"<%srow r=\"%d\">%s</%srow>" % (prefix, row_idx, cells, prefix)
+
+    def _patched_row(self, match, row_idx, values):
+        """重写已有的行：保留未修改的单元格原文，被修改的单元格沿用原来的样式"""
+        prefix, attrs, inner = match.group(1), match.group(2), match.group(3) or b""
+        cells = {}
+        styles = {}
+        col_idx = 0
+        for cell in _CELL_RE.finditer(inner):
+            column = _CELL_COL_RE.search(cell.group(1))
+            col_idx = column_index(column.group(1).decode()) if column else col_idx + 1
+            cells[col_idx] = cell.group(0)
+            if col_idx in values:
+                style = _STYLE_RE.search(cell.group(1))
+                styles[col_idx] = int(style.group(1)) if style else 0
+        for col_idx in values:
+            cells.pop(col_idx, None)
+            cell_xml = self._cells_xml(row_idx, {col_idx: values[col_idx]}, styles, prefix)
+            if cell_xml:
+                cells[col_idx] = cell_xml
+        # spans 只是读取时的提示，修改后可能不再准确，直接去掉
+        attrs = _SPANS_RE.sub(b"", attrs)
+        if not _ROW_NUM_RE.search(attrs):
+            attrs = b' r="%d"' % row_idx + attrs
+        body = b"".join(cells[col] for col in sorted(cells))
+        return b"<%srow%s>%s</%srow>" % (prefix, attrs, body, prefix)
+
+    def _extend_ref(self, ref, widen=False):
+        """
+        包含最后一个有值的行的范围向下延伸到追加的最后一行；widen 为 True 时，从表头行开始、
+        右边界为原表头最后一列的范围同时向右延伸到新增的列
+        """
+        bounds = _range_bounds(ref) if ":" in ref else None
+        if bounds is None:
+            return ref
+        min_row, min_col, max_row, max_col = bounds
+        if widen and self._new_columns and min_row == self._header_row and max_col == min(self._new_columns) - 1:
+            max_col = max(self._new_columns)
+        if min_row <= self._last_value_row <= max_row and max_row < self._last_row:
+            max_row = self._last_row
+        if (max_row, max_col) == bounds[2:]:
+            return ref
+        return f"{column_letter(min_col)}{min_row}:{column_letter(max_col)}{max_row}"
+
+    def _extend_refs(self, data):
+        """延伸表格、筛选和条件格式的范围；条件格式只向下延伸，不覆盖新增的列"""
+        if self._last_row is None:
+            return data
+
+        def extend(match):
+            widen = match.group(2) != b"conditionalFormatting"
+            refs = " ".join(self._extend_ref(ref, widen) for ref in match.group(3).decode().split())
+            return match.group(1) + escape_attr(refs).encode() + match.group(4)
+        return _EXTENDED_REF_RE.sub(extend, data)
+
+    def _extend_table(self, data):
+        """延伸表格的范围，并为向右延伸覆盖的新列补上 tableColumn，列名与表头文本一致"""
+        data = self._extend_refs(data)
+        table = _EXTENDED_REF_RE.search(data)
+        columns = _TABLE_COLUMNS_RE.search(data)
+        bounds = _range_bounds(table.group(3).decode()) if table and table.group(2) == b"table" else None
+        if bounds is None or columns is None or columns.group(3):
+            return data
+        end = _TABLE_COLUMNS_END_RE.search(data, columns.end())
+        if end is None:
+            return data
+        prefix = columns.group(1)
+        ids = [int(value) for value in _TABLE_COLUMN_ID_RE.findall(data, columns.end(), end.start())]
+        next_id = max(ids, default=0) + 1
+        added = []
+        for col_idx in range(bounds[1] + len(ids), bounds[3] + 1):
+            name = escape_attr(self._new_columns.get(col_idx, f"Column{col_idx}")).encode()
+            added.append(b'<%stableColumn id="%d" name="%s"/>' % (prefix, next_id, name))
+            next_id += 1
+        if not added:
+            return data
+        attrs = _COUNT_RE.sub(b'count="%d"' % (len(ids) + len(added)), columns.group(2))
+        return (data[:columns.start(2)] + attrs + data[columns.end(2):end.start()] + b"".join(added) +
+                data[end.start():])
+
+    def _patched_sheet(self, compress_level):
+        """逐块产出修改后工作表的压缩数据"""
+        pending = sorted(self.cells)
+        pending_idx = 0
+        prefix = b""
+        root = None
+        head_done = False
+        row_idx = 0
+        last_value_row = 0
+        # 有追加的行时，最后一个有值的行之后的内容：(匹配, 原文, 行号)
+        held = []
+        out = []
+        out_size = 0
+
+        def put(data):
+            nonlocal out_size
+            out.append(data)
+            out_size += len(data)
+
+        def flush():
+            nonlocal out, out_size
+            data = b"".join(out)
+            out, out_size = [], 0
+            return _deflate_chunk(data, compress_level)
+
+        def put_row(match, raw, row_idx):
+            """写出已有的行，以及排在它之前的新行"""
+            nonlocal pending_idx
+            if match is None:
+                put(raw)
+                return
+            while pending_idx < len(pending) and pending[pending_idx] < row_idx:
+                put(self._new_row(pending[pending_idx], self.cells[pending[pending_idx]], prefix))
+                pending_idx += 1
+            if pending_idx < len(pending) and pending[pending_idx] == row_idx:
+                raw = self._patched_row(match, row_idx, self.cells[row_idx])
+                pending_idx += 1
+            put(raw)
+
+        def put_held():
+            for item in held:
+                put_row(*item)
+            held.clear()
+
+        for match, raw in split_rows(self._sheet_chunks()):
+            if match is None:
+                if not head_done:
+                    head_done = True
+                    sheet_data = _SHEET_DATA_RE.search(raw)
+                    prefix = sheet_data.group(1) if sheet_data else b""
+                    root = _WORKSHEET_RE.search(raw)
+                    raw = self._dimension(raw)
+                tail = _SHEET_DATA_END_RE.search(raw) or _EMPTY_SHEET_DATA_RE.search(raw)
+                if tail is None:
+                    if held:
+                        held.append((None, raw, None))
+                    else:
+                        put(raw)
+                    continue
+                if self._appended:
+                    new_rows = self._place_appended(last_value_row)
+                    pending = pending[:pending_idx] + sorted(set(pending[pending_idx:]) | new_rows)
+                    put_held()
+                # 剩余的新行写在 </sheetData> 之前
+                new_rows = b"".join(self._new_row(r, self.cells[r], prefix) for r in pending[pending_idx:])
+                pending_idx = len(pending)
+                if tail.re is _EMPTY_SHEET_DATA_RE:
+                    raw = raw[:tail.start()] + b"<%ssheetData>%s</%ssheetData>" % (
+                        prefix, new_rows, prefix) + raw[tail.end():]
+                else:
+                    raw = raw[:tail.start()] + new_rows + raw[tail.start():]
+                put(raw[:tail.start()] + self._extend_refs(raw[tail.start():]))
+            else:
+                head_done = True
+                prefix = match.group(1)
+                number = _ROW_NUM_RE.search(match.group(2))
+                row_idx = int(number.group(1)) if number else row_idx + 1
+                if self._appended:
+                    if not (match.group(3) and _VALUE_RE.search(match.group(3))):
+                        # 可能成为追加的位置，等扫描结束再写出
+                        held.append((match, raw, row_idx))
+                        continue
+                    put_held()
+                    last_value_row = row_idx
+                    if self._header is None and self._needs_header() and \
+                            self._read_header(root, raw, row_idx) and row_idx in self.cells:
+                        if row_idx not in pending[pending_idx:]:
+                            bisect.insort(pending, row_idx, pending_idx)
+                put_row(match, raw, row_idx)
+            if out_size >= FLUSH_SIZE:
+                yield flush()
+        if out:
+            yield flush()
+
+    def _content_types(self, data):
+        """删除计算链的 Override"""
+        part = "/" + self.reader.calc_chain_part.lstrip("/")
+        pattern = rb'<(?:[\w.-]+:)?Override\b[^>]*PartName="' + re.escape(part.encode()) + rb'"[^>]*/>'
+        return re.sub(pattern, b"", data, flags=re.I)
+
+    @staticmethod
+    def _workbook_rels(data):
+        """删除指向计算链的关系"""
+        return re.sub(rb'<(?:[\w.-]+:)?Relationship\b[^>]*Type="[^"]*/calcChain"[^>]*/>', b"", data)
+
+    @staticmethod
+    def _workbook(data):
+        """设置 fullCalcOnLoad，打开时重新计算所有公式"""
+        calc_pr = _CALC_PR_RE.search(data)
+        if calc_pr is not None:
+            if b"fullCalcOnLoad" in calc_pr.group(2):
+                return data
+            return data[:calc_pr.end(2)] + b' fullCalcOnLoad="1"' + data[calc_pr.end(2):]
+        workbook = _WORKBOOK_RE.search(data)
+        prefix = workbook.group(1) if workbook else b""
+        anchor = _AFTER_CALC_PR_RE.search(data)
+        if anchor is None:
+            return data
+        return data[:anchor.start()] + b'<%scalcPr fullCalcOnLoad="1"/>' % prefix + data[anchor.start():]
+
+    def _table_parts(self):
+        """目标工作表的表格部件在压缩包中的成员名"""
+        part = self.reader.sheet_part(self.sheet)
+        directory = posixpath.dirname(part)
+        rels_part = posixpath.join(directory, "_rels", posixpath.basename(part) + ".rels")
+        rels = self.reader._relationships(rels_part, directory)
+        members = (self.reader._member(target) for rel_type, target in rels.values() if rel_type.endswith("/table"))
+        return {member for member in members if member is not None}
+
+    def write(self, output, compress_level=DEFAULT_COMPRESS_LEVEL):
+        """写出更新后的工作簿到 output（可写、可 seek 的二进制文件对象）"""
+        reader = self.reader
+        src = reader.zf
+        calc_chain = reader._member(reader.calc_chain_part) if reader.calc_chain_part else None
+        rewrites = {reader._member(reader.workbook_part): self._workbook}
+        if calc_chain is not None:
+            rewrites[reader._member("[Content_Types].xml")] = self._content_types
+            rewrites[reader._member(reader.workbook_rels_part)] = self._workbook_rels
+        # 表格的范围在重写工作表之后才能确定，放到最后写出
+        tables = self._table_parts() if self._appended else set()
+        deferred = []
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+            for zinfo in src.infolist():
+                name = zinfo.filename
+                if name in tables:
+                    deferred.append(zinfo)
+                elif name == self.sheet_member:
+                    write_deflated_member(zf, name, self._patched_sheet(compress_level), zinfo.date_time)
+                elif name == calc_chain:
+                    continue
+                elif name in rewrites:
+                    new_info = zipfile.ZipInfo(name, date_time=zinfo.date_time)
+                    zf.writestr(new_info, rewrites[name](src.read(name)), compress_type=zipfile.ZIP_DEFLATED)
+                else:
+                    copy_member(src, zinfo, zf)
+            for zinfo in deferred:
+                new_info = zipfile.ZipInfo(zinfo.filename, date_time=zinfo.date_time)
+                zf.writestr(new_info, self._extend_table(src.read(zinfo)), compress_type=zipfile.ZIP_DEFLATED)
@@ -0,0 +1,715 @@
+"""
+按需读取的 xlsx 流式读取器
+
+只解压并解析目标工作表的 XML 以及 sharedStrings（外加 styles.xml 中用于识别日期格式的
+cellXfs），其余部件（其他工作表、图片、绘图、主题等）完全不读取。工作表使用 iterparse
+逐行解析，处理完的行立即从树中清除，内存占用与工作表行数无关。
+
+较大的共享字符串表不整体加载为列表，而是只建立偏移量索引、按需解析（见 LazySharedStrings）：
+    EXCEL_TOOL_SST_LAZY_THRESHOLD 解压后超过该大小（字节）时使用延迟解析，默认 16 MB
+    EXCEL_TOOL_SST_CACHE_SIZE     延迟模式下热点字符串的 LRU 缓存条目数，默认 65536
+
+只有样式、没有值的幻影行不计入数据范围，连续出现超过 EXCEL_TOOL_MAX_EMPTY_ROWS（默认 10000）
+行时提前停止读取，避免整行设置了格式的工作表遍历到第 1,048,576 行。
+
+较大的工作表在顺序读取时记录行偏移量索引，之后按行范围读取时跳过起始行之前的部分（见
+tools.row_index）。
+
+read_sheet_records 的结果与 pd.read_excel(..., dtype=str) 保持一致：首行为表头，空表头
+命名为 "Unnamed: N"，重复列名按 pandas 的规则加 ".1" 后缀，默认缺失值字符串视为空值。
+"""
+
+import bisect
+import contextlib
+import datetime
+import functools
+import html
+import mmap
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import zipfile
+from array import array
+from collections import defaultdict
+from xml.etree.ElementTree import fromstring, iterparse
+
+from tools.row_index import IndexedStream, RowIndex
+from tools.xlsx_stream import column_index
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_STRICT = "http://purl.oclc.org/ooxml/spreadsheetml/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_REL_STRICT = "http://purl.oclc.org/ooxml/officeDocument/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+REL_OFFICE_DOCUMENT = "/officeDocument"
+REL_SHARED_STRINGS = "/sharedStrings"
+REL_STYLES = "/styles"
+REL_CALC_CHAIN = "/calcChain"
+
+WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+MAC_EPOCH = datetime.datetime(1904, 1, 1)
+SECS_PER_DAY = 86400
+
+# 与 openpyxl 相同的内置日期格式编号及日期格式判定规则
+BUILTIN_DATE_FORMAT_IDS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+BUILTIN_TIMEDELTA_FORMAT_IDS = {46}
+_STRIP_FORMAT_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_DATE_FORMAT_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_TIMEDELTA_FORMAT_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+_CELL_COLUMN_RE = re.compile(r"^\$?([A-Za-z]+)")
+
+# sharedStrings.xml 解压后超过该大小时改为按偏移量延迟解析
+SST_LAZY_THRESHOLD = int(os.environ.get("EXCEL_TOOL_SST_LAZY_THRESHOLD", 16 * 1024 * 1024))
+# 延迟模式下缓存的热点字符串数量
+SST_CACHE_SIZE = int(os.environ.get("EXCEL_TOOL_SST_CACHE_SIZE", 65536))
+# LazySharedStrings.candidates 每次整体判断的原始 XML 字节数
+SST_SCAN_SIZE = 1024 * 1024
+# 读取结果中重复值驻留表的最大条目数
+INTERN_LIMIT = 100000
+# RowBlockFilter 每次判断的字节数；从压缩包中按较小的片段读取，远程文件不会一次请求过多数据
+ROW_BLOCK_SIZE = 256 * 1024
+ROW_READ_SIZE = 64 * 1024
+_ROW_START_RE = re.compile(rb"<(?:[\w.-]+:)?row\b([^>]*)>")
+_ROW_END_RE = re.compile(rb"</(?:[\w.-]+:)?row>")
+_TAG_PREFIX_RE = re.compile(rb"[\w.-]+:")
+# 连续遇到这么多没有值的行元素后认为数据已经结束，0 表示不提前停止
+MAX_EMPTY_ROWS = int(os.environ.get("EXCEL_TOOL_MAX_EMPTY_ROWS", 10000))
+
+_SI_START_RE = re.compile(rb"<(?:[\w.-]+:)?si[\s/>]")
+_SI_END_RE = re.compile(rb"</(?:[\w.-]+:)?si\s*>")
+# 只含一个纯文本 <t> 的字符串项（最常见的情况）无需构建元素树
+_SI_PLAIN_RE = re.compile(
+    rb"<(?:[\w.-]+:)?si>\s*<(?:[\w.-]+:)?t(?:\s[^>]*)?>([^<]*)</(?:[\w.-]+:)?t>\s*</(?:[\w.-]+:)?si>")
+_SST_ROOT_RE = re.compile(rb"<(?:[\w.-]+:)?sst[\s>][^>]*>")
+_XMLNS_RE = re.compile(rb"""xmlns(?::[\w.-]+)?\s*=\s*("[^"]*"|'[^']*')""")
+
+# pandas 读取时默认视为缺失值的字符串
+NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+
+def is_date_format(fmt):
+    if fmt is None:
+        return False
+    fmt = _STRIP_FORMAT_RE.sub("", fmt.split(";")[0])
+    return _DATE_FORMAT_RE.search(fmt) is not None
+
+
+def is_timedelta_format(fmt):
+    if fmt is None:
+        return False
+    return _TIMEDELTA_FORMAT_RE.search(fmt.split(";")[0]) is not None
+
+
+def from_excel(value, epoch=WINDOWS_EPOCH, timedelta=False):
+    """将 Excel 序列日期转换为 datetime/time/timedelta（与 openpyxl 的转换规则一致）"""
+    if timedelta:
+        td = datetime.timedelta(days=value)
+        if td.microseconds:
+            td = datetime.timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+    day, fraction = divmod(value, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * SECS_PER_DAY * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        mins, seconds = divmod(diff.seconds, 60)
+        hours, mins = divmod(mins, 60)
+        return datetime.time(hours, mins, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        day += 1
+    return epoch + datetime.timedelta(days=day) + diff
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text_of(elem):
+    """拼接字符串项中的文本（富文本的各个片段），忽略注音（rPh）"""
+    parts = []
+    for child in elem:
+        name = _local(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name == "r":
+            for run_child in child:
+                if _local(run_child.tag) == "t":
+                    parts.append(run_child.text or "")
+    return "".join(parts)
+
+
+def cell_to_str(value):
+    """按 pd.read_excel(dtype=str) 的规则把单元格值转换为字符串，缺失值返回 None"""
+    if value is None:
+        return None
+    value_type = type(value)
+    if value_type is str:
+        return None if value in NA_VALUES else value
+    if value_type is float:
+        return str(int(value)) if value.is_integer() else str(value)
+    return str(value)
+
+
+def dedup_columns(names):
+    """与 pandas 读取表头时相同的重复列名处理规则，空列名命名为 "Unnamed: N" 且最后处理"""
+    columns = list(names)
+    unnamed = []
+    for idx, name in enumerate(columns):
+        if name is None or name == "":
+            columns[idx] = f"Unnamed: {idx}"
+            unnamed.append(idx)
+    counts = defaultdict(int)
+    loop_order = [idx for idx in range(len(columns)) if idx not in set(unnamed)] + unnamed
+    existing = set(columns)
+    for idx in loop_order:
+        col = columns[idx]
+        old_col = col
+        cur_count = counts[col]
+        if cur_count > 0:
+            while cur_count > 0:
+                counts[old_col] = cur_count + 1
+                col = f"{old_col}.{cur_count}"
+                if col in existing:
+                    cur_count += 1
+                else:
+                    cur_count = counts[col]
+        columns[idx] = col
+        counts[col] = cur_count + 1
+    return columns
+
+
+def header_names(header, width):
+    """由首行的 {列号: 值} 得到 width 个列名：数字表头与 pandas 一样转换为文本，再处理空列名和重复列名"""
+    names = []
+    for col_idx in range(1, width + 1):
+        name = header.get(col_idx)
+        if isinstance(name, float) and name.is_integer():
+            name = int(name)
+        names.append(name if name is None or isinstance(name, str) else str(name))
+    return dedup_columns(names)
+
+
+class LazySharedStrings:
+    """
+    按偏移量延迟解析的共享字符串表
+
+    sharedStrings.xml 被流式解压到临时文件并通过 mmap 访问，内存中只保留每个 <si> 的起始
+    偏移量（每项 8 字节）；取值时才解析对应片段，热点字符串由 LRU 缓存，重复引用同一字符串
+    的单元格得到同一个对象。
+    """
+
+    def __init__(self, stream, cache_size=SST_CACHE_SIZE):
+        self._file = tempfile.TemporaryFile()
+        shutil.copyfileobj(stream, self._file, 1 << 20)
+        self._file.flush()
+        size = self._file.tell()
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = array("Q", (m.start() for m in _SI_START_RE.finditer(self._mm)))
+        # 片段解析时沿用根元素上的命名空间声明，兼容带前缀的写法
+        root = _SST_ROOT_RE.search(self._mm)
+        declarations = b" ".join(m.group(0) for m in _XMLNS_RE.finditer(root.group(0))) if root else b""
+        self._wrap_start = b"<wrap " + declarations + b">"
+        self._get = functools.lru_cache(maxsize=cache_size)(self._parse)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, idx):
+        return self._get(idx)
+
+    def candidates(self, keep):
+        """
+        逐个产出原始 XML 满足 keep(字节) 的 <si> 序号，不解析字符串
+
+        先按不少于 SST_SCAN_SIZE 字节的完整 <si> 片段整体判断，只有命中的片段才逐项判断。
+        """
+        offsets = self.offsets
+        count = len(offsets)
+        idx = 0
+        while idx < count:
+            stop = max(bisect.bisect_left(offsets, offsets[idx] + SST_SCAN_SIZE, idx), idx + 1)
+            end = offsets[stop] if stop < count else len(self._mm)
+            if keep(self._mm[offsets[idx]:end]):
+                for item in range(idx, stop):
+                    item_end = offsets[item + 1] if item + 1 < count else end
+                    if keep(self._mm[offsets[item]:item_end]):
+                        yield item
+            idx = stop
+
+    def _parse(self, idx):
+        start = self.offsets[idx]
+        tag_end = self._mm.find(b">", start)
+        if self._mm[tag_end - 1:tag_end] == b"/":
+            return ""
+        plain = _SI_PLAIN_RE.match(self._mm, start)
+        if plain:
+            text = plain.group(1).decode("utf-8")
+            if "\r" in text:
+                # 与 XML 解析器的换行规范化保持一致
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            return html.unescape(text) if "&" in text else text
+        end_match = _SI_END_RE.search(self._mm, tag_end)
+        end = end_match.end() if end_match else len(self._mm)
+        wrapper = fromstring(self._wrap_start + self._mm[start:end] + b"</wrap>")
+        return _text_of(wrapper[0])
+
+    def close(self):
+        if self._mm:
+            self._mm.close()
+        self._file.close()
+
+
+class RowBlockFilter:
+    """
+    按行块过滤工作表 XML 的只读流
+
+    第一个 </row> 之前的内容（含表头行）和最后一个 </row> 之后的内容原样输出；中间的内容按
+    完整的 <row> 元素切成不少于 block_size 字节的块，keep(块) 为假的块整体丢弃。丢弃的总是完整的
+    行元素，输出仍是合法的 XML，交给 iterparse 时跳过的行完全不需要解析。行元素没有 r 属性时
+    行号依赖行的顺序，此时不做过滤。
+    """
+
+    def __init__(self, raw, keep, block_size=None):
+        self._raw = raw
+        self._keep = keep
+        self._block_size = block_size or ROW_BLOCK_SIZE
+        self._pending = b""
+        self._out = b""
+        self._pos = 0
+        self._head = True
+        self._eof = False
+        self.skipped_bytes = 0
+
+    def _fill(self):
+        chunk = self._raw.read(ROW_READ_SIZE)
+        if not chunk:
+            self._eof = True
+            self._out, self._pending = self._pending, b""
+            return
+        data = self._pending + chunk
+        if len(data) < self._block_size:
+            self._pending = data
+            return
+        cut = _last_row_end(data)
+        if cut < 0:
+            self._pending = data
+            return
+        block, self._pending = data[:cut], data[cut:]
+        if self._head:
+            first = _ROW_END_RE.search(block)
+            row = _ROW_START_RE.search(block)
+            if row is not None and b"r=" not in row.group(1):
+                self._keep = None
+            self._out, block = block[:first.end()], block[first.end():]
+            self._head = False
+        if not block:
+            return
+        if self._keep is None or self._keep(block):
+            self._out += block
+        else:
+            self.skipped_bytes += len(block)
+
+    def read(self, size=-1):
+        while self._pos >= len(self._out) and not self._eof:
+            self._out, self._pos = b"", 0
+            self._fill()
+        if size is None or size < 0:
+            size = len(self._out) - self._pos
+        data = self._out[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+
+def _last_row_end(data):
+    """最后一个 </row> 结束标签之后的位置，没有时返回 -1"""
+    pos = len(data)
+    while True:
+        pos = data.rfind(b"row>", 0, pos)
+        if pos < 0:
+            return -1
+        tag = data[data.rfind(b"<", 0, pos) + 1:pos]
+        if tag.startswith(b"/") and (len(tag) == 1 or _TAG_PREFIX_RE.fullmatch(tag[1:])):
+            return pos + 4
+
+
+class XlsxReader:
+    """
+    xlsx 工作簿的按需读取器
+
+    :param source: 文件路径或可 seek 的二进制文件对象（如 http_client.RemoteFile）
+    """
+
+    def __init__(self, source):
+        self.zf = zipfile.ZipFile(source)
+        self._names = {name.lower(): name for name in self.zf.namelist()}
+        self.sheets = []
+        self.date1904 = False
+        self.workbook_part = "xl/workbook.xml"
+        self.workbook_rels_part = None
+        self.shared_strings_part = None
+        self.styles_part = None
+        self.calc_chain_part = None
+        self._shared_strings = None
+        self._date_styles = None
+        self._load_workbook()
+
+    def close(self):
+        if isinstance(self._shared_strings, LazySharedStrings):
+            self._shared_strings.close()
+        self.zf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _member(self, part):
+        """按大小写不敏感的方式查找压缩包成员"""
+        return self._names.get(part.lstrip("/").lower())
+
+    def _open(self, part):
+        member = self._member(part)
+        if member is None:
+            raise Exception(f"Missing workbook part: {part}")
+        return self.zf.open(member)
+
+    def _relationships(self, rels_part, base_dir):
+        """解析 .rels 文件，返回 {rId: (类型, 目标部件路径)}"""
+        rels = {}
+        if self._member(rels_part) is None:
+            return rels
+        with self._open(rels_part) as f:
+            for _, elem in iterparse(f):
+                if _local(elem.tag) == "Relationship":
+                    target = elem.get("Target", "")
+                    if elem.get("TargetMode") == "External":
+                        continue
+                    path = target.lstrip("/") if target.startswith("/") \
+                        else posixpath.normpath(posixpath.join(base_dir, target))
+                    rels[elem.get("Id")] = (elem.get("Type", ""), path)
+        return rels
+
+    def _load_workbook(self):
+        """解析 workbook.xml 及其关系，得到工作表列表和共享字符串、样式部件的位置"""
+        for rel_type, path in self._relationships("_rels/.rels", "").values():
+            if rel_type.endswith(REL_OFFICE_DOCUMENT):
+                self.workbook_part = path
+                break
+        base_dir = posixpath.dirname(self.workbook_part)
+        rels_part = posixpath.join(base_dir, "_rels", posixpath.basename(self.workbook_part) + ".rels")
+        self.workbook_rels_part = rels_part
+        rels = self._relationships(rels_part, base_dir)
+        for rel_type, path in rels.values():
+            if rel_type.endswith(REL_SHARED_STRINGS):
+                self.shared_strings_part = path
+            elif rel_type.endswith(REL_STYLES):
+                self.styles_part = path
+            elif rel_type.endswith(REL_CALC_CHAIN):
+                self.calc_chain_part = path
+
+        with self._open(self.workbook_part) as f:
+            for _, elem in iterparse(f):
+                name = _local(elem.tag)
+                if name == "workbookPr":
+                    self.date1904 = elem.get("date1904") in ("1", "true")
+                elif name == "sheet":
+                    rid = elem.get(f"{{{NS_REL}}}id") or elem.get(f"{{{NS_REL_STRICT}}}id")
+                    if rid in rels:
+                        self.sheets.append((elem.get("name"), rels[rid][1]))
+
+    @property
+    def sheet_names(self):
+        return [name for name, _ in self.sheets]
+
+    def sheet_part(self, sheet=None):
+        """根据工作表名称或从 0 开始的序号找到工作表部件，默认第一个工作表"""
+        if not self.sheets:
+            raise Exception("Workbook contains no worksheets")
+        if sheet is None or sheet == "":
+            return self.sheets[0][1]
+        for name, part in self.sheets:
+            if name == sheet:
+                return part
+        if isinstance(sheet, int) or (isinstance(sheet, str) and sheet.isdigit()):
+            idx = int(sheet)
+            if 0 <= idx < len(self.sheets):
+                return self.sheets[idx][1]
+        raise Exception(f"Worksheet named '{sheet}' not found")
+
+    def select_sheets(self, sheet=None):
+        """未指定 sheet 时返回全部 [(名称, 部件)]，否则只返回按名称或序号找到的那个工作表"""
+        if sheet is None or sheet == "":
+            return list(self.sheets)
+        part = self.sheet_part(sheet)
+        return [(name, path) for name, path in self.sheets if path == part][:1]
+
+    def sheet_size(self, sheet=None):
+        """工作表 XML 解压后的字节数（取自中央目录，不需要解压）"""
+        member = self._member(self.sheet_part(sheet))
+        if member is None:
+            raise Exception(f"Missing workbook part: {self.sheet_part(sheet)}")
+        return self.zf.getinfo(member).file_size
+
+    @property
+    def shared_strings(self):
+        """共享字符串表，首次访问时加载"""
+        if self._shared_strings is None:
+            self._shared_strings = self._load_shared_strings()
+        return self._shared_strings
+
+    def _load_shared_strings(self):
+        strings = []
+        member = self._member(self.shared_strings_part) if self.shared_strings_part else None
+        if member is None:
+            return strings
+        if self.zf.getinfo(member).file_size > SST_LAZY_THRESHOLD:
+            with self.zf.open(member) as f:
+                return LazySharedStrings(f)
+        with self.zf.open(member) as f:
+            context = iterparse(f, events=("start", "end"))
+            root = None
+            for event, elem in context:
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    continue
+                if _local(elem.tag) == "si":
+                    strings.append(_text_of(elem))
+                    root.clear()
+        return strings
+
+    @property
+    def date_styles(self):
+        """{样式下标: 是否为时间间隔格式}，只包含日期类格式的样式"""
+        if self._date_styles is None:
+            self._date_styles = self._load_date_styles()
+        return self._date_styles
+
+    def _load_date_styles(self):
+        date_styles = {}
+        if self.styles_part is None or self._member(self.styles_part) is None:
+            return date_styles
+        custom_formats = {}
+        xf_formats = []
+        with self._open(self.styles_part) as f:
+            in_cell_xfs = False
+            for event, elem in iterparse(f, events=("start", "end")):
+                name = _local(elem.tag)
+                if name == "cellXfs":
+                    in_cell_xfs = event == "start"
+                elif event == "end" and name == "numFmt":
+                    custom_formats[int(elem.get("numFmtId", 0))] = elem.get("formatCode")
+                elif event == "end" and name == "xf" and in_cell_xfs:
+                    xf_formats.append(int(elem.get("numFmtId", 0)))
+        for style_id, fmt_id in enumerate(xf_formats):
+            if fmt_id in custom_formats:
+                fmt = custom_formats[fmt_id]
+                if is_date_format(fmt):
+                    date_styles[style_id] = is_timedelta_format(fmt)
+            elif fmt_id in BUILTIN_DATE_FORMAT_IDS:
+                date_styles[style_id] = fmt_id in BUILTIN_TIMEDELTA_FORMAT_IDS
+        return date_styles
+
+    @contextlib.contextmanager
+    def _sheet_stream(self, part, block_filter=None, start_row=None):
+        """打开工作表 XML；按需套上行块预筛选，或使用并更新行偏移量索引"""
+        with self._open(part) as f:
+            if block_filter is not None:
+                yield RowBlockFilter(f, block_filter)
+                return
+            index = RowIndex.open(self.zf.getinfo(self._member(part)))
+            if index is None:
+                yield f
+                return
+            try:
+                yield IndexedStream(f, index, start_row)
+            finally:
+                # 提前结束时也保存已经记录的检查点
+                index.save()
+
+    def iter_rows(self, sheet=None, block_filter=None, start_row=None):
+        """
+        逐行产出 (行号, {列号: 值})，只包含有值的单元格；值已转换为 Python 类型
+        （数字、字符串、布尔、日期时间），错误值视为 None
+
+        :param block_filter: 按原始 XML 判断一段连续的行是否需要解析，见 RowBlockFilter
+        :param start_row: 只需要首行和该行及之后的行；行偏移量索引中有合适的检查点时跳过中间的行，
+            否则照常逐行产出，由调用方过滤
+        """
+        part = self.sheet_part(sheet)
+        # 先读取样式部件，远程文件上不必在读取工作表的中途来回跳转
+        self.date_styles
+        with self._sheet_stream(part, block_filter, start_row) as stream:
+            yield from self.parse_rows(stream)
+
+    def parse_rows(self, stream):
+        """逐行解析工作表 XML 流（可以是只含部分行的片段），产出与 iter_rows 相同的 (行号, {列号: 值})"""
+        shared_strings = None
+        date_styles = self.date_styles
+        epoch = MAC_EPOCH if self.date1904 else WINDOWS_EPOCH
+        context = iterparse(stream, events=("start", "end"))
+        ns = None
+        sheet_data = None
+        row_tag = cell_tag = value_tag = inline_tag = None
+        row_idx = 0
+        for event, elem in context:
+            if event == "start":
+                if ns is None:
+                    ns = elem.tag[1:].split("}", 1)[0] if elem.tag.startswith("{") else ""
+                    prefix = f"{{{ns}}}" if ns else ""
+                    row_tag, cell_tag = prefix + "row", prefix + "c"
+                    value_tag, inline_tag = prefix + "v", prefix + "is"
+                elif sheet_data is None and _local(elem.tag) == "sheetData":
+                    sheet_data = elem
+                continue
+            if elem.tag != row_tag:
+                continue
+            r_attr = elem.get("r")
+            row_idx = int(r_attr) if r_attr else row_idx + 1
+            values = {}
+            col_idx = 0
+            # 只有样式、没有值的幻影行（整行设置格式或清除内容后残留）不逐个解析单元格
+            for cell in (elem if any(len(cell) for cell in elem) else ()):
+                if cell.tag != cell_tag:
+                    continue
+                ref = cell.get("r")
+                if ref:
+                    match = _CELL_COLUMN_RE.match(ref)
+                    col_idx = column_index(match.group(1)) if match else col_idx + 1
+                else:
+                    col_idx += 1
+                cell_type = cell.get("t", "n")
+                if cell_type == "inlineStr":
+                    inline = cell.find(inline_tag)
+                    value = _text_of(inline) if inline is not None else None
+                else:
+                    v = cell.find(value_tag)
+                    text = v.text if v is not None else None
+                    if text is None:
+                        value = None
+                    elif cell_type == "s":
+                        if shared_strings is None:
+                            shared_strings = self.shared_strings
+                        value = shared_strings[int(text)]
+                    elif cell_type == "n":
+                        value = float(text) if ("." in text or "E" in text or "e" in text) else int(text)
+                        style = cell.get("s")
+                        if style is not None and int(style) in date_styles:
+                            value = from_excel(value, epoch, timedelta=date_styles[int(style)])
+                    elif cell_type == "b":
+                        value = text in ("1", "true")
+                    elif cell_type == "str":
+                        value = text
+                    elif cell_type == "d":
+                        value = datetime.datetime.fromisoformat(text)
+                    else:
+                        value = None
+                if value is not None:
+                    values[col_idx] = value
+            yield row_idx, values
+            if sheet_data is not None:
+                sheet_data.clear()
+            else:
+                elem.clear()
+
+
+def used_rows(rows, max_empty_rows=MAX_EMPTY_ROWS):
+    """
+    过滤 iter_rows 的输出，只产出有单元格值的行；连续 max_empty_rows 个幻影行之后认为数据
+    已经结束并停止遍历，0 表示遍历整个工作表
+    """
+    empty_run = 0
+    for row_idx, values in rows:
+        if not values:
+            empty_run += 1
+            if max_empty_rows and empty_run >= max_empty_rows:
+                return
+            continue
+        empty_run = 0
+        yield row_idx, values
+
+
+def parse_row_range(text):
+    """
+    解析行范围："101..200"、"101.."、"..200" 或单个行号，行号与 Excel 中一致（第 1 行为表头）；
+    返回 (起始行, 结束行或 None)，未指定时返回 None
+    """
+    if text is None or str(text).strip() == "":
+        return None
+    low, sep, high = str(text).strip().partition("..")
+    try:
+        first = int(low) if low.strip() else 2
+        last = (int(high) if high.strip() else None) if sep else first
+    except ValueError:
+        raise ValueError(f"Invalid row range: {text!r}, expected e.g. 101..200, 101.. or ..200")
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"Invalid row range: {text!r}")
+    return max(first, 2), last
+
+
+def read_sheet_records(reader, sheet=None, max_empty_rows=MAX_EMPTY_ROWS, prune_columns=False, row_range=None):
+    """
+    读取工作表并返回 (列名列表, 行列表)，行中的值为字符串或 None，结果与
+    pd.read_excel(dtype=str) 一致
+
+    :param max_empty_rows: 连续遇到这么多没有值的行元素后停止读取，0 表示读完整个工作表
+    :param prune_columns: 去掉既没有表头也没有任何值的列
+    :param row_range: parse_row_range 的结果，只读取这些行；读到结束行后停止
+    """
+    first, last = row_range or (2, None)
+    header = {}
+    rows = {}
+    last_row = 0
+    width = 0
+    # 低基数的文本列（状态、部门等）大量重复，驻留后所有单元格共享同一个字符串对象
+    interned = {}
+    for row_idx, values in used_rows(reader.iter_rows(sheet, start_row=first), max_empty_rows):
+        if last is not None and row_idx > last:
+            break
+        if 1 < row_idx < first:
+            continue
+        converted = {}
+        for col_idx, value in values.items():
+            if row_idx == 1:
+                # 表头保留原值，数字表头与 pandas 一样作为列名
+                if value != "":
+                    converted[col_idx] = value
+            else:
+                text = cell_to_str(value)
+                if text is not None:
+                    cached = interned.get(text)
+                    if cached is not None:
+                        text = cached
+                    elif len(interned) < INTERN_LIMIT:
+                        interned[text] = text
+                if value != "":
+                    # 非空单元格决定行宽和数据范围，即使其值按缺失值处理
+                    converted[col_idx] = text
+        if not converted:
+            continue
+        width = max(width, max(converted))
+        last_row = max(last_row, row_idx)
+        if row_idx == 1:
+            header = converted
+        else:
+            rows[row_idx] = converted
+
+    columns = header_names(header, width)
+    kept = range(1, width + 1)
+    if prune_columns:
+        used = {col_idx for values in rows.values() for col_idx, text in values.items() if text is not None}
+        kept = [col_idx for col_idx in kept if col_idx in header or col_idx in used]
+        columns = [columns[col_idx - 1] for col_idx in kept]
+    data = []
+    for row_idx in range(first, last_row + 1):
+        values = rows.get(row_idx)
+        if values is None:
+            data.append([None] * len(kept))
+        else:
+            data.append([values.get(col_idx) for col_idx in kept])
+    return columns, data
@@ -0,0 +1,992 @@
+"""
+流式 xlsx 写入引擎
+
+不经过 openpyxl 的对象模型，直接按行序列化工作表 XML，并支持将行区间拆分给进程池并行序列化、
+压缩，最后按顺序拼接为一个 xlsx 压缩包成员。
+
+文本按列选择存储方式（format.shared_strings）：auto（默认）时抽样估计各列的基数，状态、部门等
+重复值多的低基数列写入共享字符串表（xl/sharedStrings.xml），每个不同的值只存储一次；姓名、编号等
+高基数列写成内联字符串，省去查表和维护下标的开销。true、false 分别表示全部共享、全部内联，没有
+列使用共享字符串时不写出 sharedStrings.xml。
+
+本模块只依赖标准库，便于在子进程中快速导入。
+"""
+
+import json
+import math
+import os
+import re
+import zipfile
+import zlib
+import pickle
+import signal
+import struct
+from datetime import datetime
+
+from tools.column_types import (
+    BUILTIN_NUMBER_FORMATS, FIRST_CUSTOM_NUMBER_FORMAT_ID, convert_value, resolve_column_formats, table_options,
+    to_excel_serial
+)
+from tools.conditional_format import parse_conditional_formats
+from tools.column_width import auto_width_options, compute_column_widths, sized_cell_values
+from tools.profiling import NULL_PROFILER
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# 每个并行任务至少包含的行数，过小的任务会让进程间通信开销超过收益
+MIN_ROWS_PER_CHUNK = 5000
+# 每个工作进程平均分到的任务数，略多于 1 以平衡各段耗时差异
+CHUNKS_PER_WORKER = 4
+# 压缩级别：与 zipfile 默认的 ZIP_DEFLATED 一致
+DEFAULT_COMPRESS_LEVEL = 6
+# shared_strings 为 auto 时，用于估算各列基数的行数，以及使用共享字符串的最大不同值比例
+SST_SAMPLE_ROWS = 1000
+SST_MAX_DISTINCT_RATIO = 0.1
+# sharedStrings.xml 每批拼接的条目数
+SST_BATCH_SIZE = 10000
+# 单个工作表的最大行数，以及工作表名称的最大长度
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_COLUMNS = 16_384
+SHEET_NAME_MAX_LENGTH = 31
+DEFAULT_SHEET_NAME = "Sheet"
+
+# 生成的文件使用固定的时间戳（docProps 的创建、修改时间和 zip 成员的修改时间），相同的输入
+# 得到逐字节相同的输出，便于缓存和比对
+FIXED_TIMESTAMP = datetime(1980, 1, 1)
+FIXED_DATE_TIME = FIXED_TIMESTAMP.timetuple()[:6]
+# docProps 中的创建者和应用程序名称，两个引擎都写插件自己的名称
+DOC_CREATOR = "excel-tool"
+
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_CELL_REF = re.compile(r"^\$?([A-Za-z]{1,3})\$?(\d+)$")
+_SHEET_NAME_INVALID = re.compile(r"[\[\]:*?/\\]")
+
+
+def column_letter(col_idx):
+    """将从 1 开始的列号转换为列字母"""
+    letters = ""
+    while col_idx > 0:
+        col_idx, rem = divmod(col_idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def column_index(letters):
+    """将列字母转换为从 1 开始的列号"""
+    idx = 0
+    for ch in letters.upper():
+        idx = idx * 26 + (ord(ch) - 64)
+    return idx
+
+
+def parse_cell_ref(ref):
+    """解析 "B3" 形式的单元格引用，返回 (行号, 列号)，无法解析时返回 None"""
+    match = _CELL_REF.match(ref.strip()) if isinstance(ref, str) else None
+    if not match:
+        return None
+    return int(match.group(2)), column_index(match.group(1))
+
+
+def parse_cell_key(key):
+    """解析 format.cells 中 "行号,列索引" 形式的键，列索引支持字母和数字"""
+    try:
+        row_part, col_part = str(key).split(",", 1)
+        row_idx = int(row_part.strip())
+        col_part = col_part.strip()
+        col_idx = column_index(col_part) if col_part.isalpha() else int(col_part)
+    except ValueError:
+        return None
+    return row_idx, col_idx
+
+
+def resolve_cell_formats(cells):
+    """
+    将 format.cells 解析为 {(行号, 列号): 单元格格式}，两个引擎共用
+
+    无法解析、超出工作表范围或格式不是对象的键被忽略；"2,A" 与 "2,1" 指向同一单元格时以后出现的为准。
+    """
+    resolved = {}
+    for key, cell_format in (cells or {}).items():
+        pos = parse_cell_key(key)
+        if pos is None or not isinstance(cell_format, dict):
+            continue
+        row_idx, col_idx = pos
+        if 1 <= row_idx <= EXCEL_MAX_ROWS and 1 <= col_idx <= EXCEL_MAX_COLUMNS:
+            resolved[pos] = cell_format
+    return resolved
+
+
+def normalize_column(col):
+    """将 column_widths 等配置中的列标识（字母或数字）转换为列号"""
+    if isinstance(col, str):
+        col = col.strip()
+        if col.isalpha():
+            return column_index(col)
+    return int(col)
+
+
+def merge_range_ref(merge_range):
+    """将合并单元格配置（字符串/对象/数组三种格式）统一为 "A1:B2" 形式"""
+    if isinstance(merge_range, str):
+        return merge_range
+    if isinstance(merge_range, dict):
+        start = merge_range.get('start')
+        end = merge_range.get('end')
+        if start and end:
+            return f"{start}:{end}"
+        return None
+    if isinstance(merge_range, list) and len(merge_range) == 2:
+        start, end = merge_range
+        return f"{start}:{end}"
+    return None
+
+
+def sheet_title(name):
+    """工作表名称：替换 Excel 不允许的字符并截断到 31 个字符，为空时使用默认名称"""
+    title = _SHEET_NAME_INVALID.sub("_", str(name or "")).strip("'")[:SHEET_NAME_MAX_LENGTH]
+    return title or DEFAULT_SHEET_NAME
+
+
+def sheet_names(name, count):
+    """拆分后各工作表的名称：第一个为 name，其余依次追加 _2、_3 ...，总长度不超过 31 个字符"""
+    title = sheet_title(name)
+    names = [title]
+    for idx in range(2, count + 1):
+        suffix = f"_{idx}"
+        names.append(title[:SHEET_NAME_MAX_LENGTH - len(suffix)] + suffix)
+    return names
+
+
+def plan_sheets(total_rows, start_row=1, show_header=True, max_rows=EXCEL_MAX_ROWS):
+    """
+    按行数上限预先拆分数据行，返回 [(工作表起始行, 数据行切片起点, 终点)]
+
+    第一个工作表从 start_row 开始，续表从第 1 行开始；每个工作表都有表头（show_header 时）
+    """
+    header = 1 if show_header else 0
+    capacity = max_rows - start_row + 1 - header
+    if capacity <= 0:
+        raise ValueError(f"start_row {start_row} leaves no room for data within {max_rows} rows")
+    segments = [(start_row, 0, min(total_rows, capacity))]
+    capacity = max_rows - header
+    while segments[-1][2] < total_rows:
+        lo = segments[-1][2]
+        segments.append((1, lo, min(total_rows, lo + capacity)))
+    return segments
+
+
+def escape_text(text):
+    """转义 XML 文本并去除 XML 不允许的控制字符"""
+    if _ILLEGAL_XML_CHARS.search(text):
+        text = _ILLEGAL_XML_CHARS.sub("", text)
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attr(text):
+    """转义 XML 属性值"""
+    return escape_text(str(text)).replace('"', "&quot;")
+
+
+def _argb(color):
+    """将 6 位十六进制颜色补齐为 openpyxl 同样使用的 8 位 ARGB"""
+    color = str(color)
+    return "00" + color if len(color) == 6 else color
+
+
+class StyleRegistry:
+    """
+    样式注册表：将 format.cells 中的单元格格式去重为 styles.xml 的 cellXfs 条目
+
+    语义与 WriteExcelTool._apply_cell_format 保持一致（相同的默认字体、边框和对齐）。
+    """
+
+    def __init__(self):
+        self.fonts = ['<font><sz val="11"/><color theme="1"/><name val="Calibri"/>'
+                      '<family val="2"/><scheme val="minor"/></font>']
+        self.fills = ['<fill><patternFill patternType="none"/></fill>',
+                      '<fill><patternFill patternType="gray125"/></fill>']
+        self.borders = ['<border><left/><right/><top/><bottom/><diagonal/></border>']
+        self.xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+        self.num_fmts = {}
+        self.dxfs = []
+        self._index = {}
+
+    @staticmethod
+    def _intern(items, xml):
+        try:
+            return items.index(xml)
+        except ValueError:
+            items.append(xml)
+            return len(items) - 1
+
+    def num_fmt_id(self, number_format):
+        """返回数字格式编号：内置格式使用固定编号，其余按出现顺序注册为自定义格式"""
+        if number_format in BUILTIN_NUMBER_FORMATS:
+            return BUILTIN_NUMBER_FORMATS[number_format]
+        if number_format not in self.num_fmts:
+            self.num_fmts[number_format] = FIRST_CUSTOM_NUMBER_FORMAT_ID + len(self.num_fmts)
+        return self.num_fmts[number_format]
+
+    def xf_id(self, cell_format, number_format=None):
+        """返回单元格格式（及列级数字格式）对应的 cellXfs 下标，相同格式只注册一次"""
+        if not cell_format and not number_format:
+            return 0
+        key = json.dumps([cell_format or {}, number_format], sort_keys=True, ensure_ascii=False)
+        if key in self._index:
+            return self._index[key]
+
+        cell_format = cell_format or {}
+        font_id = fill_id = border_id = 0
+        num_fmt_id = self.num_fmt_id(number_format) if number_format else 0
+        attrs = [' applyNumberFormat="1"'] if num_fmt_id else []
+        children = ""
+        if 'font' in cell_format:
+            font_config = cell_format['font']
+            font_xml = "<font>"
+            if font_config.get('bold', False):
+                font_xml += "<b/>"
+            if font_config.get('italic', False):
+                font_xml += "<i/>"
+            font_xml += (f'<sz val="{escape_attr(font_config.get("size", 11))}"/>'
+                         f'<color rgb="{escape_attr(_argb(font_config.get("color", "000000")))}"/>'
+                         f'<name val="{escape_attr(font_config.get("name", "Calibri"))}"/></font>')
+            font_id = self._intern(self.fonts, font_xml)
+            attrs.append(' applyFont="1"')
+        if 'background_color' in cell_format:
+            color = escape_attr(_argb(cell_format['background_color']))
+            fill_xml = (f'<fill><patternFill patternType="solid"><fgColor rgb="{color}"/>'
+                        f'<bgColor rgb="{color}"/></patternFill></fill>')
+            fill_id = self._intern(self.fills, fill_xml)
+            attrs.append(' applyFill="1"')
+        if 'border' in cell_format:
+            border_config = cell_format['border']
+            border_xml = "<border>"
+            for side in ('left', 'right', 'top', 'bottom'):
+                border_xml += f'<{side} style="{escape_attr(border_config.get(side, "thin"))}"/>'
+            border_xml += "<diagonal/></border>"
+            border_id = self._intern(self.borders, border_xml)
+            attrs.append(' applyBorder="1"')
+        if 'alignment' in cell_format:
+            align_config = cell_format['alignment']
+            wrap = ' wrapText="1"' if align_config.get('wrap_text', False) else ""
+            children = (f'<alignment horizontal="{escape_attr(align_config.get("horizontal", "left"))}"'
+                        f' vertical="{escape_attr(align_config.get("vertical", "bottom"))}"{wrap}/>')
+            attrs.append(' applyAlignment="1"')
+
+        xf_xml = (f'<xf numFmtId="{num_fmt_id}" fontId="{font_id}" fillId="{fill_id}" borderId="{border_id}"'
+                  f' xfId="0"{"".join(attrs)}')
+        xf_xml += f">{children}</xf>" if children else "/>"
+        xf = self._intern(self.xfs, xf_xml)
+        self._index[key] = xf
+        return xf
+
+    def dxf_id(self, cell_format):
+        """返回条件格式使用的差异格式（dxf）下标，只包含配置中出现的字体、背景和边框"""
+        dxf_xml = "<dxf>"
+        font_config = cell_format.get('font')
+        if isinstance(font_config, dict):
+            dxf_xml += "<font>"
+            if font_config.get('bold', False):
+                dxf_xml += "<b/>"
+            if font_config.get('italic', False):
+                dxf_xml += "<i/>"
+            if 'color' in font_config:
+                dxf_xml += f'<color rgb="{escape_attr(_argb(font_config["color"]))}"/>'
+            dxf_xml += "</font>"
+        if 'background_color' in cell_format:
+            color = escape_attr(_argb(cell_format['background_color']))
+            dxf_xml += (f'<fill><patternFill patternType="solid"><fgColor rgb="{color}"/>'
+                        f'<bgColor rgb="{color}"/></patternFill></fill>')
+        border_config = cell_format.get('border')
+        if isinstance(border_config, dict):
+            dxf_xml += "<border>"
+            for side in ('left', 'right', 'top', 'bottom'):
+                dxf_xml += f'<{side} style="{escape_attr(border_config.get(side, "thin"))}"/>'
+            dxf_xml += "</border>"
+        dxf_xml += "</dxf>"
+        return self._intern(self.dxfs, dxf_xml)
+
+    def to_xml(self):
+        num_fmts = "".join(f'<numFmt numFmtId="{fmt_id}" formatCode="{escape_attr(code)}"/>'
+                           for code, fmt_id in self.num_fmts.items())
+        return (f'{XML_DECL}<styleSheet xmlns="{NS_MAIN}">'
+                + (f'<numFmts count="{len(self.num_fmts)}">{num_fmts}</numFmts>' if num_fmts else "") +
+                f'<fonts count="{len(self.fonts)}">{"".join(self.fonts)}</fonts>'
+                f'<fills count="{len(self.fills)}">{"".join(self.fills)}</fills>'
+                f'<borders count="{len(self.borders)}">{"".join(self.borders)}</borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                f'<cellXfs count="{len(self.xfs)}">{"".join(self.xfs)}</cellXfs>'
+                '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                f'<dxfs count="{len(self.dxfs)}">{"".join(self.dxfs)}</dxfs>'
+                '<tableStyles count="0" defaultTableStyle="TableStyleMedium9" defaultPivotStyle="PivotStyleLight16"/>'
+                '</styleSheet>')
+
+
+class SharedStrings:
+    """
+    共享字符串表：以哈希索引去重，每个不同的字符串只在 sharedStrings.xml 中存储一次，
+    单元格中只写入下标。重复的字符串只需一次字典查找，不再重复转义
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, text):
+        """返回字符串的下标，首次出现时加入表中"""
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.items)
+            escaped = escape_text(text)
+            space = ' xml:space="preserve"' if escaped != escaped.strip() else ""
+            self.items.append(f"<si><t{space}>{escaped}</t></si>")
+        return idx
+
+    def xml_chunks(self, batch=SST_BATCH_SIZE):
+        """分批产出 sharedStrings.xml 的内容，避免拼接成一个大字符串"""
+        yield f'{XML_DECL}<sst xmlns="{NS_MAIN}" uniqueCount="{len(self.items)}">'
+        for offset in range(0, len(self.items), batch):
+            yield "".join(self.items[offset:offset + batch])
+        yield "</sst>"
+
+
+def shared_string_columns(rows, ncols, mode="auto", sample_rows=SST_SAMPLE_ROWS):
+    """
+    按 format.shared_strings 决定哪些列使用共享字符串，返回列号集合
+
+    true 时所有列、false 时不使用；auto 时取前 sample_rows 行，文本值中不同值的比例不超过
+    SST_MAX_DISTINCT_RATIO 的列使用共享字符串（状态、部门等低基数列），其余列保持内联字符串
+    """
+    if mode is True or mode == "shared":
+        return set(range(1, ncols + 1))
+    if mode is False or mode == "inline":
+        return set()
+    if mode not in (None, "auto"):
+        raise ValueError(f"Invalid shared_strings option: {mode}")
+    columns = set()
+    sample = rows[:sample_rows]
+    for col_idx in range(ncols):
+        texts = [row[col_idx] for row in sample if col_idx < len(row) and type(row[col_idx]) is str]
+        if texts and len(set(texts)) <= len(texts) * SST_MAX_DISTINCT_RATIO:
+            columns.add(col_idx + 1)
+    return columns
+
+
+def serialize_cell(ref, value, style=0):
+    """序列化单个单元格；值为空且无样式时返回空字符串"""
+    s_attr = f' s="{style}"' if style else ""
+    if value is None:
+        return f'<c r="{ref}"{s_attr}/>' if style else ""
+    value_type = type(value)
+    if value_type is str:
+        text = escape_text(value)
+        space = ' xml:space="preserve"' if text != text.strip() else ""
+        return f'<c r="{ref}"{s_attr} t="inlineStr"><is><t{space}>{text}</t></is></c>'
+    if value_type is bool:
+        return f'<c r="{ref}"{s_attr} t="b"><v>{int(value)}</v></c>'
+    if value_type is int:
+        return f'<c r="{ref}"{s_attr}><v>{value}</v></c>'
+    if value_type is float:
+        if math.isnan(value) or math.isinf(value):
+            return f'<c r="{ref}"{s_attr}/>' if style else ""
+        return f'<c r="{ref}"{s_attr}><v>{value!r}</v></c>'
+    if isinstance(value, (int, float)):
+        return serialize_cell(ref, float(value) if isinstance(value, float) else int(value), style)
+    if isinstance(value, datetime):
+        return serialize_cell(ref, value.isoformat(sep=" "), style)
+    return serialize_cell(ref, value if isinstance(value, str) else str(value), style)
+
+
+def serialize_rows(rows, first_row, col_letters, cell_styles=None, row_heights=None, col_styles=None,
+                   data_first_row=1, shared=None, shared_cols=None):
+    """
+    序列化一段连续行的 <row> 元素
+
+    :param rows: 行值列表，第 i 行写入工作表第 first_row + i 行
+    :param col_letters: 预先计算好的列字母列表
+    :param cell_styles: {行号: {列号: xf下标}}，仅包含本段内的行
+    :param row_heights: {行号: 行高}，仅包含本段内的行
+    :param col_styles: {列号: xf下标}，列级数字格式，作用于 data_first_row 及之后的非空单元格
+    :param shared: SharedStrings，shared_cols 中各列的文本值写入共享字符串表
+    """
+    cell_styles = cell_styles or {}
+    row_heights = row_heights or {}
+    parts = []
+    append = parts.append
+    for offset, row in enumerate(rows):
+        r_idx = first_row + offset
+        row_styles = cell_styles.get(r_idx)
+        row_col_styles = col_styles if col_styles and r_idx >= data_first_row else None
+        height = row_heights.get(r_idx)
+        ht = f' ht="{height}" customHeight="1"' if height is not None else ""
+        cells = []
+        for c_idx, value in enumerate(row, 1):
+            style = row_styles.get(c_idx, 0) if row_styles else 0
+            if value is None and not style:
+                continue
+            if not style and row_col_styles:
+                style = row_col_styles.get(c_idx, 0)
+            if shared_cols and type(value) is str and c_idx in shared_cols:
+                s_attr = f' s="{style}"' if style else ""
+                cells.append(f'<c r="{col_letters[c_idx - 1]}{r_idx}"{s_attr} t="s"><v>{shared.add(value)}</v></c>')
+                continue
+            cell_xml = serialize_cell(f"{col_letters[c_idx - 1]}{r_idx}", value, style)
+            if cell_xml:
+                cells.append(cell_xml)
+        if row_styles:
+            # 超出数据列范围、但配置了样式的单元格
+            for c_idx in sorted(c for c in row_styles if c > len(row)):
+                cells.append(serialize_cell(f"{column_letter(c_idx)}{r_idx}", None, row_styles[c_idx]))
+        if cells or ht:
+            append(f'<row r="{r_idx}"{ht}>{"".join(cells)}</row>')
+    return "".join(parts)
+
+
+def _render_chunk(task):
+    """进程池任务：序列化并以可拼接的方式压缩一段行"""
+    rows, first_row, col_letters, cell_styles, row_heights, col_styles, data_first_row, shared, shared_cols, level = task
+    xml = serialize_rows(rows, first_row, col_letters, cell_styles, row_heights, col_styles,
+                         data_first_row, shared, shared_cols).encode("utf-8")
+    return _deflate_chunk(xml, level)
+
+
+def _deflate_chunk(data, level):
+    """
+    以 Z_SYNC_FLUSH 结束的原始 deflate 数据块
+
+    同步刷新后的数据块按字节对齐且不含结束标记，因此多个数据块可以直接首尾相接，
+    最后追加一个空的结束块即构成完整的 deflate 流。
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return compressed, zlib.crc32(data), len(data)
+
+
+def _gf2_matrix_times(mat, vec):
+    result = 0
+    idx = 0
+    while vec:
+        if vec & 1:
+            result ^= mat[idx]
+        vec >>= 1
+        idx += 1
+    return result
+
+
+def _gf2_matrix_square(mat):
+    return [_gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+
+def crc32_combine(crc1, crc2, len2):
+    """合并两段数据的 CRC32（与 zlib 的 crc32_combine 算法相同）"""
+    if len2 <= 0:
+        return crc1
+    odd = [0xEDB88320] + [1 << (n - 1) for n in range(1, 32)]
+    even = _gf2_matrix_square(odd)
+    odd = _gf2_matrix_square(even)
+    while True:
+        even = _gf2_matrix_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_matrix_square(even)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return crc1 ^ crc2
+
+
+class ReproducibleZipFile(zipfile.ZipFile):
+    """写入的成员使用固定的修改时间，而不是当前时间或文件的修改时间"""
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if not isinstance(zinfo_or_arcname, zipfile.ZipInfo):
+            zinfo = zipfile.ZipInfo(zinfo_or_arcname, date_time=FIXED_DATE_TIME)
+            # 与 ZipFile.writestr 按名称写入时的默认值一致
+            zinfo.external_attr = 0o600 << 16
+            zinfo_or_arcname = zinfo
+            compress_type = self.compression if compress_type is None else compress_type
+            compresslevel = self.compresslevel if compresslevel is None else compresslevel
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        # 成员的修改时间取自文件（openpyxl 先把工作表写到临时文件）
+        timestamp = FIXED_TIMESTAMP.timestamp()
+        os.utime(filename, (timestamp, timestamp))
+        super().write(filename, arcname, compress_type, compresslevel)
+
+
+def write_deflated_member(zf, name, chunks, date_time=None):
+    """
+    将预先压缩好的数据块按顺序写入 zip 成员
+
+    写出数据前无法知道成员的大小，而本地文件头写完数据后要原位改写、长度不能变，因此始终带
+    zip64 扩展字段（与 zipfile 的 force_zip64 相同），超过 4 GiB 的成员也能正确写出。
+
+    :param chunks: 可迭代的 (压缩数据, crc32, 原始长度) 元组，每块须由 _deflate_chunk 生成
+    """
+    zinfo = zipfile.ZipInfo(name, date_time=date_time or FIXED_DATE_TIME)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.file_size = zinfo.compress_size = zinfo.CRC = 0
+    fp = zf.fp
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64=True))
+    crc = 0
+    file_size = compress_size = 0
+    for compressed, chunk_crc, length in chunks:
+        fp.write(compressed)
+        crc = crc32_combine(crc, chunk_crc, length)
+        file_size += length
+        compress_size += len(compressed)
+    # 结束块：BFINAL=1 的空固定哈夫曼块
+    tail = zlib.compressobj(DEFAULT_COMPRESS_LEVEL, zlib.DEFLATED, -15).flush()
+    fp.write(tail)
+    compress_size += len(tail)
+
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = compress_size
+    end = fp.tell()
+    fp.seek(zinfo.header_offset)
+    fp.write(zinfo.FileHeader(zip64=True))
+    fp.seek(end)
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = end
+    zf._didModify = True
+
+
+def resolve_workers(workers):
+    """解析并行进程数配置："auto"/0 表示使用全部 CPU 核心"""
+    if workers in (None, "", 1, "1"):
+        return 1
+    if workers in ("auto", 0, "0"):
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _original_os(name):
+    """返回未被 gevent 猴子补丁替换的 os 函数"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(os, name)
+    return monkey.get_original("os", name)
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _read_exact(fd, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = os.read(fd, min(size - len(buf), 1 << 20))
+        if not chunk:
+            raise Exception("worker process exited unexpectedly")
+        buf += chunk
+    return bytes(buf)
+
+
+def _render_worker(tasks, worker_idx, workers, fd):
+    """工作进程入口：依次处理分配给自己的任务（第 worker_idx, worker_idx + workers, ... 个）"""
+    for task in tasks[worker_idx::workers]:
+        try:
+            result = _render_chunk(task)
+        except Exception as e:
+            result = Exception(f"{type(e).__name__}: {e}")
+        payload = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        _write_all(fd, struct.pack("<Q", len(payload)) + payload)
+        if isinstance(result, Exception):
+            break
+
+
+def parallel_render(tasks, workers):
+    """
+    用 fork 出的工作进程并行渲染任务，并按任务顺序逐个产出结果
+
+    每个工作进程独占一条管道，父进程按顺序轮流读取；管道缓冲有限，因此各进程最多领先
+    父进程一个数据块，内存占用有界。fork 方式下任务数据由子进程直接继承，无需序列化传输。
+
+    dify_plugin 会对 os/threading 做 gevent 猴子补丁：concurrent.futures 的进程池在该环境下
+    会死锁，补丁后的 fork 也无法在工作池的原生线程中调用，因此这里直接使用原始的 fork。
+    """
+    fork = _original_os("fork")
+    waitpid = _original_os("waitpid")
+    pids, fds = [], []
+    try:
+        for worker_idx in range(workers):
+            read_fd, write_fd = os.pipe()
+            pid = fork()
+            if pid == 0:
+                # 子进程：只负责渲染并写回结果，结束时不执行任何清理逻辑
+                os.close(read_fd)
+                code = 0
+                try:
+                    _render_worker(tasks, worker_idx, workers, write_fd)
+                except BaseException:
+                    code = 1
+                finally:
+                    os._exit(code)
+            os.close(write_fd)
+            pids.append(pid)
+            fds.append(read_fd)
+        for task_idx in range(len(tasks)):
+            fd = fds[task_idx % workers]
+            size, = struct.unpack("<Q", _read_exact(fd, 8))
+            result = pickle.loads(_read_exact(fd, size))
+            if isinstance(result, Exception):
+                raise result
+            yield result
+    finally:
+        for fd in fds:
+            os.close(fd)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                waitpid(pid, 0)
+            except OSError:
+                pass
+
+
+def can_fork():
+    """当前平台是否支持 fork（Windows 不支持，此时退回单进程）"""
+    return hasattr(os, "fork")
+
+
+class XlsxStreamWriter:
+    """
+    流式 xlsx 写入器
+
+    支持 format 配置中的 show_header、start_row、cells、column_widths、row_heights、
+    merge_cells、column_formats、conditional_formats、table，语义与 openpyxl 路径一致。workers > 1 时按行拆分给进程池并行序列化。
+    sheet_name 为工作表名称（默认 "Sheet"），超出行数上限时自动拆分为多个工作表。
+    shared_strings 控制文本的存储方式：auto（默认）按列基数选择共享字符串或内联字符串，true/false 为全部共享/全部内联。
+    """
+
+    def __init__(self, format_config=None, workers=1, compress_level=DEFAULT_COMPRESS_LEVEL, profiler=NULL_PROFILER,
+                 max_rows=EXCEL_MAX_ROWS):
+        self.format_config = format_config or {}
+        self.max_rows = max_rows
+        self.workers = resolve_workers(workers)
+        self.compress_level = compress_level
+        self.profiler = profiler
+        self.styles = StyleRegistry()
+        self.merge_conflicts = []
+
+    def _cell_styles(self, column_formats=None, data_rows=range(0)):
+        """将 format.cells 解析为 {行号: {列号: xf下标}}，数据行中带列级数字格式的单元格合并两者"""
+        column_formats = column_formats or {}
+        cell_styles = {}
+        for (row_idx, col_idx), cell_format in resolve_cell_formats(self.format_config.get('cells')).items():
+            number_format = column_formats[col_idx][1] if col_idx in column_formats and row_idx in data_rows else None
+            row_styles = cell_styles.setdefault(row_idx, {})
+            row_styles[col_idx] = self.styles.xf_id(cell_format, number_format)
+        return cell_styles
+
+    def _column_styles(self, column_formats):
+        """列级数字格式对应的 {列号: xf下标}，每列只注册一次"""
+        return {col_idx: self.styles.xf_id(None, number_format)
+                for col_idx, (_, number_format) in column_formats.items() if number_format}
+
+    @staticmethod
+    def _convert_columns(rows, column_formats):
+        """按列声明的类型原地转换数据行的值，日期转换为 Excel 序列日期"""
+        converters = [(col_idx - 1, dtype) for col_idx, (dtype, _) in column_formats.items() if dtype]
+        if not converters:
+            return
+        for row in rows:
+            for idx, dtype in converters:
+                if idx < len(row):
+                    row[idx] = to_excel_serial(convert_value(row[idx], dtype))
+
+    def _row_heights(self):
+        return {int(row): height for row, height in self.format_config.get('row_heights', {}).items()}
+
+    def _cols_xml(self, columns=(), all_rows=(), start_row=1, show_header=True):
+        widths = {}
+        options = auto_width_options(self.format_config.get('auto_width'))
+        if options is not None:
+            # 自动列宽在写出 <cols> 之前按列计算，显式的 column_widths 随后覆盖
+            data_rows = all_rows[1:] if show_header else all_rows
+            ncols = max((len(row) for row in all_rows[:1]), default=0)
+
+            def value_at(row_idx, col_idx):
+                offset = row_idx - start_row
+                if 0 <= offset < len(all_rows) and 1 <= col_idx <= len(all_rows[offset]):
+                    return all_rows[offset][col_idx - 1]
+                return None
+
+            sized = sized_cell_values(self.format_config.get('cells'), parse_cell_key, value_at)
+            column_values = [[row[idx] for row in data_rows if idx < len(row)] for idx in range(ncols)]
+            widths.update(compute_column_widths(list(columns) if show_header else [], column_values, options, sized))
+        for col, width in self.format_config.get('column_widths', {}).items():
+            try:
+                widths[normalize_column(col)] = width
+            except ValueError:
+                continue
+        if not widths:
+            return ""
+        cols = "".join(f'<col min="{c}" max="{c}" width="{escape_attr(w)}" customWidth="1"/>'
+                       for c, w in sorted(widths.items()))
+        return f"<cols>{cols}</cols>"
+
+    def _merge_cells_xml(self):
+        # merge_planner 依赖本模块的辅助函数，延迟导入避免循环引用
+        from tools.merge_planner import plan_merges
+        plan = plan_merges(self.format_config.get('merge_cells', []))
+        plan.warn()
+        self.merge_conflicts = plan.conflicts
+        if not plan.ranges:
+            return ""
+        body = "".join(f'<mergeCell ref="{ref}"/>' for ref in plan.refs)
+        return f'<mergeCells count="{len(plan.ranges)}">{body}</mergeCells>'
+
+    def _conditional_formats_xml(self, first_row, last_row):
+        rules = parse_conditional_formats(self.format_config.get('conditional_formats'), first_row, last_row)
+        parts = []
+        for priority, rule in enumerate(rules, 1):
+            stop = ' stopIfTrue="1"' if rule['stop'] else ""
+            formulas = "".join(f"<formula>{escape_text(formula)}</formula>" for formula in rule.get('formulas', ()))
+            if rule['type'] == 'cell':
+                body = (f'<cfRule type="cellIs" dxfId="{self.styles.dxf_id(rule["format"])}" priority="{priority}"'
+                        f' operator="{rule["operator"]}"{stop}>{formulas}</cfRule>')
+            elif rule['type'] == 'formula':
+                body = (f'<cfRule type="expression" dxfId="{self.styles.dxf_id(rule["format"])}"'
+                        f' priority="{priority}"{stop}>{formulas}</cfRule>')
+            elif rule['type'] == 'color_scale':
+                cfvos = '<cfvo type="min"/><cfvo type="percentile" val="50"/>' if len(rule['colors']) == 3 \
+                    else '<cfvo type="min"/>'
+                colors = "".join(f'<color rgb="{escape_attr(_argb(color))}"/>' for color in rule['colors'])
+                body = (f'<cfRule type="colorScale" priority="{priority}">'
+                        f'<colorScale>{cfvos}<cfvo type="max"/>{colors}</colorScale></cfRule>')
+            else:
+                body = (f'<cfRule type="dataBar" priority="{priority}"><dataBar><cfvo type="min"/><cfvo type="max"/>'
+                        f'<color rgb="{escape_attr(_argb(rule["color"]))}"/></dataBar></cfRule>')
+            parts.append(f'<conditionalFormatting sqref="{rule["ref"]}">{body}</conditionalFormatting>')
+        return "".join(parts)
+
+    def _chunk_size(self, total_rows):
+        if self.workers <= 1:
+            return max(total_rows, 1)
+        return max(MIN_ROWS_PER_CHUNK, math.ceil(total_rows / (self.workers * CHUNKS_PER_WORKER)))
+
+    def _table(self, columns, show_header):
+        options = table_options(self.format_config.get('table'))
+        if options is not None and not (show_header and columns):
+            print("Warning: format.table requires show_header, table skipped")
+            return None
+        return options
+
+    def write(self, output, columns, rows):
+        """
+        将表头和数据行写入 output（可写、可 seek 的二进制文件对象），会原地转换 rows 中声明了类型的列
+
+        数据超出单个工作表的行数上限时，事先按上限拆分为多个工作表（{sheet_name}、{sheet_name}_2 ...）。
+        续表从第 1 行开始，重复表头、列宽、列格式、条件格式和表格；cells、row_heights、merge_cells
+        按位置作用于第一个工作表
+        """
+        show_header = self.format_config.get('show_header', True)
+        start_row = self.format_config.get('start_row', 1)
+        table = self._table(columns, show_header)
+        if table is not None:
+            # 表格的列名必须是字符串，并与表头单元格一致
+            columns = [str(column) for column in columns]
+        header = [list(columns)] if show_header else []
+        all_rows = header + rows
+        ncols = max([len(columns)] + [len(r) for r in rows[:1]]) if (columns or rows) else 0
+        col_letters = [column_letter(c) for c in range(1, ncols + 1)]
+        # 拆分在生成之前按行数确定：[(起始行, 数据行切片起点, 终点)]
+        segments = plan_sheets(len(rows), start_row, show_header, self.max_rows)
+        names = sheet_names(self.format_config.get('sheet_name'), len(segments))
+        _, _, first_end = segments[0]
+        data_first_row = start_row + len(header)
+        last_row = start_row + len(header) + first_end - 1
+        profiler = self.profiler
+        with profiler.phase('dimensions'):
+            row_heights = self._row_heights()
+            # 自动列宽按类型转换之前的值计算，与 openpyxl 路径一致
+            cols_xml = self._cols_xml(columns, all_rows, start_row, show_header)
+        with profiler.phase('styling'):
+            column_formats = resolve_column_formats(self.format_config.get('column_formats'), columns, column_index)
+            self._convert_columns(rows, column_formats)
+            col_styles = self._column_styles(column_formats)
+            cell_styles = self._cell_styles(column_formats, range(data_first_row, last_row + 1))
+            shared_cols = shared_string_columns(rows, ncols, self.format_config.get('shared_strings', 'auto'))
+            shared = SharedStrings() if shared_cols else None
+        with profiler.phase('merges'):
+            merge_cells_xml = self._merge_cells_xml()
+
+        with ReproducibleZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+            # 单元格序列化与压缩是流水线式交织进行的，统一计入 cell_write
+            with profiler.phase('cell_write'):
+                if shared is not None and self.workers > 1 and can_fork():
+                    # 工作进程各自持有共享字符串表的副本，先在父进程中登记全部字符串，子进程只做查找
+                    self._fill_shared_strings(shared, shared_cols, all_rows)
+                for sheet_idx, (sheet_start, lo, hi) in enumerate(segments, 1):
+                    first_sheet = sheet_idx == 1
+                    self._write_sheet(
+                        zf, sheet_idx, header + rows[lo:hi] if len(segments) > 1 else all_rows, sheet_start,
+                        col_letters, cols_xml, col_styles, shared, shared_cols,
+                        cell_styles if first_sheet else {}, row_heights if first_sheet else {},
+                        merge_cells_xml if first_sheet else "", bool(table))
+            with profiler.phase('serialize'):
+                if shared is not None:
+                    write_deflated_member(zf, "xl/sharedStrings.xml", (
+                        _deflate_chunk(chunk.encode("utf-8"), self.compress_level) for chunk in shared.xml_chunks()
+                    ))
+                self._write_package_parts(zf, names, table=bool(table), shared_strings=shared is not None)
+                if table:
+                    for sheet_idx, (sheet_start, lo, hi) in enumerate(segments, 1):
+                        name = table['name'] if sheet_idx == 1 else f"{table['name']}_{sheet_idx}"
+                        self._write_table_parts(zf, dict(table, name=name), columns, sheet_start,
+                                                sheet_start + len(header) + hi - lo - 1, col_letters, sheet_idx)
+                # 中央目录在 close 时写出
+                zf.close()
+
+    def _write_sheet(self, zf, sheet_idx, sheet_rows, start_row, col_letters, cols_xml, col_styles, shared,
+                     shared_cols, cell_styles, row_heights, merge_cells_xml, table):
+        """渲染并写入一个工作表：sheet_rows（含表头）从 start_row 行开始"""
+        show_header = self.format_config.get('show_header', True)
+        data_first_row = start_row + 1 if show_header else start_row
+        last_row = start_row + len(sheet_rows) - 1
+        conditional_xml = self._conditional_formats_xml(data_first_row, last_row)
+        dimension = f"A1:{col_letters[-1]}{last_row}" if col_letters and sheet_rows else "A1"
+
+        head = (f'{XML_DECL}<worksheet xmlns="{NS_MAIN}" xmlns:r="{NS_REL}">'
+                f'<dimension ref="{dimension}"/><sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+                f'<sheetFormatPr defaultRowHeight="15"/>{cols_xml}<sheetData>')
+        # 数据区之外只有样式或行高的行
+        before = sorted(set(r for r in list(cell_styles) + list(row_heights) if r < start_row))
+        after = sorted(set(r for r in list(cell_styles) + list(row_heights) if r > last_row))
+        head += "".join(serialize_rows([[]], r, col_letters, cell_styles, row_heights) for r in before)
+        tail = "".join(serialize_rows([[]], r, col_letters, cell_styles, row_heights) for r in after)
+        tail += (f'</sheetData>{merge_cells_xml}{conditional_xml}'
+                 '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>'
+                 + ('<tableParts count="1"><tablePart r:id="rId1"/></tableParts>' if table else "") +
+                 '</worksheet>')
+
+        chunk_size = self._chunk_size(len(sheet_rows))
+        tasks = []
+        for offset in range(0, len(sheet_rows), chunk_size):
+            first = start_row + offset
+            last = first + min(chunk_size, len(sheet_rows) - offset)
+            tasks.append((
+                sheet_rows[offset:offset + chunk_size], first, col_letters,
+                {r: cell_styles[r] for r in range(first, last) if r in cell_styles},
+                {r: row_heights[r] for r in range(first, last) if r in row_heights},
+                col_styles, data_first_row, shared, shared_cols, self.compress_level,
+            ))
+
+        def sheet_chunks(results):
+            yield _deflate_chunk(head.encode("utf-8"), self.compress_level)
+            yield from results
+            yield _deflate_chunk(tail.encode("utf-8"), self.compress_level)
+
+        workers = min(self.workers, len(tasks))
+        if workers > 1 and can_fork():
+            results = parallel_render(tasks, workers)
+        else:
+            results = map(_render_chunk, tasks)
+        write_deflated_member(zf, f"xl/worksheets/sheet{sheet_idx}.xml", sheet_chunks(results))
+
+    @staticmethod
+    def _fill_shared_strings(shared, shared_cols, all_rows):
+        """按行序登记共享字符串列中的文本值，下标与单进程时一致"""
+        indexes = sorted(col_idx - 1 for col_idx in shared_cols)
+        add = shared.add
+        for row in all_rows:
+            for idx in indexes:
+                if idx < len(row) and type(row[idx]) is str:
+                    add(row[idx])
+
+    def _write_table_parts(self, zf, table, columns, start_row, last_row, col_letters, sheet_idx=1):
+        """写入第 sheet_idx 个工作表的表格部件及工作表到表格的关系"""
+        # 表格至少包含表头和一行数据
+        ref = f"A{start_row}:{col_letters[-1]}{max(last_row, start_row + 1)}"
+        table_columns = "".join(f'<tableColumn id="{idx}" name="{escape_attr(name)}"/>'
+                                for idx, name in enumerate(columns, 1))
+        zf.writestr(f"xl/tables/table{sheet_idx}.xml", (
+            f'{XML_DECL}<table xmlns="{NS_MAIN}" id="{sheet_idx}" name="{escape_attr(table["name"])}"'
+            f' displayName="{escape_attr(table["name"])}" ref="{ref}">'
+            f'<autoFilter ref="{ref}"/><tableColumns count="{len(columns)}">{table_columns}</tableColumns>'
+            f'<tableStyleInfo name="{escape_attr(table["style"])}" showFirstColumn="0" showLastColumn="0"'
+            f' showRowStripes="{int(table["show_row_stripes"])}" showColumnStripes="{int(table["show_column_stripes"])}"/>'
+            '</table>'))
+        zf.writestr(f"xl/worksheets/_rels/sheet{sheet_idx}.xml.rels", (
+            f'{XML_DECL}<Relationships xmlns="{NS_PKG_REL}">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/table"'
+            f' Target="../tables/table{sheet_idx}.xml"/>'
+            '</Relationships>'))
+
+    def _write_package_parts(self, zf, names=("Sheet",), table=False, shared_strings=False):
+        """写入工作簿的其余固定部件，names 为各工作表的名称"""
+        sheet_ids = range(1, len(names) + 1)
+        timestamp = FIXED_TIMESTAMP.strftime("%Y-%m-%dT%H:%M:%SZ")
+        zf.writestr("[Content_Types].xml", (
+            f'{XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(f'<Override PartName="/xl/worksheets/sheet{idx}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for idx in sheet_ids) +
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+            '<Override PartName="/docProps/app.xml" ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>'
+            + "".join(f'<Override PartName="/xl/tables/table{idx}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.table+xml"/>'
+                      for idx in sheet_ids if table)
+            + ('<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+               if shared_strings else "") +
+            '</Types>'))
+        zf.writestr("_rels/.rels", (
+            f'{XML_DECL}<Relationships xmlns="{NS_PKG_REL}">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>'
+            '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties" Target="docProps/app.xml"/>'
+            '</Relationships>'))
+        zf.writestr("docProps/core.xml", (
+            f'{XML_DECL}<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"'
+            ' xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/"'
+            ' xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+            f'<dc:creator>{DOC_CREATOR}</dc:creator>'
+            f'<dcterms:created xsi:type="dcterms:W3CDTF">{timestamp}</dcterms:created>'
+            f'<dcterms:modified xsi:type="dcterms:W3CDTF">{timestamp}</dcterms:modified>'
+            '</cp:coreProperties>'))
+        zf.writestr("docProps/app.xml", (
+            f'{XML_DECL}<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+            f'<Application>{DOC_CREATOR}</Application></Properties>'))
+        zf.writestr("xl/workbook.xml", (
+            f'{XML_DECL}<workbook xmlns="{NS_MAIN}" xmlns:r="{NS_REL}">'
+            '<bookViews><workbookView/></bookViews>'
+            '<sheets>'
+            + "".join(f'<sheet name="{escape_attr(name)}" sheetId="{idx}" r:id="rId{idx}"/>' for idx, name in zip(sheet_ids, names))
+            + '</sheets></workbook>'))
+        zf.writestr("xl/_rels/workbook.xml.rels", (
+            f'{XML_DECL}<Relationships xmlns="{NS_PKG_REL}">'
+            + "".join(f'<Relationship Id="rId{idx}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{idx}.xml"/>'
+                      for idx in sheet_ids)
+            + f'<Relationship Id="rId{len(names) + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            + (f'<Relationship Id="rId{len(names) + 2}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+               if shared_strings else "") +
+            '</Relationships>'))
+        zf.writestr("xl/styles.xml", self.styles.to_xml())